@@ -2,6 +2,10 @@
 import ee
 import sys
 import os
+import time
+import logging
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 
 # Add parent directory and mapbiomas-mosaics directory to the Python path
 # This allows importing custom modules from these locations
@@ -17,12 +21,34 @@ from modules.SmaAndNdfi import *
 from modules.Miscellaneous import *
 from modules.SpectralIndexes import *
 from modules.CloudAndShadowMaskC2 import *
+from modules.DispatchLog import *
+
+# Log progress and failures with timestamps instead of bare prints
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s %(levelname)s %(message)s'
+)
+logger = logging.getLogger('mosaics')
+
+# Run counters: planned, dispatched, reused_cache and failed_<reason>
+exportCounters = Counter()
 
 # Prevent Python from writing .pyc files
 sys.dont_write_bytecode = True
 
+# Earth Engine project and API endpoint
+# Set useHighVolumeEndpoint to True to send the requests to the high-volume
+# endpoint (higher per-minute request quotas), only when the standard
+# endpoint's quota is measured to be the bottleneck
+eeProject = "mapbiomas-paraguay"
+useHighVolumeEndpoint = False
+highVolumeUrl = 'https://earthengine-highvolume.googleapis.com'
+
 # Initialize Google Earth Engine with the MapBiomas Paraguay project
-ee.Initialize(project = "mapbiomas-paraguay")
+if useHighVolumeEndpoint:
+    ee.Initialize(project=eeProject, opt_url=highVolumeUrl)
+else:
+    ee.Initialize(project=eeProject)
 
 # Version number for the mask assets
 versionMasks = '2'
@@ -326,6 +352,34 @@ outputCollections = {
 # This ensures overlap between adjacent tiles to avoid edge effects
 bufferSize = 100
 
+# Number of export requests allowed in flight at the same time
+# Starting a task is a blocking HTTP call, so a small pool of threads
+# hides the request latency without exceeding the Earth Engine rate limit
+exportWorkers = 8
+
+# Optional multi-year export
+# When set to an ImageCollection asset id, the yearly mosaics of each grid are
+# stacked into a single image (bands renamed <band>_<year>_<satellite>) and
+# exported once per grid to this collection, instead of one export task per
+# year. Grids whose multi-year image is already in this collection or in the
+# dispatch log are skipped before any yearly mosaic is built. Grids missing
+# any of the yearsSat mosaics (e.g. some were already exported or dispatched)
+# are not stacked and are logged instead.
+# Keep None to export one image per grid and year
+coalescedOutputCollection = None
+
+# Local SQLite file recording every export task already started, with its id
+# A restarted run skips these names instead of queueing them again, unless
+# the task failed or was cancelled on the server (those are queued again)
+# Delete the file to forget every started task
+dispatchLogPath = 'dispatched_tasks.db'
+
+# Retry policy for export tasks rejected by transient limits
+# (full task queue, request quota or rate limits)
+retryableErrors = ['Too many tasks', 'quota', 'rate limit']
+retryWaitSeconds = 60
+maxRetries = 5
+
 # List of year-satellite combinations to process
 # Each entry is [year, satellite_code]
 # Currently only processing 2025 with Landsat 8 and 9
@@ -494,7 +548,10 @@ def applyCloudAndShadowMask(collection):
                                        200, 700, 1200, 1700, 2200, 2700,
                                        3200, 3700, 4200, 4700
                                    ],
-                                   cloudBand='cloudScoreMask')
+                                   cloudBand='cloudScoreMask',
+                                   # Landsat Collection 2 surface reflectance, known here: no getInfo()
+                                   isToa=False,
+                                   isSentinel=False)
 
     # Apply the masks: keep only pixels where ALL masks indicate clear conditions
     collectionWithoutClouds = collectionWithMasks \
@@ -512,6 +569,156 @@ def applyCloudAndShadowMask(collection):
     return collectionWithoutClouds
 
 
+def getFailureReason(error):
+    """
+    Classify an export error for the run counters
+
+    Args:
+        error: exception raised while building or starting an export
+
+    Returns:
+        'quota', 'memory' or 'other'
+    """
+
+    message = str(error).lower()
+
+    if isRetryableError(error):
+        return 'quota'
+
+    if 'memory' in message:
+        return 'memory'
+
+    return 'other'
+
+
+def isRetryableError(error):
+    """
+    Check if an export error comes from a transient Earth Engine limit
+
+    Args:
+        error: exception raised by task.start()
+
+    Returns:
+        bool
+    """
+
+    message = str(error).lower()
+
+    return any(pattern.lower() in message for pattern in retryableErrors)
+
+
+def startTasks(tasks, connection=None):
+    """
+    Start a batch of export tasks concurrently
+    Each task.start() is an independent blocking request, so they are
+    submitted through a bounded thread pool instead of one after another
+
+    Tasks rejected by a transient limit (full queue, quota, rate) are put
+    back in the queue and retried after retryWaitSeconds, up to maxRetries
+    times. Other errors are printed and the task is dropped
+
+    Args:
+        tasks: list of (outputName, ee.batch.Task, metadata) tuples
+        connection: optional dispatch log where started tasks are recorded
+
+    Returns:
+        None
+
+    Raises:
+        Exception: if the task queue is still full after maxRetries attempts
+    """
+
+    attempt = 0
+
+    while len(tasks) > 0:
+
+        with ThreadPoolExecutor(max_workers=exportWorkers) as executor:
+            futures = [
+                (outputName, task, metadata, executor.submit(task.start))
+                for outputName, task, metadata in tasks
+            ]
+
+        retryTasks = []
+        lastError = None
+
+        for outputName, task, metadata, future in futures:
+            error = future.exception()
+
+            if error is None:
+                exportCounters['dispatched'] += 1
+                logger.info('dispatched %s', outputName)
+
+                if connection is not None:
+                    recordDispatch(connection, outputName, task.id, metadata)
+
+            elif isRetryableError(error):
+                logger.warning('start rejected %s: %s', outputName, error)
+                retryTasks.append((outputName, task, metadata))
+                lastError = error
+
+            else:
+                exportCounters['failed_' + getFailureReason(error)] += 1
+                logger.error('start failed %s: %s', outputName, error)
+
+        if len(retryTasks) == 0:
+            break
+
+        attempt += 1
+
+        # Give up once the retries are exhausted, keeping the behaviour of
+        # stopping the run when the queue stays full
+        if attempt > maxRetries:
+            exportCounters['failed_quota'] += len(retryTasks)
+            raise Exception(lastError)
+
+        logger.info('retrying %s tasks in %ss (attempt %s/%s)',
+                    len(retryTasks), retryWaitSeconds, attempt, maxRetries)
+
+        time.sleep(retryWaitSeconds)
+
+        tasks = retryTasks
+
+
+def getExistingNames(outputCollection, year, biome):
+    """
+    Get the names of the mosaics already exported for a biome and year
+
+    Args:
+        outputCollection: output ImageCollection asset id
+        year: mosaic year
+        biome: biome name
+
+    Returns:
+        List of system:index values
+    """
+
+    return ee.ImageCollection(outputCollection) \
+        .filterMetadata('year', 'equals', year) \
+        .filterMetadata('biome', 'equals', biome) \
+        .reduceColumns(ee.Reducer.toList(), ['system:index']) \
+        .get('list') \
+        .getInfo()
+
+
+def getCoalescedNames(outputCollection, biome):
+    """
+    Get the names of the multi-year mosaics already exported for a biome
+
+    Args:
+        outputCollection: multi-year output ImageCollection asset id
+        biome: biome name
+
+    Returns:
+        List of system:index values
+    """
+
+    return ee.ImageCollection(outputCollection) \
+        .filterMetadata('biome', 'equals', biome) \
+        .reduceColumns(ee.Reducer.toList(), ['system:index']) \
+        .get('list') \
+        .getInfo()
+
+
 def getTiles(collection):
     """
     Extract unique Landsat WRS path/row combinations from a collection
@@ -580,6 +787,14 @@ collectionTiles = ee.ImageCollection(assetMasks)
 allTiles = collectionTiles.reduceColumns(
     ee.Reducer.toList(), ['tile']).get('list').getInfo()
 
+# Names of the export tasks started by previous runs
+dispatchLog = openDispatchLog(dispatchLogPath)
+alreadyDispatched = getDispatchedNames(dispatchLog)
+
+# Background worker that fetches the next year's existing mosaics while the
+# current year's grids are being built and dispatched
+prefetcher = ThreadPoolExecutor(max_workers=1)
+
 # Main processing loop: iterate through biomes
 for biomeName in biomeNames:
 
@@ -589,45 +804,152 @@ for biomeName in biomeNames:
         ee.Filter.inList('grid_name', gridNames[biomeName])
     )
 
+    # Buffer every grid server-side in a single map and fetch all the
+    # resulting footprints in one request, instead of filtering, buffering
+    # and downloading each grid geometry inside the grid loop
+    gridGeometries = grids \
+        .map(
+            lambda feature: ee.Feature(
+                feature.geometry().buffer(bufferSize).bounds(),
+                {'grid_name': feature.get('grid_name')}
+            )
+        ) \
+        .getInfo()
+
+    gridGeometries = dict(
+        (feature['properties']['grid_name'], feature['geometry'])
+        for feature in gridGeometries['features']
+    )
+
+    # Values that only depend on the biome are resolved once per biome
+    versionStr = str(version[biomeName])
+    biomeFilter = dataFilter[biomeName]
+    biomeGridNames = gridNames[biomeName]
+
+    # Generate mosaic from the processed collection
+    # Use different percentile bands for different biomes
+    if biomeName in ['PANTANAL']:
+        percentileBand = 'ndwi'  # Water index for wetland biome
+    else:
+        percentileBand = 'ndvi'  # Vegetation index for other biomes
+
+    # Yearly mosaics of each grid, kept when exporting multi-year images
+    yearMosaics = {}
+
+    # Multi-year names are known before any year is built: grids whose
+    # multi-year image already exists or was dispatched are skipped in every
+    # year, so their yearly mosaics and tile lists are never requested
+    coalescedNames = {}
+    coalescedDone = set()
+
+    if coalescedOutputCollection is not None:
+        years = [year for year, satellite in yearsSat]
+
+        # Format: BIOME-GRID-FIRSTYEAR_LASTYEAR-VERSION
+        coalescedNames = dict(
+            (gridName, biomeName + '-' + gridName + '-' +
+             str(min(years)) + '_' + str(max(years)) + '-' + versionStr)
+            for gridName in biomeGridNames
+        )
+
+        alreadyCoalesced = getCoalescedNames(
+            coalescedOutputCollection, biomeName)
+
+        for gridName, outputName in coalescedNames.items():
+            if outputName in alreadyCoalesced or outputName in alreadyDispatched:
+                exportCounters['planned'] += 1
+                exportCounters['reused_cache'] += 1
+                coalescedDone.add(gridName)
+
+    # Start fetching the existing mosaics of the first year-satellite pair
+    nextExisting = None
+    if len(yearsSat) > 0:
+        nextExisting = prefetcher.submit(
+            getExistingNames,
+            outputCollections[yearsSat[0][1]], yearsSat[0][0], biomeName)
+
     # Iterate through year-satellite combinations
-    for year, satellite in yearsSat:
+    for index, (year, satellite) in enumerate(yearsSat):
+
+        # Take the prefetched list for this year and immediately start the
+        # request for the next one, so it runs behind this year's dispatch
+        existing = nextExisting
+        if index + 1 < len(yearsSat):
+            nextYear, nextSatellite = yearsSat[index + 1]
+            nextExisting = prefetcher.submit(
+                getExistingNames,
+                outputCollections[nextSatellite], nextYear, biomeName)
 
         # Construct date range strings for this biome and year
-        dateStart = '{}-{}'.format(year, dataFilter[biomeName]['dateStart'])
-        dateEnd = '{}-{}'.format(year, dataFilter[biomeName]['dateEnd'])
-        cloudCover = dataFilter[biomeName]['cloudCover']
+        dateStart = '{}-{}'.format(year, biomeFilter['dateStart'])
+        dateEnd = '{}-{}'.format(year, biomeFilter['dateEnd'])
+        cloudCover = biomeFilter['cloudCover']
+
+        # Full-year date range used to query the raw collection
+        yearStart = '{}-{}'.format(year, '01-01')
+        yearEnd = '{}-{}'.format(year, '12-31')
+
+        # Values that only depend on the year and satellite are resolved
+        # once here instead of once per grid
+        outputCollection = outputCollections[satellite]
+        assetPrefix = outputCollection + '/'
+        collectionId = collectionIds[satellite]
+        namePrefix = biomeName + '-'
+        nameSuffix = '-' + str(year) + '-' + satellite.upper() + '-' + versionStr
+
+        # Get standardized band names for this satellite
+        bands = getBandNames(satellite + 'c2')
+
+        # Get spectral endmembers for SMA (Spectral Mixture Analysis)
+        endmember = ENDMEMBERS[landsatIds[satellite]]
+
+        # Check which mosaics already exist in the output collection.
+        # The list does not depend on the grid, so it is fetched once
+        # A failed prefetch is retried here; if the retry fails too, the year
+        # is skipped and the run goes on with the next one
+        try:
+            alreadyInCollection = existing.result()
+        except Exception as e:
+            logger.warning('existing mosaics prefetch failed year=%s biome=%s: '
+                           '%s, retrying', year, biomeName, e)
+            try:
+                alreadyInCollection = getExistingNames(
+                    outputCollection, year, biomeName)
+            except Exception as e:
+                exportCounters['failed_' + getFailureReason(e)] += 1
+                logger.exception('existing mosaics unavailable, year skipped '
+                                 'year=%s biome=%s', year, biomeName)
+                continue
+
+        # Export tasks built for this year, started together at the end
+        pendingTasks = []
 
         # Iterate through each grid tile for this biome
-        for gridName in gridNames[biomeName]:
+        for gridName in biomeGridNames:
 
-            try:
-                # Check if this mosaic already exists in the output collection
-                # if True:
-                alreadyInCollection = ee.ImageCollection(outputCollections[satellite]) \
-                    .filterMetadata('year', 'equals', year) \
-                    .filterMetadata('biome', 'equals', biomeName) \
-                    .reduceColumns(ee.Reducer.toList(), ['system:index']) \
-                    .get('list') \
-                    .getInfo()
+            if gridName in coalescedDone:
+                continue
 
+            try:
                 # Construct output mosaic name following naming convention
                 # Format: BIOME-GRID-YEAR-SATELLITE-VERSION
-                outputName = biomeName + '-' + \
-                    gridName + '-' + \
-                    str(year) + '-' + \
-                    satellite.upper() + '-' + \
-                    str(version[biomeName])
+                outputName = namePrefix + gridName + nameSuffix
+
+                exportCounters['planned'] += 1
 
                 # Only process if mosaic doesn't already exist
-                if outputName not in alreadyInCollection:
+                if outputName in alreadyInCollection:
+                    exportCounters['reused_cache'] += 1
+
+                # Skip mosaics started by a previous run and still pending
+                elif outputName in alreadyDispatched:
+                    exportCounters['reused_cache'] += 1
 
-                    # Get the geometry for this specific grid
-                    grid = grids.filterMetadata(
-                        'grid_name', 'equals', gridName)
+                else:
 
-                    # Extract geometry and buffer it to ensure tile overlap
-                    grid = ee.Feature(grid.first()).geometry()\
-                        .buffer(bufferSize).bounds()
+                    # Get the buffered geometry for this specific grid
+                    # The buffer ensures tile overlap
+                    grid = ee.Geometry(gridGeometries[gridName])
 
                     # Initialize excluded images list (currently empty)
                     excluded = []
@@ -637,11 +959,9 @@ for biomeName in biomeNames:
 
                     # Get Landsat image collection for this grid and year
                     # Note: Uses full year date range, not biome-specific range
-                    collection = getCollection(collectionIds[satellite],
-                                               dateStart='{}-{}'.format(
-                                                   year, '01-01'),
-                                               dateEnd='{}-{}'.format(
-                                                   year, '12-31'),
+                    collection = getCollection(collectionId,
+                                               dateStart=yearStart,
+                                               dateEnd=yearEnd,
                                                cloudCover=cloudCover,
                                                geometry=grid,
                                                trashList=excluded
@@ -663,7 +983,7 @@ for biomeName in biomeNames:
                     if len(tiles) > 0:
                         # Apply tile-specific mask for each path/row
                         for tile in tiles:
-                            print(tile['path'], tile['row'])
+                            logger.info('tile %s/%s', tile['path'], tile['row'])
 
                             # Filter collection to this specific tile
                             subcollection = collection \
@@ -693,9 +1013,6 @@ for biomeName in biomeNames:
                         # Convert from iterated result back to ImageCollection
                         collection = ee.ImageCollection(collection)
 
-                        # Get standardized band names for this satellite
-                        bands = getBandNames(satellite + 'c2')
-
                         # Rename bands to standardized names (blue, green, red, nir, etc.)
                         collection = collection.select(
                             bands['bandNames'],
@@ -705,9 +1022,6 @@ for biomeName in biomeNames:
                         # Apply cloud and shadow masking
                         collection = applyCloudAndShadowMask(collection)
 
-                        # Get spectral endmembers for SMA (Spectral Mixture Analysis)
-                        endmember = ENDMEMBERS[landsatIds[satellite]]
-
                         # Calculate SMA fractions (vegetation, soil, shade, etc.)
                         collection = collection.map(
                             lambda image: image.addBands(
@@ -716,31 +1030,14 @@ for biomeName in biomeNames:
 
                         # Calculate SMA-based indices
                         collection = collection\
-                            .map(getNDFI)\
-                            .map(getSEFI)\
-                            .map(getWEFI)\
-                            .map(getFNS)
+                            .map(getFractionIndices)
 
                         # Calculate spectral vegetation indices
-                        collection = collection\
-                            .map(divideBy10000)\
-                            .map(getCAI)\
-                            .map(getEVI2)\
-                            .map(getGCVI)\
-                            .map(getHallCover)\
-                            .map(getHallHeigth)\
-                            .map(getNDVI)\
-                            .map(getNDWI)\
-                            .map(getPRI)\
-                            .map(getSAVI)\
-                            .map(multiplyBy10000)
-
-                        # Generate mosaic from the processed collection
-                        # Use different percentile bands for different biomes
-                        if biomeName in ['PANTANAL']:
-                            percentileBand = 'ndwi'  # Water index for wetland biome
-                        else:
-                            percentileBand = 'ndvi'  # Vegetation index for other biomes
+                        collection = collection.map(divideBy10000)
+                        collection = mapIndices(collection,
+                                                ['cai', 'evi2', 'gcvi', 'hallcover', 'hallheigth',
+                                                 'ndvi', 'ndwi', 'pri', 'savi'])
+                        collection = collection.map(multiplyBy10000)
 
                         # Create composite using percentile-based pixel selection
                         mosaic = getMosaic(collection,
@@ -751,38 +1048,119 @@ for biomeName in biomeNames:
                                            dateEnd=dateEnd)
 
                         # Add texture and terrain bands
-                        mosaic = getEntropyG(mosaic)  # Entropy (texture measure)
-                        mosaic = getSlope(mosaic)      # Terrain slope
+                        mosaic = getEntropyGAndSlope(mosaic)  # Entropy texture and terrain slope
                         mosaic = setBandTypes(mosaic)  # Set appropriate data types
 
                         # Add metadata properties to the mosaic
                         mosaic = mosaic.set('year', year)
                         mosaic = mosaic.set('collection', 8.0)
                         mosaic = mosaic.set('grid_name', gridName)
-                        mosaic = mosaic.set('version', str(version[biomeName]))
+                        mosaic = mosaic.set('version', versionStr)
                         mosaic = mosaic.set('biome', biomeName)
                         mosaic = mosaic.set('satellite', satellite)
 
-                        print(outputName)
+                        # Keep the mosaic to be exported with the other years
+                        if coalescedOutputCollection is not None:
+                            yearMosaics.setdefault(gridName, []).append(
+                                (year, satellite, mosaic))
+                            continue
 
                         # Export mosaic to Earth Engine asset
                         task = ee.batch.Export.image.toAsset(
                             image=mosaic,
                             description=outputName,
-                            assetId=outputCollections[satellite] +
-                            '/' + outputName,
-                            region=grid.coordinates().getInfo(),
+                            assetId=assetPrefix + outputName,
+                            region=grid,
                             scale=30,                    # 30m spatial resolution (Landsat native)
                             maxPixels=int(1e13)          # Maximum pixels to export
                         )
 
-                        # Start the export task
-                        task.start()
+                        # Queue the export task to be started with the others
+                        pendingTasks.append((outputName, task, {
+                            'grid': gridName,
+                            'biome': biomeName,
+                            'satellite': satellite,
+                            'year': year,
+                            'version': versionStr,
+                        }))
 
             except Exception as e:
-                # Handle errors, particularly task queue limits
-                msg = 'Too many tasks already in the queue (3000). Please wait for some of them to complete.'
-                print(e)
-                # Re-raise exception if it's the queue limit error
-                if e == msg:
-                    raise Exception(e)
+                # Tasks are started by startTasks(), which raises on a full
+                # queue after maxRetries; errors here come from building the
+                # grid mosaic and are logged per grid
+                exportCounters['failed_' + getFailureReason(e)] += 1
+                logger.exception('export failed grid=%s year=%s biome=%s',
+                                 gridName, year, biomeName)
+
+        # Start all export tasks of this year concurrently
+        startTasks(pendingTasks, dispatchLog)
+
+    # Export one multi-year image per grid
+    if coalescedOutputCollection is not None:
+
+        # Band order produced by setBandTypes
+        mosaicBands = [band for band, dataType in BANDS_SPECIFICATIONS['biomes']]
+
+        pendingTasks = []
+
+        for gridName, mosaics in yearMosaics.items():
+
+            # Refuse partial stacks: the name covers the full range of years
+            missing = [
+                [year, satellite] for year, satellite in yearsSat
+                if (year, satellite) not in
+                [(y, s) for y, s, mosaic in mosaics]
+            ]
+
+            if len(missing) > 0:
+                exportCounters['skipped_partial'] += 1
+                logger.warning('multi-year export skipped grid=%s biome=%s: '
+                               'missing %s', gridName, biomeName, missing)
+                continue
+
+            years = [year for year, satellite, mosaic in mosaics]
+
+            # Existing and dispatched names were skipped before the years
+            outputName = coalescedNames[gridName]
+
+            exportCounters['planned'] += 1
+
+            # Stack the yearly mosaics, suffixing each band with its year and
+            # satellite (several satellites can share a year)
+            mosaic = ee.Image.cat([
+                mosaic.rename(
+                    ['{}_{}_{}'.format(band, year, satellite)
+                     for band in mosaicBands])
+                for year, satellite, mosaic in mosaics
+            ])
+
+            satellites = ','.join(
+                satellite for year, satellite, mosaic in mosaics)
+
+            mosaic = mosaic.set('years', years)
+            mosaic = mosaic.set('collection', 8.0)
+            mosaic = mosaic.set('grid_name', gridName)
+            mosaic = mosaic.set('version', versionStr)
+            mosaic = mosaic.set('biome', biomeName)
+            mosaic = mosaic.set('satellite', satellites)
+
+            task = ee.batch.Export.image.toAsset(
+                image=mosaic,
+                description=outputName,
+                assetId=coalescedOutputCollection + '/' + outputName,
+                region=ee.Geometry(gridGeometries[gridName]),
+                scale=30,
+                maxPixels=int(1e13)
+            )
+
+            pendingTasks.append((outputName, task, {
+                'grid': gridName,
+                'biome': biomeName,
+                'satellite': satellites,
+                'year': min(years),
+                'version': versionStr,
+            }))
+
+        startTasks(pendingTasks, dispatchLog)
+
+logger.info('export summary: %s', dict(exportCounters))
@@ -609,30 +609,15 @@ for year, satellite in yearsSat:
                                                 maxCloudProbability=CLOUD_PROBABILITY[biomeName])
 
                     # Apply Spectral Mixture Analysis to decompose pixels into fractions
-                    # (e.g., % vegetation, % soil, % shade)
-                    collection = collection.map(
-                        lambda image: getFractions(image, endmember))
-                    
-                    # Calculate SMA-based indices
-                    collection = collection\
-                        .map(getNDFI)\
-                        .map(getSEFI)\
-                        .map(getWEFI)\
-                        .map(getFNS)
+                    # (e.g., % vegetation, % soil, % shade) and calculate SMA-based indices
+                    collection = mapFractionsAndIndices(collection, endmember)
 
                     # Calculate spectral vegetation and water indices
-                    collection = collection\
-                        .map(divideBy10000)\
-                        .map(getCAI)\
-                        .map(getEVI2)\
-                        .map(getGCVI)\
-                        .map(getHallCover)\
-                        .map(getHallHeigth)\
-                        .map(getNDVI)\
-                        .map(getNDWI)\
-                        .map(getPRI)\
-                        .map(getSAVI)\
-                        .map(multiplyBy10000)
+                    collection = collection.map(divideBy10000)
+                    collection = mapIndices(collection,
+                                            ['cai', 'evi2', 'gcvi', 'hallcover', 'hallheigth',
+                                             'ndvi', 'ndwi', 'pri', 'savi'])
+                    collection = collection.map(multiplyBy10000)
                     
                     # Remove noisy edges using orbit masks
                     # Eliminates artifacts at boundaries between adjacent Sentinel-2 tiles
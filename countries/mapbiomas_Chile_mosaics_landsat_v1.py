@@ -268,7 +268,10 @@ def applyCloudAndShadowMask(collection):
                                        200, 700, 1200, 1700, 2200, 2700,
                                        3200, 3700, 4200, 4700
                                    ],
-                                   cloudBand='cloudShadowFlagMask')
+                                   cloudBand='cloudShadowFlagMask',
+                                   # Landsat Collection 2 surface reflectance, known here: no getInfo()
+                                   isToa=False,
+                                   isSentinel=False)
 
     # get collection without clouds
     collectionWithoutClouds = collectionWithMasks \
@@ -451,24 +454,14 @@ for territoryName in territoryNames:
 
                         # calculate SMA indexes
                         collection = collection\
-                            .map(getNDFI)\
-                            .map(getSEFI)\
-                            .map(getWEFI)\
-                            .map(getFNS)
+                            .map(getFractionIndices)
 
                         # calculate Spectral indexes
-                        collection = collection\
-                            .map(divideBy10000)\
-                            .map(getCAI)\
-                            .map(getEVI2)\
-                            .map(getGCVI)\
-                            .map(getHallCover)\
-                            .map(getHallHeigth)\
-                            .map(getNDVI)\
-                            .map(getNDWI)\
-                            .map(getPRI)\
-                            .map(getSAVI)\
-                            .map(multiplyBy10000)
+                        collection = collection.map(divideBy10000)
+                        collection = mapIndices(collection,
+                                                ['cai', 'evi2', 'gcvi', 'hallcover', 'hallheigth',
+                                                 'ndvi', 'ndwi', 'pri', 'savi'])
+                        collection = collection.map(multiplyBy10000)
 
                         # Generate annual mosaic using percentile-based compositing
                         # Pantanal uses NDWI (water index), others use NDVI (vegetation)
@@ -485,8 +478,7 @@ for territoryName in territoryNames:
                                            dateEnd=dateEnd)
 
                         # Add texture and topography bands
-                        mosaic = getEntropyG(mosaic)  # GLCM entropy texture
-                        mosaic = getSlope(mosaic)     # Terrain slope
+                        mosaic = getEntropyGAndSlope(mosaic)  # GLCM entropy texture and terrain slope
                         
                         # Set appropriate data types for each band
                         mosaic = setBandTypes(mosaic, mtype="countries")
@@ -139,7 +139,10 @@ def applyCloudAndShadowMask(collection,shadowsum, cloudThresh):
                                        200, 700, 1200, 1700, 2200, 2700,
                                        3200, 3700, 4200, 4700
                                    ],
-                                   cloudBand='cloudScoreMask') #cloudScoreMask,  'cloudFlagMask'
+                                   cloudBand='cloudScoreMask', #cloudScoreMask,  'cloudFlagMask'
+                                   # Landsat Collection 2 surface reflectance, known here: no getInfo()
+                                   isToa=False,
+                                   isSentinel=False)
 
     # get collection without clouds
     collectionWithoutClouds = collectionWithMasks \
@@ -565,10 +568,7 @@ for row in table.itertuples():
                 .map(
                     lambda image: getNDFIb(image, endmember)
                     ) \
-                .map(getNDFI)\
-                .map(getSEFI)\
-                .map(getWEFI)\
-                .map(getFNS)
+                .map(getFractionIndices)
 
 
             
@@ -34,6 +34,8 @@ Dependencies: earthengine-api
 """
 
 import ee
+import sys
+import functools
 
 # Standard Landsat band names (8 bands)
 LANDSAT_NEW_NAMES = [
@@ -260,7 +262,25 @@ BAND_NAMES = {
     },
 }
 
+# Intern every band name so that the same string object is reused by all
+# products and by every select() built from them. Lists are updated in
+# place to keep LANDSAT_NEW_NAMES / SENTINEL_NEW_NAMES shared between keys
+for _names in [LANDSAT_NEW_NAMES, SENTINEL_NEW_NAMES]:
+    _names[:] = [sys.intern(name) for name in _names]
 
+for _product in BAND_NAMES.values():
+    for _names in _product.values():
+        _names[:] = [sys.intern(name) for name in _names]
+
+# Reverse mapping from standardized name to the original band name, per product
+# Example: BAND_NAME_REVERSE['l8c2']['nir'] -> 'SR_B5'
+BAND_NAME_REVERSE = {
+    key: dict(zip(value['newNames'], value['bandNames']))
+    for key, value in BAND_NAMES.items()
+}
+
+
+@functools.lru_cache(maxsize=None)
 def getBandNames(key):
     """
     Retrieve standardized band name mapping for a satellite product.
@@ -367,3 +387,33 @@ def getBandNames(key):
         - Sentinel-2 band info: https://sentinels.copernicus.eu/
     """
     return BAND_NAMES[key]
+
+
+def getBandName(key, newName):
+    """
+    Retrieve the original band name of a product from its standardized name.
+    
+    This is the inverse of the mapping returned by getBandNames(). The lookup is
+    done on the precomputed BAND_NAME_REVERSE dictionary, so callers don't need
+    to zip and search the 'bandNames'/'newNames' lists themselves.
+    
+    Args:
+        key (str): Product identifier key (same keys as getBandNames)
+        newName (str): Standardized band name (e.g., 'nir', 'swir1', 'pixel_qa')
+    
+    Returns:
+        str: Original band name in the satellite product
+    
+    Raises:
+        KeyError: If the key or the standardized name is not defined
+    
+    Example Usage:
+        >>> getBandName('l8c2', 'nir')
+        'SR_B5'
+        >>> getBandName('s2', 'pixel_qa')
+        'QA60'
+    
+    See Also:
+        - getBandNames(): Full mapping for a product
+    """
+    return BAND_NAME_REVERSE[key][newName]
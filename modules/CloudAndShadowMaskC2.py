@@ -24,10 +24,21 @@ Reference: Adapted from Google Earth Engine cloud masking examples
 
 import ee
 import math
+from concurrent.futures import ThreadPoolExecutor
 
 # Uncomment to initialize Earth Engine (typically done in main script)
 # ee.Initialize()
 
+# QA bit values used by the flag masks
+_BIT3 = 8       # 2^3: Landsat cloud
+_BIT4 = 16      # 2^4: Landsat cloud shadow
+_BIT10 = 1024   # 2^10: Sentinel-2 opaque cloud
+_BIT11 = 2048   # 2^11: Sentinel-2 cirrus
+
+# Angle constants used by the shadow projection
+_HALF_PI = math.pi / 2.0
+_DEG2RAD = math.pi / 180.0
+
 
 def rescale(image, min=0, max=10000):
     """
@@ -55,14 +66,20 @@ def rescale(image, min=0, max=10000):
         >>> # Value 1000 becomes 0.0, 2000 becomes 0.5, 3000 becomes 1.0
     
     Note:
-        Used internally by cloudScoreMask to normalize spectral bands
-        for cloud probability calculation
+        cloudScoreMask inlines the same formula in its score expression;
+        this function is kept as a public helper
     """
     image = ee.Image(image)
 
+    # Constant bounds are subtracted in Python, so no ee.Number node is built
+    if isinstance(min, (int, float)) and isinstance(max, (int, float)):
+        denominator = max - min
+    else:
+        denominator = ee.Number(max).subtract(min)
+
     # Linear normalization formula
     image = image.subtract(min) \
-        .divide(ee.Number(max).subtract(min))
+        .divide(denominator)
 
     return image
 
@@ -110,37 +127,39 @@ def cloudScoreMask(image, cloudThresh):
         - Does not use thermal band (Sentinel-2 doesn't have thermal)
         - More conservative than simple brightness threshold
         - Works well combined with QA band masks
+        - cloudScoreMask is masked where green or swir1 is negative, as the
+          NDSI of normalizedDifference() is
     
     Reference:
         Based on Google Earth Engine's Simple Cloud Score algorithm
     """
     image = ee.Image(image)
     
-    # Initialize score as perfect (1.0 = clear sky)
-    score = ee.Image(1.0)
-
-    # Test 1: Clouds are reasonably bright in the blue band
-    # Typical clear sky: 1000, clouds: 3000+
-    blue = image.select(['blue'])
-    score = score.min(rescale(blue, min=1000, max=3000))
-
-    # Test 2: Clouds are reasonably bright in all visible bands
-    # Sum of red + green + blue
-    visibleSum = image.expression("b('red') + b('green') + b('blue')")
-    score = score.min(rescale(visibleSum, min=2000, max=8000))
-
-    # Test 3: Clouds are reasonably bright in all infrared bands
-    # Sum of NIR + SWIR1 + SWIR2
-    infraredSum = image.expression("b('nir') + b('swir1') + b('swir2')")
-    score = score.min(rescale(infraredSum, min=3000, max=8000))
-
-    # Note: Thermal band test disabled because Sentinel-2 lacks thermal band
-    # temperature = image.select('temp')
-
-    # Test 4: Clouds are not snow (NDSI test)
-    # Snow has high NDSI (>0.8), clouds have lower NDSI
+    # NDSI from normalizedDifference(), which computes in float and masks the
+    # pixels where green or swir1 is negative (water, dark shadows): the
+    # score, and so cloudScoreMask, stays masked there
     ndsi = image.normalizedDifference(['green', 'swir1'])
-    score = score.min(rescale(ndsi, min=0.8, max=0.6))
+
+    # All four tests are rescaled and combined with min() in a single
+    # expression, starting from a perfect score (1.0 = clear sky)
+    # Each term is rescale(value, min, max) = (value - min) / (max - min)
+    score = image.expression(
+        "min(min(min(min(1.0, "
+        # Test 1: Clouds are reasonably bright in the blue band
+        # Typical clear sky: 1000, clouds: 3000+
+        "(b('blue') - 1000) / 2000.0), "
+        # Test 2: Clouds are reasonably bright in all visible bands
+        # Sum of red + green + blue
+        "(b('red') + b('green') + b('blue') - 2000) / 6000.0), "
+        # Test 3: Clouds are reasonably bright in all infrared bands
+        # Sum of NIR + SWIR1 + SWIR2
+        "(b('nir') + b('swir1') + b('swir2') - 3000) / 5000.0), "
+        # Note: Thermal band test disabled because Sentinel-2 lacks thermal band
+        # Test 4: Clouds are not snow (NDSI test, rescaled from 0.8 to 0.6)
+        # Snow has high NDSI (>0.8), clouds have lower NDSI
+        "(0.8 - ndsi) / 0.2)",
+        {'ndsi': ndsi}
+    )
 
     # Convert score to 0-100 range and apply threshold
     score = score.multiply(100).byte()
@@ -176,6 +195,7 @@ def tdom(collection,
             Pixels with NIR+SWIR sum below this are potential shadows
             Lower values = more aggressive shadow detection
         dilatePixels (int, optional): Pixels to dilate shadow mask (default: 2)
+            Coerced to int so a single kernel is shared by every image
             Erosion/buffer applied to shadow mask for cleaner edges
     
     Returns:
@@ -206,45 +226,50 @@ def tdom(collection,
     Reference:
         Temporal Dark Outlier Mask (TDOM) algorithm for cloud shadow detection
     """
+    # Kernel radius must be an integer number of pixels so the same
+    # kernel is reused by every image
+    dilatePixels = int(dilatePixels)
+
     # Bands used for shadow detection (infrared bands sensitive to shadows)
     shadowSumBands = ['nir', 'swir1']
 
-    # Compute standard deviation of infrared bands across time
-    irStdDev = collection \
+    # Compute standard deviation and mean of infrared bands across time
+    # in a single pass over the collection
+    irStats = collection \
         .select(shadowSumBands) \
-        .reduce(ee.Reducer.stdDev())
+        .reduce(ee.Reducer.stdDev().combine(ee.Reducer.mean(), sharedInputs=True))
 
-    # Compute mean of infrared bands across time
-    irMean = collection \
-        .select(shadowSumBands) \
-        .mean()
+    irStdDev = irStats.select('.*_stdDev')
+    irMean = irStats.select('.*_mean')
+
+    # Structuring element for the erosion, built once and shared by every
+    # image (same circle kernel focal_min uses by default)
+    erosionKernel = ee.Kernel.circle(radius=dilatePixels, units='pixels')
 
     def _maskDarkOutliers(image):
         """
         Internal function to identify dark outliers in a single image.
         """
-        # Calculate z-score: (value - mean) / stdDev
-        # Negative z-scores indicate darker than average
-        zScore = image.select(shadowSumBands) \
-            .subtract(irMean) \
-            .divide(irStdDev)
-
-        # Calculate sum of infrared bands
-        irSum = image.select(shadowSumBands) \
-            .reduce(ee.Reducer.sum())
-
-        # Shadow criteria:
-        # 1. Z-score < threshold for both NIR and SWIR (both bands dark)
+        # Shadow criteria, evaluated in a single expression:
+        # 1. Z-score (value - mean) / stdDev < threshold for both NIR and
+        #    SWIR (both bands darker than average)
         # 2. Sum of infrared bands < threshold (absolute darkness test)
-        tdomMask = zScore.lt(zScoreThresh) \
-            .reduce(ee.Reducer.sum()) \
-            .eq(2) \
-            .And(irSum.lt(shadowSumThresh))
+        tdomMask = image.expression(
+            "(nir - mN) / sN < z && (swir - mS) / sS < z && (nir + swir) < sumT", {
+                'nir': image.select(shadowSumBands[0]),
+                'swir': image.select(shadowSumBands[1]),
+                'mN': irMean.select(0),
+                'mS': irMean.select(1),
+                'sN': irStdDev.select(0),
+                'sS': irStdDev.select(1),
+                'z': zScoreThresh,
+                'sumT': shadowSumThresh,
+            })
 
         # Apply morphological erosion to clean up mask edges
-        tdomMask = tdomMask.focal_min(dilatePixels)
+        tdomMask = tdomMask.focal_min(kernel=erosionKernel)
 
-        return image.addBands(tdomMask.rename('tdomMask'))
+        return image.addBands(tdomMask.toByte().rename('tdomMask'))
 
     # Apply shadow detection to each image in collection
     collection = collection.map(_maskDarkOutliers)
@@ -277,6 +302,7 @@ def cloudProject(image,
             Example: [200, 500, 1000, 2000, 5000]
             Multiple heights help capture shadows from clouds at various altitudes
         dilatePixels (int, optional): Pixels to dilate shadow mask (default: 2)
+            Coerced to int so a single kernel is shared by every image
             Buffer applied to projected shadow for better coverage
     
     Returns:
@@ -317,6 +343,9 @@ def cloudProject(image,
     Reference:
         Cloud shadow projection using solar geometry
     """
+    # Kernel radius must be an integer number of pixels
+    dilatePixels = int(dilatePixels)
+
     # Get cloud mask band (detected clouds)
     cloud = image.select([cloudBand])
 
@@ -330,7 +359,9 @@ def cloudProject(image,
         .lt(shadowSumThresh)
 
     # Get pixel size for projection calculations
-    nominalScale = cloud.projection().nominalScale()
+    # The projection is reused by every shifted cloud mask
+    cloudProjection = cloud.projection()
+    nominalScale = cloudProjection.nominalScale()
 
     # Extract solar geometry from image metadata
     meanAzimuth = image.get('sun_azimuth_angle')
@@ -339,15 +370,23 @@ def cloudProject(image,
     # Convert azimuth to radians and adjust for coordinate system
     # Add π/2 to convert from north-clockwise to east-counterclockwise
     azR = ee.Number(meanAzimuth) \
-        .multiply(math.pi) \
-        .divide(180.0) \
-        .add(ee.Number(0.5).multiply(math.pi))
+        .multiply(_DEG2RAD) \
+        .add(_HALF_PI)
 
     # Convert elevation to zenith angle in radians
     # Zenith = 90° - elevation
-    zenR = ee.Number(0.5) \
-        .multiply(math.pi) \
-        .subtract(ee.Number(meanElevation).multiply(math.pi).divide(180.0))
+    zenR = ee.Number(meanElevation) \
+        .multiply(-_DEG2RAD) \
+        .add(_HALF_PI)
+
+    # Shadow offset in pixels per meter of cloud height along each axis
+    # These only depend on the solar geometry and pixel size, so they are
+    # computed once per image instead of once per cloud height
+    # x = cos(azimuth) × tan(zenith) / pixel_size
+    # y = sin(azimuth) × tan(zenith) / pixel_size
+    tanZen = zenR.tan()
+    xPerMeter = azR.cos().multiply(tanZen).divide(nominalScale)
+    yPerMeter = azR.sin().multiply(tanZen).divide(nominalScale)
 
     def _findShadow(cloudHeight):
         """
@@ -361,41 +400,51 @@ def cloudProject(image,
         """
         cloudHeight = ee.Number(cloudHeight)
 
-        # Calculate shadow distance using trigonometry
-        # distance = tan(zenith) × height
-        shadowCastedDistance = zenR.tan() \
-            .multiply(cloudHeight)
-
         # Calculate x offset (east-west) in pixels
-        # x = cos(azimuth) × distance / pixel_size
-        x = azR.cos().multiply(shadowCastedDistance) \
-            .divide(nominalScale).round()
+        x = xPerMeter.multiply(cloudHeight).round()
 
         # Calculate y offset (north-south) in pixels
-        # y = sin(azimuth) × distance / pixel_size
-        y = azR.sin().multiply(shadowCastedDistance) \
-            .divide(nominalScale).round()
+        y = yPerMeter.multiply(cloudHeight).round()
 
         # Shift cloud mask by calculated offset
-        return cloud.changeProj(cloud.projection(), 
-                               cloud.projection().translate(x, y))
+        return cloud.changeProj(cloudProjection,
+                                cloudProjection.translate(x, y))
 
     # Project shadows for all specified cloud heights
-    shadows = ee.List(cloudHeights).map(_findShadow)
+    # Heights are known on the client, so the shifted cloud masks are
+    # stacked as bands of one image instead of mapped over an ee.List
+    shadows = [
+        _findShadow(cloudHeight).rename('h{}'.format(index))
+        for index, cloudHeight in enumerate(cloudHeights)
+    ]
 
     # Combine all shadow projections (take maximum to include all)
-    shadow = ee.ImageCollection.fromImages(shadows).max().unmask()
+    # unmask() is still needed after the max: pixels translated in from
+    # outside the cloud band footprint are masked, and they must count as
+    # "no shadow" instead of masking the final shadow test
+    if len(shadows) > 0:
+        shadow = ee.Image.cat(shadows).reduce(ee.Reducer.max()).unmask()
+    else:
+        shadow = ee.Image(0)
     
     # Dilate shadow mask to ensure coverage
-    shadow = shadow.focal_max(dilatePixels)
+    shadow = shadow.focal_max(
+        kernel=ee.Kernel.circle(radius=dilatePixels, units='pixels'))
     
     # Refine shadow mask using additional criteria:
     # 1. Must be dark pixel (darkPixels)
     # 2. Must not be TDOM anomaly (not shadow from TDOM perspective)
     # 3. Must not be cloud itself
-    shadow = shadow.And(darkPixels).And(tdomMask.Not().And(cloud.Not()))
+    # All tests are evaluated in a single per-pixel expression
+    shadow = shadow.expression(
+        "s && d && !t && !c", {
+            's': shadow,
+            'd': darkPixels,
+            't': tdomMask,
+            'c': cloud,
+        })
 
-    shadowMask = shadow.rename(['cloudShadowTdomMask'])
+    shadowMask = shadow.toByte().rename(['cloudShadowTdomMask'])
 
     return image.addBands(shadowMask)
 
@@ -416,13 +465,15 @@ def cloudFlagMaskToaLX(image):
     QA Bit Mapping:
         Bit 3: Cloud (1 = yes, 0 = no)
     """
-    qaBand = ee.Image(image.select(['pixel_qa']))
+    qaBand = image.select(['pixel_qa'])
 
     # Extract bit 3 using bitwise AND with 2^3 = 8
-    cloudMask = qaBand.bitwiseAnd(int(math.pow(2, 3))) \
+    cloudMask = qaBand.bitwiseAnd(_BIT3) \
+        .neq(0) \
+        .toByte() \
         .rename('cloudFlagMask')
 
-    return ee.Image(cloudMask)
+    return cloudMask
 
 
 def cloudFlagMaskToaS2(image):
@@ -442,18 +493,32 @@ def cloudFlagMaskToaS2(image):
         Bit 10: Thin cirrus (1 = yes, 0 = no)
         Bit 11: Cloud (1 = yes, 0 = no)
     """
-    qaBand = ee.Image(image.select(['pixel_qa']))
+    qaBand = image.select(['pixel_qa'])
 
-    # Extract bits 10 and 11 using bitwise operations
+    # Extract bits 10 and 11 with a single bitwise AND (2^10 | 2^11 = 3072)
     # Cloud present if either bit is set
-    cloudMask = qaBand.bitwiseAnd(int(math.pow(2, 10))).neq(0) \
-        .Or(qaBand.bitwiseAnd(int(math.pow(2, 11))).neq(0)) \
+    cloudMask = qaBand.bitwiseAnd(_BIT10 | _BIT11) \
+        .neq(0) \
+        .toByte() \
         .rename('cloudFlagMask')
 
-    return ee.Image(cloudMask)
+    return cloudMask
+
+
+def _isSentinelImage(image):
+    """
+    Server-side test for Sentinel-2 images ('satellite_name' starts with 'Sentinel-2').
+    
+    Args:
+        image (ee.Image): Image with 'satellite_name' property
+    
+    Returns:
+        ee.Number: 1 for Sentinel-2, 0 otherwise
+    """
+    return ee.String(image.get('satellite_name')).index('Sentinel-2').eq(0)
 
 
-def cloudFlagMaskToa(image):
+def cloudFlagMaskToa(image, isSentinel=None):
     """
     Extract cloud mask from TOA products (Landsat or Sentinel-2).
     
@@ -461,13 +526,20 @@ def cloudFlagMaskToa(image):
     
     Args:
         image (ee.Image): TOA image with 'satellite_name' property and 'pixel_qa' band
+        isSentinel (bool, optional): Sensor already known on the client.
+            When given, the mask function is selected in Python and the
+            'satellite_name' property is not tested per image (default: None)
     
     Returns:
         ee.Image: Cloud mask (1 = cloud, 0 = clear)
     """
+    if isSentinel is not None:
+        if isSentinel:
+            return cloudFlagMaskToaS2(image)
+        return cloudFlagMaskToaLX(image)
+
     # Detect if Sentinel-2 by checking satellite name
-    isSentinel = ee.String(image.get('satellite_name')) \
-        .slice(0, 10).compareTo('Sentinel-2').Not()
+    isSentinel = _isSentinelImage(image)
 
     # Apply appropriate mask function based on satellite
     cloudMask = ee.Algorithms.If(
@@ -494,14 +566,15 @@ def cloudFlagMaskSr(image):
     QA Bit Mapping:
         Bit 3: Cloud (1 = yes, 0 = no)
     """
-    qaBand = ee.Image(image.select(['pixel_qa']))
+    qaBand = image.select(['pixel_qa'])
 
     # Extract bit 3 using bitwise AND with 2^3 = 8
-    cloudMask = qaBand.bitwiseAnd(int(math.pow(2, 3))) \
+    cloudMask = qaBand.bitwiseAnd(_BIT3) \
         .neq(0) \
+        .toByte() \
         .rename('cloudFlagMask')
 
-    return ee.Image(cloudMask)
+    return cloudMask
 
 
 def cloudFlagMask(image):
@@ -549,13 +622,14 @@ def cloudShadowFlagMaskToaLX(image):
     QA Bit Mapping:
         Bit 4: Cloud shadow (1 = yes, 0 = no)
     """
-    qaBand = ee.Image(image.select(['pixel_qa']))
+    qaBand = image.select(['pixel_qa'])
 
     # Extract bit 4 using bitwise AND with 2^4 = 16
-    cloudShadowMask = qaBand.bitwiseAnd(int(math.pow(2, 4))).neq(0)\
+    cloudShadowMask = qaBand.bitwiseAnd(_BIT4).neq(0) \
+        .toByte() \
         .rename('cloudShadowFlagMask')
 
-    return ee.Image(cloudShadowMask)
+    return cloudShadowMask
 
 
 def cloudShadowFlagMaskSrLX(image):
@@ -574,17 +648,36 @@ def cloudShadowFlagMaskSrLX(image):
     QA Bit Mapping:
         Bit 4: Cloud shadow (1 = yes, 0 = no)
     """
-    qaBand = ee.Image(image.select(['pixel_qa']))
+    qaBand = image.select(['pixel_qa'])
 
     # Extract bit 4 using bitwise AND with 2^4 = 16
-    cloudShadowMask = qaBand.bitwiseAnd(int(math.pow(2, 4))) \
+    cloudShadowMask = qaBand.bitwiseAnd(_BIT4) \
         .neq(0) \
+        .toByte() \
         .rename('cloudShadowFlagMask')
 
-    return ee.Image(cloudShadowMask)
+    return cloudShadowMask
+
+
+def _getEmptyShadowMask(image):
+    """
+    Build the 'cloudShadowFlagMask' band of images without a QA shadow flag.
+    
+    Sentinel-2 QA has no shadow flag, so the band is 0 everywhere, masked
+    like the first band of the image so that it follows the image footprint.
+    Every Sentinel-2 path (cloudShadowFlagMask, qaMasks, the resolved mask
+    functions of getMasks) uses this same band.
+    
+    Args:
+        image (ee.Image): Input image
+    
+    Returns:
+        ee.Image: 'cloudShadowFlagMask' band, 0 within the image footprint
+    """
+    return ee.Image(0).mask(image.select(0)).rename('cloudShadowFlagMask')
 
 
-def cloudShadowFlagMask(image):
+def cloudShadowFlagMask(image, isSentinel=None):
     """
     Extract cloud shadow mask from QA band (works for TOA/SR and Landsat/Sentinel-2).
     
@@ -594,6 +687,9 @@ def cloudShadowFlagMask(image):
     
     Args:
         image (ee.Image): Image with 'satellite_name' and 'reflectance' properties
+        isSentinel (bool, optional): Sensor already known on the client.
+            When given, the Sentinel-2 test is resolved in Python instead of
+            per image (default: None)
     
     Returns:
         ee.Image: Original image with added 'cloudShadowFlagMask' band
@@ -601,18 +697,30 @@ def cloudShadowFlagMask(image):
             cloudShadowFlagMask = 0 where clear
             For Sentinel-2: returns 0 everywhere (no QA shadow info)
     """
-    # Detect if Sentinel-2
-    isSentinel = ee.String(image.get('satellite_name')) \
-        .slice(0, 10).compareTo('Sentinel-2').Not()
+    # Sentinel-2 QA doesn't have shadow flags, return dummy mask
+    if isSentinel:
+        return image.addBands(_getEmptyShadowMask(image))
 
     # Detect if TOA product
     isToa = ee.String(image.get('reflectance')).compareTo('TOA').Not()
 
+    # Landsat known on the client: only the product type is tested
+    if isSentinel is not None:
+        cloudShadowMask = ee.Algorithms.If(
+            isToa,
+            cloudShadowFlagMaskToaLX(image),
+            cloudShadowFlagMaskSrLX(image))
+
+        return image.addBands(ee.Image(cloudShadowMask))
+
+    # Detect if Sentinel-2
+    isSentinel = _isSentinelImage(image)
+
     # Apply appropriate mask based on satellite and product type
     cloudShadowMask = ee.Algorithms.If(
         isSentinel,
         # Sentinel-2 QA doesn't have shadow flags, return dummy mask
-        ee.Image(0).mask(image.select(0)).rename('cloudShadowFlagMask'),
+        _getEmptyShadowMask(image),
         ee.Algorithms.If(
             isToa,
             cloudShadowFlagMaskToaLX(image),
@@ -621,6 +729,128 @@ def cloudShadowFlagMask(image):
     return image.addBands(ee.Image(cloudShadowMask))
 
 
+def qaMasks(image, isToa, isSentinel):
+    """
+    Extract both QA cloud and cloud shadow masks in a single pass.
+    
+    Equivalent to applying cloudFlagMask() and cloudShadowFlagMask(), but the
+    pixel_qa band is selected once and the product/sensor are given as
+    Python booleans instead of being tested per image on the server.
+    
+    Args:
+        image (ee.Image): Image with 'pixel_qa' band
+        isToa (bool): True for TOA products, False for SR
+        isSentinel (bool): True for Sentinel-2, False for Landsat
+    
+    Returns:
+        ee.Image: Original image with added bands:
+            cloudFlagMask (1 = cloud, 0 = clear)
+            cloudShadowFlagMask (1 = shadow, 0 = clear; 0 everywhere for Sentinel-2)
+    
+    QA Bit Mapping:
+        Landsat / SR: Bit 3 cloud, Bit 4 cloud shadow
+        Sentinel-2 TOA: Bits 10 and 11 cloud, no shadow flag
+    """
+    qaBand = image.select(['pixel_qa'])
+
+    if isToa and isSentinel:
+        cloudBits = _BIT10 | _BIT11
+    else:
+        cloudBits = _BIT3
+
+    cloudMask = qaBand.bitwiseAnd(cloudBits) \
+        .neq(0) \
+        .toByte() \
+        .rename('cloudFlagMask')
+
+    if isSentinel:
+        # Sentinel-2 QA has no shadow flag
+        cloudShadowMask = _getEmptyShadowMask(image)
+    else:
+        cloudShadowMask = qaBand.bitwiseAnd(_BIT4) \
+            .neq(0) \
+            .toByte() \
+            .rename('cloudShadowFlagMask')
+
+    return image.addBands(cloudMask).addBands(cloudShadowMask)
+
+
+def _resolveSensor(collection):
+    """
+    Read the product type and sensor of a collection on the client side.
+    
+    cloudFlagMask() and cloudShadowFlagMask() branch per image with
+    ee.Algorithms.If on 'reflectance' and 'satellite_name', although these
+    properties are the same for every image of a MapBiomas collection. This
+    helper reads the distinct values once with a single getInfo().
+    
+    Args:
+        collection (ee.ImageCollection): Collection with 'reflectance' and
+            'satellite_name' properties (as set by Collection.getCollection)
+    
+    Returns:
+        tuple: (isToa, isSentinel) Python booleans, or None when the
+            collection is empty or mixes products or sensors
+    """
+    info = ee.Dictionary({
+        'reflectance': collection.aggregate_array('reflectance').distinct(),
+        'satellite_name': collection.aggregate_array('satellite_name').distinct(),
+    }).getInfo()
+
+    reflectances = info['reflectance']
+    isSentinel = set(
+        str(name).startswith('Sentinel-2') for name in info['satellite_name'])
+
+    if len(reflectances) != 1 or len(isSentinel) != 1:
+        return None
+
+    return reflectances[0] == 'TOA', isSentinel.pop()
+
+
+def _resolveMaskFns(sensor):
+    """
+    Select the concrete QA mask functions for a resolved sensor.
+    
+    Args:
+        sensor (tuple): (isToa, isSentinel) as returned by _resolveSensor,
+            or None
+    
+    Returns:
+        tuple: (cloudFn, shadowFn), both mapping an image to the image with the
+            'cloudFlagMask' or 'cloudShadowFlagMask' band added.
+            Falls back to cloudFlagMask/cloudShadowFlagMask when the sensor
+            could not be resolved (mixed collection).
+    """
+    # Mixed collection (or empty): keep the per-image server-side dispatch
+    if sensor is None:
+        return cloudFlagMask, cloudShadowFlagMask
+
+    isToa, isSentinel = sensor
+
+    if not isToa:
+        cloudLeaf = cloudFlagMaskSr
+    elif isSentinel:
+        cloudLeaf = cloudFlagMaskToaS2
+    else:
+        cloudLeaf = cloudFlagMaskToaLX
+
+    if isSentinel:
+        # Sentinel-2 QA has no shadow flag
+        shadowLeaf = _getEmptyShadowMask
+    elif isToa:
+        shadowLeaf = cloudShadowFlagMaskToaLX
+    else:
+        shadowLeaf = cloudShadowFlagMaskSrLX
+
+    def cloudFn(image):
+        return image.addBands(cloudLeaf(image))
+
+    def shadowFn(image):
+        return image.addBands(shadowLeaf(image))
+
+    return cloudFn, shadowFn
+
+
 def getMasks(collection,
              cloudThresh=10,
              zScoreThresh=-1,
@@ -631,7 +861,9 @@ def getMasks(collection,
              cloudShadowFlag=True,
              cloudShadowTdom=True,
              cloudHeights=[],
-             cloudBand=None):
+             cloudBand=None,
+             isToa=None,
+             isSentinel=None):
     """
     Generate comprehensive cloud and shadow masks for image collection.
     
@@ -688,6 +920,15 @@ def getMasks(collection,
         cloudBand (str, optional): Name of cloud mask band for projection (default: None)
             Typically 'cloudFlagMask' or 'cloudScoreMask'
             Only used if cloudShadowTdom=True
+        
+        isToa (bool, optional): True for TOA products, False for SR (default: None)
+            Known by the caller, which chose the collection
+        
+        isSentinel (bool, optional): True for Sentinel-2, False for Landsat
+            (default: None)
+            When isToa and isSentinel are both given, the QA mask functions
+            are picked from them; otherwise they are read from the collection
+            properties with a blocking getInfo() request
     
     Returns:
         ee.ImageCollection: Collection with added mask bands to each image:
@@ -695,7 +936,8 @@ def getMasks(collection,
             - cloudScoreMask: Spectral cloud mask (if cloudScore=True)
             - cloudShadowFlagMask: QA-based shadow mask (if cloudShadowFlag=True)
             - tdomMask: Temporal dark outlier mask (if cloudShadowTdom=True)
-            - cloudShadowTdomMask: Geometric shadow projection (if cloudShadowTdom=True)
+            - cloudShadowTdomMask: Geometric shadow projection (if cloudShadowTdom=True
+              and cloudHeights is not empty)
     
     Usage Examples:
         Example 1 - All masks enabled (default):
@@ -734,6 +976,9 @@ def getMasks(collection,
         - Geometric projection requires accurate solar geometry metadata
         - All mask bands are added to images (not applied yet)
         - Use .mask() or .updateMask() to actually apply masks
+        - Pass isToa and isSentinel: without them the product and sensor are
+          read with one getInfo() round trip per call to pick the QA mask
+          functions; mixed collections keep the per-image dispatch
     
     Best Practices:
         - Use cloudFlag + cloudScore for robust cloud detection
@@ -746,37 +991,43 @@ def getMasks(collection,
         Based on MapBiomas cloud masking methodology combining multiple algorithms
     """
 
+    # Resolve the product and sensor, and the QA mask functions, once for
+    # the whole collection
+    # Nothing to resolve when no QA flag mask is requested
+    sensor = None
+    if isToa is not None and isSentinel is not None:
+        sensor = (isToa, isSentinel)
+    elif cloudFlag or cloudShadowFlag:
+        sensor = _resolveSensor(collection)
+
+    cloudFn, shadowFn = _resolveMaskFns(sensor)
+
+    # Both QA masks can be read from pixel_qa in a single pass
+    fusedQa = cloudFlag and cloudShadowFlag and sensor is not None
+
     # Apply cloud detection algorithms based on flags
-    collection = ee.Algorithms.If(
-        cloudFlag,
-        ee.Algorithms.If(
-            cloudScore,
-            collection.map(cloudFlagMask).map(
-                lambda collection: cloudScoreMask(collection, cloudThresh)
-            ),
-            collection.map(cloudFlagMask)),
-        collection.map(
-            lambda collection: cloudScoreMask(collection, cloudThresh)
+    # The flags are Python booleans, so only the selected branch is built
+    if fusedQa:
+        collection = collection.map(
+            lambda image: qaMasks(image, sensor[0], sensor[1])
         )
-    )
+    elif cloudFlag:
+        collection = collection.map(cloudFn)
 
-    collection = ee.ImageCollection(collection)
+    if cloudScore or not cloudFlag:
+        collection = collection.map(
+            lambda image: cloudScoreMask(image, cloudThresh)
+        )
 
-    collection = ee.Algorithms.If(
-        cloudShadowFlag,
-        ee.Algorithms.If(
-            cloudShadowTdom,
-            tdom(collection.map(cloudShadowFlagMask),
-                 zScoreThresh=zScoreThresh,
-                 shadowSumThresh=shadowSumThresh,
-                 dilatePixels=dilatePixels),
-            collection.map(cloudShadowFlagMask)),
-        tdom(collection,
-             zScoreThresh=zScoreThresh,
-             shadowSumThresh=shadowSumThresh,
-             dilatePixels=dilatePixels))
-
-    collection = ee.ImageCollection(collection)
+    # Apply shadow detection algorithms based on flags
+    if cloudShadowFlag and not fusedQa:
+        collection = collection.map(shadowFn)
+
+    if cloudShadowTdom or not cloudShadowFlag:
+        collection = tdom(collection,
+                          zScoreThresh=zScoreThresh,
+                          shadowSumThresh=shadowSumThresh,
+                          dilatePixels=dilatePixels)
 
     def _getShadowMask(image):
 
@@ -788,7 +1039,42 @@ def getMasks(collection,
 
         return image
 
-    if cloudShadowTdom:
+    # Without cloud heights there is no shadow to project
+    if cloudShadowTdom and cloudHeights:
         collection = collection.map(_getShadowMask)
 
     return collection
+
+
+def getMasksBatch(collections, maxWorkers=8, **kwargs):
+    """
+    Apply getMasks() to several collections concurrently.
+    
+    getMasks() only builds the Earth Engine graph, but without isToa and
+    isSentinel it makes a blocking getInfo() request to resolve the product
+    and sensor of each collection. When many such collections are prepared
+    (e.g., one per grid or year), running the calls in a thread pool overlaps
+    those round trips. With isToa and isSentinel given there is no round
+    trip to overlap, and getMasks() can be called directly.
+    
+    Args:
+        collections (list): List of ee.ImageCollection
+        maxWorkers (int, optional): Maximum number of concurrent calls (default: 8)
+        **kwargs: Parameters forwarded to getMasks()
+    
+    Returns:
+        list: Collections with mask bands, in the same order as the input
+    
+    Example:
+        >>> masked = getMasksBatch([collection2019, collection2020],
+        ...                        cloudThresh=10,
+        ...                        cloudHeights=[200, 700, 1200],
+        ...                        cloudBand='cloudScoreMask')
+    """
+    if len(collections) == 0:
+        return []
+
+    with ThreadPoolExecutor(max_workers=maxWorkers) as executor:
+        return list(executor.map(
+            lambda collection: getMasks(collection, **kwargs),
+            collections))
@@ -19,11 +19,65 @@ Dependencies: earthengine-api
 
 # Import earthengine API
 import ee
+import functools
 from datetime import date
 
 # Initialize Earth Engine (uncomment if running standalone)
 # ee.Initialize()
 
+# Original metadata properties read by setProperties, for all supported satellites
+METADATA_PROPERTIES = [
+    'CLOUD_COVER',
+    'CLOUDY_PIXEL_PERCENTAGE',
+    'DATE_ACQUIRED',
+    'SENSING_TIME',
+    'GENERATION_TIME',
+    'SPACECRAFT_ID',
+    'SATELLITE',
+    'SPACECRAFT_NAME',
+    'SUN_AZIMUTH',
+    'SOLAR_AZIMUTH_ANGLE',
+    'MEAN_SOLAR_AZIMUTH_ANGLE',
+    'SUN_ELEVATION',
+    'SOLAR_ZENITH_ANGLE',
+    'MEAN_SOLAR_ZENITH_ANGLE',
+]
+
+# Properties copied as-is to their standardized names, per product
+# Each entry is (original name, standardized name)
+LANDSAT_C2_RENAMES = [
+    ('CLOUD_COVER', 'cloud_cover'),
+    ('SPACECRAFT_ID', 'satellite_name'),
+    ('SUN_AZIMUTH', 'sun_azimuth_angle'),
+    ('SUN_ELEVATION', 'sun_elevation_angle'),
+]
+
+S2_RENAMES = [
+    ('CLOUDY_PIXEL_PERCENTAGE', 'cloud_cover'),
+    ('SPACECRAFT_NAME', 'satellite_name'),
+    ('MEAN_SOLAR_AZIMUTH_ANGLE', 'sun_azimuth_angle'),
+]
+
+# Explicit band names of the Landsat Collection 2 products, per sensor
+# Selecting the exact names avoids matching band name patterns on every image
+# Each entry is (collection ID prefix, optical bands, thermal bands)
+SR_BANDS = [
+    ('LANDSAT/LT04', ['SR_B1', 'SR_B2', 'SR_B3', 'SR_B4', 'SR_B5', 'SR_B7'], ['ST_B6']),
+    ('LANDSAT/LT05', ['SR_B1', 'SR_B2', 'SR_B3', 'SR_B4', 'SR_B5', 'SR_B7'], ['ST_B6']),
+    ('LANDSAT/LE07', ['SR_B1', 'SR_B2', 'SR_B3', 'SR_B4', 'SR_B5', 'SR_B7'], ['ST_B6']),
+    ('LANDSAT/LC08', ['SR_B1', 'SR_B2', 'SR_B3', 'SR_B4', 'SR_B5', 'SR_B6', 'SR_B7'], ['ST_B10']),
+    ('LANDSAT/LC09', ['SR_B1', 'SR_B2', 'SR_B3', 'SR_B4', 'SR_B5', 'SR_B6', 'SR_B7'], ['ST_B10']),
+]
+
+# Each entry is (collection ID prefix, TOA reflectance and brightness temperature bands)
+TOA_BANDS = [
+    ('LANDSAT/LT04', ['B1', 'B2', 'B3', 'B4', 'B5', 'B6', 'B7']),
+    ('LANDSAT/LT05', ['B1', 'B2', 'B3', 'B4', 'B5', 'B6', 'B7']),
+    ('LANDSAT/LE07', ['B1', 'B2', 'B3', 'B4', 'B5', 'B6_VCID_1', 'B6_VCID_2', 'B7', 'B8']),
+    ('LANDSAT/LC08', ['B1', 'B2', 'B3', 'B4', 'B5', 'B6', 'B7', 'B8', 'B9', 'B10', 'B11']),
+    ('LANDSAT/LC09', ['B1', 'B2', 'B3', 'B4', 'B5', 'B6', 'B7', 'B8', 'B9', 'B10', 'B11']),
+]
+
 
 def setProperties(image):
     """
@@ -34,8 +88,9 @@ def setProperties(image):
     conventions for cloud cover, acquisition date, satellite identifier, and solar
     geometry parameters.
     
-    The function uses conditional logic (ee.Algorithms.If) to check for the existence
-    of properties and select the appropriate one based on the satellite type.
+    The candidate properties are read once with image.toDictionary() and each
+    standardized property takes the first candidate that exists, through the
+    default value of ee.Dictionary.get (no ee.Algorithms.If branches).
     
     Args:
         image (ee.Image): Input satellite image with original metadata properties
@@ -72,6 +127,8 @@ def setProperties(image):
     Note:
         - Solar elevation is calculated from zenith angle for Sentinel-2: elevation = 90° - zenith
         - The function prioritizes Landsat property names first, then falls back to Sentinel-2
+        - When no candidate exists: cloud_cover = 100, date from system:time_start,
+          satellite_name = '', azimuth and elevation = 0
         - Original properties are preserved; new standardized properties are added
     
     Example:
@@ -79,40 +136,49 @@ def setProperties(image):
         >>> normalized = setProperties(landsat_image)
         >>> cloud_pct = normalized.get('cloud_cover')  # Works for both Landsat and Sentinel-2
     """
+    # Read every candidate property once into a dictionary
+    # Properties that don't exist in the image are left out
+    props = image.toDictionary(METADATA_PROPERTIES)
+
+    # Each standardized property takes the first candidate present, using
+    # the default value of Dictionary.get instead of ee.Algorithms.If ladders.
+    # The innermost default is always a valid value, so missing candidates
+    # never raise an error on the server
+
     # Determine cloud cover property (Sentinel-2 uses different property name)
-    cloudCover = ee.Algorithms.If(image.get('SPACECRAFT_NAME'),  # If Sentinel-2
-                                  image.get('CLOUDY_PIXEL_PERCENTAGE'),
-                                  image.get('CLOUD_COVER'))  # Else Landsat
+    # Unknown cloud cover is treated as fully cloudy
+    cloudCover = props.get('CLOUD_COVER',                          # Landsat
+                           props.get('CLOUDY_PIXEL_PERCENTAGE',    # Sentinel-2
+                                     100))
 
     # Determine acquisition date property (varies by satellite and product)
-    date = ee.Algorithms.If(image.get('DATE_ACQUIRED'),  # Landsat format
-                            image.get('DATE_ACQUIRED'),
-                            ee.Algorithms.If(image.get('SENSING_TIME'),  # Sentinel-2 format
-                                             image.get('SENSING_TIME'),
-                                             image.get('GENERATION_TIME')))  # Alternative format
+    date = props.get('DATE_ACQUIRED',                              # Landsat format
+                     props.get('SENSING_TIME',                     # Sentinel-2 format
+                               props.get('GENERATION_TIME',        # Alternative format
+                                         image.get('system:time_start'))))
 
     # Determine satellite identifier property
-    satellite = ee.Algorithms.If(image.get('SPACECRAFT_ID'),  # Landsat (e.g., 'LANDSAT_8')
-                                 image.get('SPACECRAFT_ID'),
-                                 ee.Algorithms.If(image.get('SATELLITE'),  # Alternative Landsat
-                                                  image.get('SATELLITE'),
-                                                  image.get('SPACECRAFT_NAME')))  # Sentinel-2
+    satellite = props.get('SPACECRAFT_ID',                         # Landsat (e.g., 'LANDSAT_8')
+                          props.get('SATELLITE',                   # Alternative Landsat
+                                    props.get('SPACECRAFT_NAME',   # Sentinel-2
+                                              '')))
 
     # Determine solar azimuth angle property (sun position in horizontal plane)
-    azimuth = ee.Algorithms.If(image.get('SUN_AZIMUTH'),  # Landsat
-                               image.get('SUN_AZIMUTH'),
-                               ee.Algorithms.If(image.get('SOLAR_AZIMUTH_ANGLE'),  # Sentinel-2
-                                                image.get('SOLAR_AZIMUTH_ANGLE'),
-                                                image.get('MEAN_SOLAR_AZIMUTH_ANGLE')))  # Alternative
+    azimuth = props.get('SUN_AZIMUTH',                             # Landsat
+                        props.get('SOLAR_AZIMUTH_ANGLE',           # Sentinel-2
+                                  props.get('MEAN_SOLAR_AZIMUTH_ANGLE',  # Alternative
+                                            0)))
 
     # Determine solar elevation angle property (sun height above horizon)
     # Sentinel-2 provides zenith angle (angle from vertical), so convert: elevation = 90° - zenith
-    elevation = ee.Algorithms.If(image.get('SUN_ELEVATION'),  # Landsat (direct)
-                                 image.get('SUN_ELEVATION'),
-                                 ee.Algorithms.If(image.get('SOLAR_ZENITH_ANGLE'),  # Sentinel-2
-                                                  ee.Number(90).subtract(
-                                                      image.get('SOLAR_ZENITH_ANGLE')),
-                                                  ee.Number(90).subtract(image.get('MEAN_SOLAR_ZENITH_ANGLE'))))
+    # The conversion is a single server-side subtraction used as the default of
+    # the SUN_ELEVATION lookup; the 90 is a constant in the request, not a node
+    zenith = props.get('SOLAR_ZENITH_ANGLE',                       # Sentinel-2
+                       props.get('MEAN_SOLAR_ZENITH_ANGLE',        # Alternative
+                                 90))
+
+    elevation = props.get('SUN_ELEVATION',                         # Landsat (direct)
+                          ee.Number(90).subtract(zenith))
 
     # Add standardized properties to the image
     return image \
@@ -123,7 +189,81 @@ def setProperties(image):
         .set('date', ee.Date(date).format('Y-MM-dd'))
 
 
-def applyScaleFactors(image):
+def _renameProperties(image, renames):
+    """
+    Copy image properties to new names in one dictionary operation.
+    
+    Args:
+        image (ee.Image): Input image
+        renames (list): List of (original name, standardized name) pairs
+    
+    Returns:
+        ee.Image: Image with the standardized properties added
+    """
+    originalNames = [original for original, standardized in renames]
+    standardizedNames = [standardized for original, standardized in renames]
+
+    return image.set(
+        image.toDictionary(originalNames).rename(originalNames, standardizedNames)
+    )
+
+
+def _setPropertiesLandsatC2(image):
+    """
+    setProperties() specialized for Landsat Collection 2 (Level-2 and TOA).
+    
+    Collection 2 images always carry the Landsat property names, so the
+    standardized properties are copied directly without candidate lookups.
+    
+    Args:
+        image (ee.Image): Landsat Collection 2 image
+    
+    Returns:
+        ee.Image: Image with the same standardized properties as setProperties()
+    """
+    return _renameProperties(image, LANDSAT_C2_RENAMES) \
+        .set('date', ee.Date(image.get('DATE_ACQUIRED')).format('Y-MM-dd'))
+
+
+def _setPropertiesS2(image):
+    """
+    setProperties() specialized for Sentinel-2 (COPERNICUS/S2*) collections.
+    
+    Args:
+        image (ee.Image): Sentinel-2 image
+    
+    Returns:
+        ee.Image: Image with the same standardized properties as setProperties()
+            (elevation = 90° - mean solar zenith angle)
+    """
+    return _renameProperties(image, S2_RENAMES) \
+        .set('sun_elevation_angle',
+             ee.Number(90).subtract(image.get('MEAN_SOLAR_ZENITH_ANGLE'))) \
+        .set('date', ee.Date(image.get('GENERATION_TIME')).format('Y-MM-dd'))
+
+
+def _getPropertiesFunction(collectionId):
+    """
+    Select the metadata normalization function for a collection ID.
+    
+    Args:
+        collectionId (str): Earth Engine collection ID
+    
+    Returns:
+        function: _setPropertiesS2 for Sentinel-2, _setPropertiesLandsatC2 for
+            Landsat Collection 2, and the generic setProperties otherwise
+            (legacy collections, whose property names vary by product)
+    """
+    if 'COPERNICUS/S2' in collectionId:
+        return _setPropertiesS2
+
+    if '/C02/' in collectionId:
+        return _setPropertiesLandsatC2
+
+    return setProperties
+
+
+def applyScaleFactors(image, opticalBands='SR_B[0-9]+', thermalBands='ST_B[0-9]+'):
     """
     Apply Landsat Collection 2 Surface Reflectance scale factors.
     
@@ -146,9 +286,14 @@ def applyScaleFactors(image):
     
     Args:
         image (ee.Image): Landsat Collection 2 Level-2 image with scaled bands
+        opticalBands (str or list, optional): Optical band names or pattern
+            (default: 'SR_B[0-9]+'). See SR_BANDS for the explicit names per sensor
+        thermalBands (str or list, optional): Thermal band names or pattern
+            (default: 'ST_B[0-9]+')
     
     Returns:
         ee.Image: Image with scale factors applied, reflectance in 0-10000 range
+            Optical bands are int16 and thermal bands uint16
     
     Bands Affected:
         - Optical: All SR_B.* bands (Blue, Green, Red, NIR, SWIR1, SWIR2)
@@ -158,7 +303,7 @@ def applyScaleFactors(image):
         - The final multiplication by 10000 converts reflectance (0-1) to integers (0-10000)
         - This 10000 scaling is standard in MapBiomas workflows for efficient storage
         - Original bands are replaced (overwrite=True)
-        - All image properties are preserved
+        - All image properties are preserved, and '_scaled' is set to 1
     
     Reference:
         - Landsat Collection 2 Level-2 Science Product Guide
@@ -170,35 +315,189 @@ def applyScaleFactors(image):
         >>> # Blue band now has reflectance × 10000 (e.g., 500 = 0.05 reflectance)
     """
     # Apply scale factors to optical/multispectral bands
-    # SR_B.* matches all surface reflectance bands (SR_B1, SR_B2, etc.)
-    opticalBands = image.select('SR_B.')\
-        .multiply(0.0000275)\
-        .add(-0.2)\
-        .multiply(10000)
+    # SR_B[0-9]+ matches all surface reflectance bands (SR_B1, SR_B2, etc.)
+    # Band patterns are matched against the whole band name
+    # (DN × 0.0000275 - 0.2) × 10000 folded into DN × 0.275 - 2000
+    # Values range from -2000 to ~16000, stored as int16
+    opticalBands = image.select(opticalBands)\
+        .multiply(0.275)\
+        .add(-2000)\
+        .toInt16()
     
     # Apply scale factors to thermal bands
-    # ST_B.* matches all surface temperature bands
-    thermalBands = image.select('ST_B.*')\
-        .multiply(0.00341802)\
-        .add(149.0)\
-        .multiply(10)
+    # ST_B[0-9]+ matches all surface temperature bands (ST_B6, ST_B10)
+    # (DN × 0.00341802 + 149.0) × 10 folded into DN × 0.0341802 + 1490
+    # Kelvin × 10 (~1490-3730), stored as uint16
+    thermalBands = image.select(thermalBands)\
+        .multiply(0.0341802)\
+        .add(1490.0)\
+        .toUint16()
+
+    # Replace original bands with scaled versions
+    # Properties are preserved by addBands; '_scaled' is used by applyScaleFactorsOnce
+    return image \
+        .addBands(opticalBands, overwrite=True) \
+        .addBands(thermalBands, overwrite=True) \
+        .set('_scaled', 1)
+
+
+def applyScaleFactorsOptical(image, opticalBands='SR_B[0-9]+'):
+    """
+    Apply Landsat Collection 2 Surface Reflectance scale factors to the optical bands only.
+    
+    Same optical scaling as applyScaleFactors, for collections where the thermal
+    bands are not selected. Avoids attaching the thermal scaling graph to every image.
+    
+    Args:
+        image (ee.Image): Landsat Collection 2 Level-2 image with scaled bands
+        opticalBands (str or list, optional): Optical band names or pattern
+            (default: 'SR_B[0-9]+')
+    
+    Returns:
+        ee.Image: Image with the SR_B.* bands scaled to the 0-10000 range (int16)
+    
+    Example:
+        >>> image = ee.Image('LANDSAT/LC08/C02/T1_L2/LC08_226080_20200101')
+        >>> scaled = applyScaleFactorsOptical(image.select('SR_B[0-9]+'))
+    """
+    # (DN × 0.0000275 - 0.2) × 10000 folded into DN × 0.275 - 2000
+    opticalBands = image.select(opticalBands)\
+        .multiply(0.275)\
+        .add(-2000)\
+        .toInt16()
 
     # Replace original bands with scaled versions
-    image = image.addBands(opticalBands, None, True)  # overwrite=True
-    image = image.addBands(thermalBands, None, True)
-    image = ee.Image(image)
+    return image.addBands(opticalBands, overwrite=True).set('_scaled', 1)
+
+
+def applyScaleFactorsThermal(image, thermalBands='ST_B[0-9]+'):
+    """
+    Apply Landsat Collection 2 Surface Temperature scale factors to the thermal bands only.
+    
+    Same thermal scaling as applyScaleFactors, for collections where the optical
+    bands are not selected.
+    
+    Args:
+        image (ee.Image): Landsat Collection 2 Level-2 image with scaled bands
+        thermalBands (str or list, optional): Thermal band names or pattern
+            (default: 'ST_B[0-9]+')
+    
+    Returns:
+        ee.Image: Image with the ST_B.* bands in Kelvin × 10 (uint16)
+    
+    Example:
+        >>> image = ee.Image('LANDSAT/LC08/C02/T1_L2/LC08_226080_20200101')
+        >>> scaled = applyScaleFactorsThermal(image.select('ST_B[0-9]+'))
+    """
+    # (DN × 0.00341802 + 149.0) × 10 folded into DN × 0.0341802 + 1490
+    thermalBands = image.select(thermalBands)\
+        .multiply(0.0341802)\
+        .add(1490.0)\
+        .toUint16()
+
+    # Replace original bands with scaled versions
+    return image.addBands(thermalBands, overwrite=True).set('_scaled', 1)
+
+
+def _getSensorBands(collectionId, table):
+    """
+    Look up the explicit band names of a collection in SR_BANDS or TOA_BANDS.
+    
+    Args:
+        collectionId (str): Earth Engine collection ID, or None
+        table (list): SR_BANDS or TOA_BANDS
+    
+    Returns:
+        tuple: Band name lists of the matching entry, or None if unknown
+    """
+    if collectionId is None:
+        return None
+
+    for entry in table:
+        if collectionId.startswith(entry[0]):
+            return entry[1:]
+
+    return None
+
 
-    # Note: Commented code below was for explicit property copying
-    # Properties are automatically preserved by addBands
-    # image = ee.Image(image.copyProperties(image))
-    # image = ee.Image(image.copyProperties(image, ['system:time_start']))
-    # image = ee.Image(image.copyProperties(image, ['system:index']))
-    # image = ee.Image(image.copyProperties(image, ['system:footprint']))
+def _getScaleFactorsFunction(collectionType, bands=None, collectionId=None):
+    """
+    Select the scale factor function for a collection type and band selection.
+    
+    For Surface Reflectance, when the selected bands contain no thermal (ST_B*)
+    or no optical (SR_B*) band, only the needed half of the scaling is applied.
+    
+    The bands to scale are given by name when they are known: the selected
+    bands, or the explicit names of the sensor (SR_BANDS, TOA_BANDS). The
+    band name patterns are only used for unknown collections.
+    
+    A selection without any band to scale (e.g. bands=['QA_PIXEL']) gets a
+    function that only sets '_scaled': the default patterns would match none
+    of the selected bands and fail on the server.
+    
+    Args:
+        collectionType (str): 'SR' or 'TOA'
+        bands (list, optional): Selected band names (default: None, all bands)
+        collectionId (str, optional): Earth Engine collection ID (default: None)
+    
+    Returns:
+        function: Function mapping an ee.Image to its scaled version
+    """
+    if collectionType == 'TOA':
+        sensorBands = _getSensorBands(collectionId, TOA_BANDS)
+
+        if bands is not None:
+            toaBands = [band for band in bands if band.startswith('B')]
+
+            if not toaBands:
+                return _skipScaleFactors
+        elif sensorBands is not None:
+            toaBands = sensorBands[0]
+        else:
+            return applyScaleFactorsTOA
+
+        return lambda image: applyScaleFactorsTOA(image, toaBands)
+
+    # Surface Reflectance (SR)
+    sensorBands = _getSensorBands(collectionId, SR_BANDS)
+
+    if bands is None:
+        if sensorBands is None:
+            return applyScaleFactors
+
+        opticalBands, thermalBands = sensorBands
 
-    return image
+        return lambda image: applyScaleFactors(image, opticalBands, thermalBands)
 
+    opticalBands = [band for band in bands if band.startswith('SR_B')]
+    thermalBands = [band for band in bands if band.startswith('ST_B')]
 
-def applyScaleFactorsTOA(image):
+    if opticalBands and not thermalBands:
+        return lambda image: applyScaleFactorsOptical(image, opticalBands)
+
+    if thermalBands and not opticalBands:
+        return lambda image: applyScaleFactorsThermal(image, thermalBands)
+
+    if not opticalBands and not thermalBands:
+        return _skipScaleFactors
+
+    return lambda image: applyScaleFactors(image, opticalBands, thermalBands)
+
+
+def _skipScaleFactors(image):
+    """
+    Scale factor function of a band selection with nothing to scale.
+    
+    Args:
+        image (ee.Image): Image without SR_B*, ST_B* or TOA B* bands
+    
+    Returns:
+        ee.Image: The same image, marked as scaled (see applyScaleFactorsOnce)
+    """
+    return image.set('_scaled', 1)
+
+
+def applyScaleFactorsTOA(image, opticalBands='B[0-9].*'):
     """
     Apply Landsat Collection 2 Top-of-Atmosphere (TOA) scale factors.
     
@@ -214,9 +513,11 @@ def applyScaleFactorsTOA(image):
     
     Args:
         image (ee.Image): Landsat Collection 2 Level-1 TOA image
+        opticalBands (str or list, optional): TOA band names or pattern
+            (default: 'B[0-9].*'). See TOA_BANDS for the explicit names per sensor
     
     Returns:
-        ee.Image: Image with TOA reflectance scaled to 0-10000 range
+        ee.Image: Image with TOA reflectance scaled to 0-10000 range (uint16)
     
     Bands Affected:
         - All B.* bands (B1, B2, B3, etc.) representing TOA reflectance
@@ -226,6 +527,7 @@ def applyScaleFactorsTOA(image):
         - The 10000 scaling matches the Surface Reflectance product format
         - This allows TOA and SR products to be processed with the same pipeline
         - Original bands are replaced (overwrite=True)
+        - Sets the '_scaled' property to 1 (see applyScaleFactorsOnce)
     
     Difference from Surface Reflectance:
         - TOA: At-satellite reflectance (includes atmospheric effects)
@@ -238,22 +540,140 @@ def applyScaleFactorsTOA(image):
         >>> # Reflectance now in 0-10000 range
     """
     # Apply scale factor to all optical bands
-    # B.* matches all TOA reflectance bands (B1, B2, B3, etc.)
-    opticalBands = image.select('B.*')\
-        .multiply(10000)  # Convert 0-1 range to 0-10000 integer range
+    # B[0-9].* matches all TOA reflectance bands (B1, B2, B3, etc.)
+    opticalBands = image.select(opticalBands)\
+        .multiply(10000)\
+        .toUint16()  # Convert 0-1 range to 0-10000 integer range
 
     # Replace original bands with scaled versions
-    image = image.addBands(opticalBands, None, True)  # overwrite=True
-    image = ee.Image(image)
+    # Properties are preserved by addBands; '_scaled' is used by applyScaleFactorsOnce
+    return image \
+        .addBands(opticalBands, overwrite=True) \
+        .set('_scaled', 1)
 
-    # Note: Commented code below was for explicit property copying
-    # Properties are automatically preserved by addBands
-    # image = ee.Image(image.copyProperties(image))
-    # image = ee.Image(image.copyProperties(image, ['system:time_start']))
-    # image = ee.Image(image.copyProperties(image, ['system:index']))
-    # image = ee.Image(image.copyProperties(image, ['system:footprint']))
 
-    return image
+def applyScaleFactorsOnce(image, collectionType='SR'):
+    """
+    Apply scale factors unless the image was already scaled.
+    
+    Every scale factor function sets the '_scaled' property on its output.
+    This guard lets cached or reused collections go through the scaling
+    step again without being scaled twice.
+    
+    Args:
+        image (ee.Image): Landsat Collection 2 image, scaled or not
+        collectionType (str, optional): 'SR' or 'TOA' (default: 'SR')
+    
+    Returns:
+        ee.Image: Image with scale factors applied exactly once
+    
+    Example:
+        >>> collection = collection.map(applyScaleFactorsOnce)
+    
+    Note:
+        - getCollection() always starts from the raw collection, so it maps
+          the scale factor functions directly and skips this guard
+    """
+    scaledImage = _getScaleFactorsFunction(collectionType)(image)
+
+    return ee.Image(
+        ee.Algorithms.If(image.get('_scaled'), image, scaledImage)
+    )
+
+
+def _pruneTrashList(trashList, dateStart, dateEnd):
+    """
+    Drop the trash list IDs acquired outside the collection date range.
+    
+    Landsat scene IDs end with the acquisition date (e.g. 'LC08_226080_20200101'),
+    so IDs outside [dateStart, dateEnd] can never match an image that passed
+    the date filter. IDs without a trailing date are always kept.
+    
+    Args:
+        trashList (list): Image IDs to exclude
+        dateStart (str): Start date, format 'YYYY-MM-DD'
+        dateEnd (str): End date, format 'YYYY-MM-DD'
+    
+    Returns:
+        list: Sorted, deduplicated IDs that may still match
+    """
+    # Only plain date strings can be compared client-side
+    if not isinstance(dateStart, str) or not isinstance(dateEnd, str):
+        return sorted(set(trashList))
+
+    start = dateStart[:10].replace('-', '')
+    end = dateEnd[:10].replace('-', '')
+
+    kept = set()
+
+    for imageId in trashList:
+        acquired = imageId.split('_')[-1]
+
+        if len(acquired) != 8 or not acquired.isdigit() or start <= acquired <= end:
+            kept.add(imageId)
+
+    return sorted(kept)
+
+
+@functools.lru_cache(maxsize=128)
+def _getDateFilter(dateStart, dateEnd):
+    """
+    Build (and cache) the date filter of getCollection().
+    
+    Repeated calls with the same dates (e.g. one collection per tile in the
+    same year) reuse the same ee.Filter object.
+    
+    Args:
+        dateStart (str): Start date, format 'YYYY-MM-DD'
+        dateEnd (str): End date, format 'YYYY-MM-DD'
+    
+    Returns:
+        ee.Filter: Date range filter
+    """
+    return ee.Filter.date(dateStart, dateEnd)
+
+
+@functools.lru_cache(maxsize=128)
+def _getTrashFilter(trashIds):
+    """
+    Build (and cache) the trash list exclusion filter of getCollection().
+    
+    Args:
+        trashIds (tuple): Sorted image IDs to exclude
+    
+    Returns:
+        ee.Filter: Filter keeping the images NOT in trashIds
+    """
+    return ee.Filter.inList('system:index', ee.List(list(trashIds))).Not()
+
+
+def _validateCollectionArgs(collectionType, dateStart, dateEnd, cloudCover, trashList):
+    """
+    Check the getCollection() arguments and fail fast on invalid values.
+    
+    Dates and cloud covers given as ee objects are left to the server.
+    
+    Raises:
+        ValueError: If an argument is invalid
+    """
+    if collectionType not in ('SR', 'TOA'):
+        raise ValueError(
+            "collectionType must be 'SR' or 'TOA', got {}".format(repr(collectionType)))
+
+    if isinstance(cloudCover, (int, float)) and not 0 <= cloudCover <= 100:
+        raise ValueError(
+            "cloudCover must be between 0 and 100, got {}".format(cloudCover))
+
+    for name, value in (('dateStart', dateStart), ('dateEnd', dateEnd)):
+        if isinstance(value, str):
+            try:
+                date.fromisoformat(value[:10])
+            except ValueError:
+                raise ValueError(
+                    "{} must be formatted as 'YYYY-MM-DD', got {}".format(name, repr(value)))
+
+    if trashList is not None and not all(isinstance(imageId, str) for imageId in trashList):
+        raise ValueError("trashList must only contain image ID strings")
 
 
 def getCollection(collectionId,
@@ -263,7 +683,8 @@ def getCollection(collectionId,
                   cloudCover=100,
                   trashList=None,
                   geometry=None,
-                  scaleFactor=True):
+                  scaleFactor=True,
+                  bands=None):
     """
     Create a filtered and preprocessed satellite image collection.
     
@@ -307,6 +728,16 @@ def getCollection(collectionId,
         scaleFactor (bool, optional): Whether to apply scale factors (default: True)
             If True, applies appropriate scale factors based on collectionType
             Set to False if working with already-scaled data
+        
+        bands (list, optional): Original band names to keep (default: None)
+            Format: ['SR_B2', 'SR_B3', 'SR_B4', 'QA_PIXEL', ...]
+            If provided, bands are selected before scale factors are applied,
+            and the thermal (or optical) scaling is skipped when none of the
+            selected bands need it. Keep the QA bands if cloud masks are used
+    
+    Raises:
+        ValueError: If collectionType, cloudCover, the dates or trashList are
+            invalid (checked client-side, before any server request)
     
     Returns:
         ee.ImageCollection: Filtered and preprocessed image collection with:
@@ -318,12 +749,15 @@ def getCollection(collectionId,
     Processing Steps:
         1. Load collection by ID
         2. Filter by date range
-        3. Normalize metadata properties (setProperties)
-        4. Set reflectance type property
-        5. Apply scale factors (if enabled)
-        6. Filter by geometry (if provided)
-        7. Exclude blacklisted images (if provided)
-        8. Filter by cloud cover threshold
+        3. Filter by geometry (if provided)
+        4. Filter by cloud cover threshold (original CLOUD_COVER or
+           CLOUDY_PIXEL_PERCENTAGE property)
+        5. Exclude blacklisted images (if provided)
+        6. In a single map: select bands (if provided), normalize metadata
+           properties (setProperties, or its Landsat Collection 2 / Sentinel-2
+           specialization selected from collectionId), set the reflectance
+           type property and apply scale factors (if enabled), only to the
+           selected band groups
     
     Example - Basic Usage:
         >>> # Get Landsat 8 images for 2020 with <30% clouds
@@ -367,8 +801,10 @@ def getCollection(collectionId,
         ... )
     
     Note:
-        - Cloud cover filtering happens last to work with normalized 'cloud_cover' property
-        - Geometry filtering is applied before blacklist filtering for efficiency
+        - All filters are applied before any map, so per-image processing only
+          runs on the images that are kept
+        - Cloud cover is filtered on the original property names, before
+          metadata normalization
         - Scale factors are applied after metadata normalization
         - The 'reflectance' property can be used to track SR vs TOA in mixed workflows
     
@@ -378,39 +814,157 @@ def getCollection(collectionId,
         - applyScaleFactorsTOA(): For TOA scale factor details
     """
     # Set end date to today if not specified
-    if dateEnd == None:
-        dateEnd = str(date.today())
-
-    # Initialize collection with date filter and metadata normalization
-    collection = ee.ImageCollection(collectionId)\
-        .filter(ee.Filter.date(dateStart, dateEnd))\
-        .map(setProperties) \
-        .map(
-            lambda image: image.set('reflectance', collectionType)
-        )
-    
-    # Apply appropriate scale factors based on collection type
-    if scaleFactor:
-        if collectionType == 'TOA':
-            collection = collection.map(applyScaleFactorsTOA)
-        else:  # Surface Reflectance (SR)
-            collection = collection.map(applyScaleFactors)
-    
+    if dateEnd is None:
+        dateEnd = date.today().isoformat()
+
+    # Validate the arguments client-side, before any request is built
+    _validateCollectionArgs(collectionType, dateStart, dateEnd, cloudCover, trashList)
+
+    # Initialize collection with the date filter
+    # All filters run on the raw collection, before any map, so the metadata
+    # and scale factor graphs are only attached to the images that are kept
+    # Plain date strings reuse a cached filter
+    if isinstance(dateStart, str) and isinstance(dateEnd, str):
+        dateFilter = _getDateFilter(dateStart, dateEnd)
+    else:
+        dateFilter = ee.Filter.date(dateStart, dateEnd)
+
+    collection = ee.ImageCollection(collectionId).filter(dateFilter)
+
     # Filter by geometry (spatial extent) if provided
     # This reduces the collection to only images intersecting the ROI
-    if geometry != None:
+    if geometry is not None:
         collection = collection.filterBounds(geometry)
-    
+
+    # Filter by maximum cloud cover threshold
+    # Uses the original property names (Landsat or Sentinel-2), so it doesn't
+    # depend on the normalized 'cloud_cover' property
+    collection = collection.filter(
+        ee.Filter.Or(
+            ee.Filter.lt('CLOUD_COVER', cloudCover),
+            ee.Filter.lt('CLOUDY_PIXEL_PERCENTAGE', cloudCover)
+        )
+    )
+
     # Exclude blacklisted images if provided
     # Uses inverted filter: keep images NOT in the trash list
-    if trashList != None:
-        collection = collection.filter(
-            ee.Filter.inList('system:index', trashList).Not()
-        )
+    # The list is deduplicated and pruned to the IDs acquired in the date range,
+    # then sent once as a constant ee.List; an empty list adds no filter at all
+    if trashList:
+        trashList = _pruneTrashList(trashList, dateStart, dateEnd)
 
-    # Filter by maximum cloud cover threshold
-    # Uses normalized 'cloud_cover' property from setProperties()
-    collection = collection.filterMetadata(
-        'cloud_cover', 'less_than', cloudCover)
+    if trashList:
+        collection = collection.filter(_getTrashFilter(tuple(trashList)))
+
+    # Band selection, metadata normalization, reflectance type and scale
+    # factors are all done in a single map, so the graph has one map node
+    propertiesFunction = _getPropertiesFunction(collectionId)
+
+    # Apply appropriate scale factors based on collection type
+    # and on the selected bands
+    if scaleFactor:
+        scaleFunction = _getScaleFactorsFunction(collectionType, bands, collectionId)
+    else:
+        scaleFunction = lambda image: image
+
+    def prepareImage(image):
+        # Bands are selected before any scaling, so the discarded bands
+        # are never scaled
+        if bands is not None:
+            image = image.select(bands)
+
+        image = propertiesFunction(image).set('reflectance', collectionType)
+
+        return scaleFunction(image)
+
+    collection = collection.map(prepareImage)
     
     return collection
+
+
+def getCollections(configs):
+    """
+    Build several collections with getCollection().
+    
+    Typical use is one collection per sensor (L5, L7, L8, L9, S2), merged by
+    the caller. getCollection() only builds a lazy graph on the client, with
+    no server round trip, so the collections are built one after the other.
+    
+    Args:
+        configs (list): List of dictionaries with getCollection() keyword arguments
+    
+    Returns:
+        list: ee.ImageCollection objects, in the same order as configs
+    
+    Example:
+        >>> l8, l9 = getCollections([
+        ...     {'collectionId': 'LANDSAT/LC08/C02/T1_L2', 'dateStart': '2020-01-01'},
+        ...     {'collectionId': 'LANDSAT/LC09/C02/T1_L2', 'dateStart': '2020-01-01'},
+        ... ])
+        >>> collection = l8.merge(l9)
+    
+    Note:
+        - A missing dateEnd is resolved once for all configs, so all
+          collections share the same end date
+    """
+    today = date.today().isoformat()
+
+    configs = [dict(config) for config in configs]
+
+    for config in configs:
+        if config.get('dateEnd') is None:
+            config['dateEnd'] = today
+
+    return [getCollection(**config) for config in configs]
+
+
+def getCollectionAsDataset(*args, chunks=None, crs='EPSG:4326', scale=0.00025, **kwargs):
+    """
+    Open a getCollection() result as a lazy xarray Dataset (Xee engine).
+    
+    Useful for consumers that reduce the collection to tabular or per-pixel
+    outputs on the client: pixels are streamed by chunk (optionally with Dask)
+    instead of being exported as full images.
+    
+    Args:
+        *args: Positional arguments of getCollection()
+        chunks (dict, optional): Chunk sizes per dimension
+            (default: None, uses {'time': 1, 'lon': 512, 'lat': 512})
+        crs (str, optional): Output projection (default: 'EPSG:4326')
+        scale (float, optional): Pixel size in crs units (default: 0.00025, ~30 m)
+        **kwargs: Keyword arguments of getCollection()
+    
+    Returns:
+        xarray.Dataset: Lazy dataset with one variable per band
+    
+    Example:
+        >>> roi = ee.Geometry.Rectangle([-60, -30, -59, -29])
+        >>> dataset = getCollectionAsDataset(
+        ...     collectionId='LANDSAT/LC08/C02/T1_L2',
+        ...     dateStart='2020-01-01',
+        ...     dateEnd='2020-12-31',
+        ...     geometry=roi
+        ... )
+        >>> medianRed = dataset['SR_B4'].median('time').compute()
+    
+    Note:
+        - Requires the optional xarray and xee packages, imported on first use
+        - Set geometry, otherwise the whole globe is opened
+    """
+    # Optional dependencies, only needed by this function
+    import xarray
+    import xee  # noqa: F401 registers the 'ee' xarray engine
+
+    if chunks is None:
+        chunks = {'time': 1, 'lon': 512, 'lat': 512}
+
+    collection = getCollection(*args, **kwargs)
+
+    return xarray.open_dataset(
+        collection,
+        engine='ee',
+        chunks=chunks,
+        crs=crs,
+        scale=scale,
+        geometry=kwargs.get('geometry')
+    )
@@ -491,28 +491,29 @@ BANDS_SPECIFICATIONS = {
 }
 
 
-def setBandTypes(image, mtype="biomes"):
+# Cast functions available to setBandTypes, built once at import time
+DATA_TYPE_CONVERTERS = {
 
-    def convertDataType(bandSpecification):
+    "uint8": lambda image: image.toUint8(),
+
+    "int16": lambda image: image.toInt16(),
 
-        fun = {
+    "uint16": lambda image: image.toUint16(),
 
-            "uint8": lambda image: image.toUint8(),
+    "int32": lambda image: image.toInt32(),
 
-            "int16": lambda image: image.toInt16(),
+    "uint32": lambda image: image.toUint32(),
 
-            "uint16": lambda image: image.toUint16(),
+    "float": lambda image: image.toFloat(),
 
-            "int32": lambda image: image.toInt32(),
+}
 
-            "uint32": lambda image: image.toUint32(),
-            
-            "float": lambda image: image.toFloat(),
 
+def setBandTypes(image, mtype="biomes"):
 
-        }
+    def convertDataType(bandSpecification):
 
-        return fun[bandSpecification[1]](image.select([bandSpecification[0]]))
+        return DATA_TYPE_CONVERTERS[bandSpecification[1]](image.select([bandSpecification[0]]))
 
     bandList = map(convertDataType, BANDS_SPECIFICATIONS[mtype])
     bandList = ee.List(list(bandList))
@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+
+"""
+Export Dispatch Log Module
+==========================
+
+This module keeps a local SQLite log of the export tasks started by a country
+script, so that an interrupted run can be restarted without starting the same
+exports again.
+
+Functions:
+- openDispatchLog(): Open (or create) the log
+- getDispatchedNames(): Names still queued, running or completed
+- recordDispatch(): Record a started task
+
+Tasks that failed or were cancelled on the server are dropped from the log
+when it is read, so the next run queues them again.
+
+Dependencies: earthengine-api
+"""
+
+import ee
+import sqlite3
+import logging
+from datetime import datetime
+
+logger = logging.getLogger('mosaics')
+
+
+def openDispatchLog(path):
+    """
+    Open (or create) the local log of started export tasks
+
+    Args:
+        path: SQLite database file
+
+    Returns:
+        sqlite3.Connection
+    """
+
+    connection = sqlite3.connect(path)
+    connection.execute('PRAGMA journal_mode=WAL')
+    connection.execute(
+        """
+        CREATE TABLE IF NOT EXISTS dispatched (
+            outputName TEXT PRIMARY KEY,
+            started_at TEXT,
+            grid TEXT,
+            biome TEXT,
+            satellite TEXT,
+            year INTEGER,
+            version TEXT,
+            task_id TEXT
+        )
+        """
+    )
+
+    # Logs written before the task id was recorded lack the column
+    columns = [row[1] for row in connection.execute(
+        'PRAGMA table_info(dispatched)')]
+
+    if 'task_id' not in columns:
+        connection.execute('ALTER TABLE dispatched ADD COLUMN task_id TEXT')
+
+    return connection
+
+
+def getDispatchedNames(connection):
+    """
+    Get the names of the export tasks recorded in the dispatch log that are
+    still queued, running or completed
+    Tasks that failed or were cancelled on the server are removed from the
+    log, so this run queues them again. Their state comes from a single
+    ee.data.getTaskList() call, matched by task id, or by description (the
+    output name) for entries logged without an id
+
+    Args:
+        connection: sqlite3.Connection returned by openDispatchLog
+
+    Returns:
+        set of output names
+    """
+
+    rows = list(connection.execute(
+        'SELECT outputName, task_id FROM dispatched'))
+
+    if len(rows) == 0:
+        return set()
+
+    statesById = {}
+    statesByName = {}
+
+    # The task list is sorted newest first: keep the latest task of a name
+    for task in ee.data.getTaskList():
+        statesById[task.get('id')] = task.get('state')
+        statesByName.setdefault(task.get('description'), task.get('state'))
+
+    dispatched = set()
+
+    for outputName, taskId in rows:
+        state = statesById.get(taskId) if taskId else statesByName.get(outputName)
+
+        if state in ['FAILED', 'CANCELLED']:
+            logger.info('re-queueing %s (task %s)', outputName, state)
+            connection.execute(
+                'DELETE FROM dispatched WHERE outputName = ?', (outputName,))
+        else:
+            dispatched.add(outputName)
+
+    connection.commit()
+
+    return dispatched
+
+
+def recordDispatch(connection, outputName, taskId, metadata):
+    """
+    Record an export task that was started successfully
+
+    Args:
+        connection: sqlite3.Connection returned by openDispatchLog
+        outputName: name of the exported asset
+        taskId: id of the started ee.batch.Task
+        metadata: dict with grid, biome, satellite, year and version
+
+    Returns:
+        None
+    """
+
+    connection.execute(
+        'INSERT OR REPLACE INTO dispatched VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+        (
+            outputName,
+            datetime.now().isoformat(),
+            metadata['grid'],
+            metadata['biome'],
+            metadata['satellite'],
+            metadata['year'],
+            metadata['version'],
+            taskId,
+        )
+    )
+    connection.commit()
@@ -0,0 +1,175 @@
+#!/usr/bin/env python
+
+"""
+Local (CPU) Texture Module
+==========================
+
+This module computes the getEntropyG() texture on numpy arrays, for mosaics
+already downloaded to local disk (e.g. with getPixelsTiled()). It lets users
+recompute texture at several scales without new Earth Engine requests.
+
+Functions:
+- getLocalEntropy(): Windowed Shannon entropy of a 2D array (× 100)
+
+The window loop is compiled with Numba when it is installed, and runs as
+plain Python otherwise (same results, much slower).
+
+Dependencies: numpy, numba (optional)
+"""
+
+import math
+import numpy
+
+# Numba is optional: without it the functions run as plain Python
+try:
+    from numba import njit, prange
+except ImportError:
+    prange = range
+
+    def njit(*args, **kwargs):
+        def decorator(function):
+            return function
+        return decorator
+
+
+# Gray level of masked (non finite) pixels, left out of every histogram
+MASKED_LEVEL = -1
+
+
+def _quantize(array, levels, valueRange):
+    """
+    Quantize an array to gray levels, as Miscellaneous._quantize() does on the server.
+
+    Halves are rounded up, as the server round() does (numpy.rint() would
+    round them to even); negative halves are clamped to 0 either way.
+
+    Args:
+        array (numpy.ndarray): Input values
+        levels (int): Number of gray levels
+        valueRange (tuple): (low, high) range mapped to 0 and levels - 1
+
+    Returns:
+        numpy.ndarray: Gray levels (int64), MASKED_LEVEL where the value is
+            not finite (NaN for pixels masked on the server)
+    """
+    low, high = valueRange
+
+    scaled = (array.astype(numpy.float64) - low) / (high - low) * (levels - 1)
+
+    valid = numpy.isfinite(scaled)
+
+    # Casting NaN to an integer gives an arbitrary level, so invalid pixels
+    # are quantized from 0 then replaced by the sentinel
+    gray = numpy.clip(numpy.floor(numpy.where(valid, scaled, 0) + 0.5), 0, levels - 1)
+
+    return numpy.where(valid, gray, MASKED_LEVEL).astype(numpy.int64)
+
+
+@njit(parallel=True, cache=True)
+def _windowedEntropy(gray, radius, levels):
+    """
+    Shannon entropy of the square window centered on each pixel.
+
+    Each row keeps one histogram of the window, updated incrementally while
+    the window slides to the right: the incoming column is added and the
+    outgoing one removed. Windows are truncated at the array borders.
+    MASKED_LEVEL pixels are left out of the windows, as masked pixels are
+    on the server, and their own entropy is NaN.
+
+    Args:
+        gray (numpy.ndarray): 2D array of gray levels in [0, levels), or
+            MASKED_LEVEL
+        radius (int): Window radius in pixels
+        levels (int): Number of gray levels
+
+    Returns:
+        numpy.ndarray: 2D array of entropies in bits (float64)
+    """
+    rows, cols = gray.shape
+
+    entropy = numpy.zeros((rows, cols), dtype=numpy.float64)
+
+    for row in prange(rows):
+        top = max(0, row - radius)
+        bottom = min(rows, row + radius + 1)
+
+        histogram = numpy.zeros(levels, dtype=numpy.int64)
+        count = 0
+
+        # Window of the first column
+        for r in range(top, bottom):
+            for c in range(0, min(cols, radius + 1)):
+                if gray[r, c] != MASKED_LEVEL:
+                    histogram[gray[r, c]] += 1
+                    count += 1
+
+        for col in range(cols):
+            # Slide the window one column to the right
+            if col > 0:
+                incoming = col + radius
+                outgoing = col - radius - 1
+
+                if incoming < cols:
+                    for r in range(top, bottom):
+                        if gray[r, incoming] != MASKED_LEVEL:
+                            histogram[gray[r, incoming]] += 1
+                            count += 1
+
+                if outgoing >= 0:
+                    for r in range(top, bottom):
+                        if gray[r, outgoing] != MASKED_LEVEL:
+                            histogram[gray[r, outgoing]] -= 1
+                            count -= 1
+
+            if gray[row, col] == MASKED_LEVEL:
+                entropy[row, col] = numpy.nan
+                continue
+
+            # H = -Σ p(i) × log2(p(i))
+            value = 0.0
+
+            for level in range(levels):
+                if histogram[level] > 0:
+                    p = histogram[level] / count
+                    value -= p * math.log2(p)
+
+            entropy[row, col] = value
+
+    return entropy
+
+
+def getLocalEntropy(array, radius=5, levels=64, valueRange=(0, 5000)):
+    """
+    Compute the windowed entropy texture of a 2D array, like getEntropyG().
+
+    The array is quantized once to a small number of gray levels, then the
+    entropy of the square window of each pixel is computed with a sliding
+    histogram (O(window height) updates per pixel instead of O(window area)).
+
+    Args:
+        array (numpy.ndarray): 2D array, e.g. the 'green_median' field of a
+            getPixelsTiled() result
+        radius (int, optional): Square window radius in pixels (default: 5, 11×11)
+        levels (int, optional): Number of gray levels (default: 64)
+        valueRange (tuple, optional): (low, high) range mapped to the gray levels
+            (default: (0, 5000), Landsat SR × 10000)
+
+    Returns:
+        numpy.ndarray: Entropy × 100 (float64), same shape as array; NaN
+            where the input is not finite
+
+    Example:
+        >>> pixels = getPixelsTiled(mosaic, bounds, 0.00025)
+        >>> fine = getLocalEntropy(pixels['green_median'], radius=2)
+        >>> coarse = getLocalEntropy(pixels['green_median'], radius=10)
+
+    Note:
+        - The values match getEntropyG(image, levels=levels, valueRange=valueRange)
+          up to border handling: windows are truncated at the array borders,
+          so download with a halo of at least radius pixels
+        - NaN pixels (masked on the server) are left out of the windows of
+          their neighbours, as getEntropyG() leaves out masked pixels
+    """
+    gray = _quantize(numpy.asarray(array), levels, valueRange)
+
+    return _windowedEntropy(gray, radius, levels) * 100
@@ -7,8 +7,16 @@ information to satellite imagery. These supplementary bands enhance classificati
 and analysis by providing topographic context and spatial texture measures.
 
 Functions:
-- getSlope(): Adds terrain slope from ALOS DEM
+- getSlope(): Adds terrain slope from ALOS DEM (or from a precomputed asset)
+- precomputeSlopeAsset(): Exports the slope band to an asset once per region
+- getTerrain(): Adds elevation, slope and/or aspect from one DEM load
 - getEntropyG(): Adds texture measure from green band
+- getEntropyGAndSlope(): Adds both in a single addBands
+- addAuxBands(): Adds the bands of any list of producer functions at once
+- addAuxBandsToCollection(): Adds texture and slope to every image, server-side
+- getPixelsTiled(): Downloads an image as a numpy array, in parallel tiles
+- getGLCMFeatures(): Adds several GLCM texture metrics from a single GLCM
+- assertBands(): Checks once, before submission, that the input bands exist
 
 These functions are typically applied to mosaics before classification to
 incorporate additional information beyond spectral reflectance.
@@ -17,9 +25,183 @@ Dependencies: earthengine-api, JAXA ALOS DEM
 """
 
 import ee
+import math
+import functools
+from concurrent.futures import ThreadPoolExecutor
 
+# Initialize Earth Engine (uncomment if running standalone)
+# Use the high-volume endpoint when many tiles are requested in parallel
+# (e.g. getPixels/computePixels of mosaics carrying the slope and texture bands)
+# ee.Initialize(opt_url='https://earthengine-highvolume.googleapis.com')
 
-def getSlope(image):
+
+@functools.lru_cache(maxsize=1)
+def _getDem():
+    """
+    Load (once) the ALOS World 3D 30m DEM shared by the terrain functions.
+    
+    Returns:
+        ee.Image: 'AVE' band, average elevation in meters above sea level
+    """
+    return ee.Image("JAXA/ALOS/AW3D30_V1_1").select("AVE")
+
+
+@functools.lru_cache(maxsize=None)
+def _getSlopeImage(compact=False, scale=None):
+    """
+    Build (once) the ALOS World 3D slope band used by getSlope().
+    
+    The slope doesn't depend on the input image, so the same ee.Image is
+    reused by every call. Built lazily, after ee.Initialize().
+    
+    Args:
+        compact (bool, optional): Store degrees × 2 as uint8 (default: False)
+        scale (float, optional): Compute the slope at this scale in meters
+            (default: None, native 30 m)
+    
+    Returns:
+        ee.Image: 'slope' band, degrees × 100 (int16), or degrees × 2 (uint8)
+            when compact
+    """
+    # ALOS World 3D 30m Digital Elevation Model (cached)
+    terrain = _getDem()
+
+    # For coarse products, average the DEM to the target scale first, so the
+    # slope is only computed on the pixels that are actually needed
+    if scale is not None:
+        projection = terrain.projection()
+
+        terrain = terrain\
+            .reduceResolution(
+                reducer=ee.Reducer.mean(),
+                maxPixels=min(65535, int(math.ceil(scale / 30.0 + 1) ** 2))
+            )\
+            .reproject(crs=projection.atScale(scale))
+
+    # Calculate slope in degrees using GEE terrain algorithm
+    # Multiply by 100 to scale degrees to integers (e.g., 15.5° → 1550)
+    # Convert to 16-bit integer for efficient storage
+    slope = ee.Terrain.slope(terrain)
+
+    # Compact version: 0.5° resolution (0-180) fits in 8 bits
+    if compact:
+        return slope\
+            .multiply(2)\
+            .round()\
+            .uint8()\
+            .rename('slope')
+
+    return slope\
+        .multiply(100)\
+        .int16()\
+        .rename('slope')
+
+
+def getTerrain(image, want=('slope', 'elevation', 'aspect')):
+    """
+    Add several terrain bands derived from the ALOS World 3D DEM at once.
+    
+    The DEM is loaded once and all the requested bands are added with a
+    single ee.Image.cat, instead of one helper (and one addBands) per band.
+    
+    Args:
+        image (ee.Image): Input satellite image or mosaic
+        want (tuple, optional): Bands to add, in this order
+            (default: ('slope', 'elevation', 'aspect'))
+            - 'slope': degrees × 100 (int16), same band as getSlope()
+            - 'elevation': meters above sea level (int16)
+            - 'aspect': degrees × 10 from north, clockwise (int16, 0-3600)
+    
+    Returns:
+        ee.Image: Original image with the requested terrain bands added
+    
+    Raises:
+        ValueError: If a requested band is not supported
+    
+    Example:
+        >>> mosaic = getTerrain(mosaic, want=('slope', 'elevation'))
+    """
+    terrain = _getDem()
+
+    producers = {
+        'slope': lambda: _getSlopeImage(),
+        'elevation': lambda: terrain.int16().rename('elevation'),
+        'aspect': lambda: ee.Terrain.aspect(terrain)
+            .multiply(10)
+            .int16()
+            .rename('aspect'),
+    }
+
+    for band in want:
+        if band not in producers:
+            raise ValueError(
+                "Unsupported terrain band {}, expected one of {}".format(
+                    repr(band), sorted(producers)))
+
+    if not want:
+        return image
+
+    return image.addBands(ee.Image.cat([producers[band]() for band in want]))
+
+
+def precomputeSlopeAsset(region, assetId, compact=False, scale=None):
+    """
+    Create the export task of the slope band to an asset, for getSlope(assetId=...).
+    
+    The slope is the same in every run, so it can be materialized once per
+    region (country, biome) and then read instead of recomputed.
+    
+    Args:
+        region (ee.Geometry): Region to export
+        assetId (str): Output asset ID
+        compact (bool, optional): Slope encoding, see getSlope() (default: False)
+        scale (float, optional): Slope scale in meters, see getSlope()
+            (default: None, 30 m)
+    
+    Returns:
+        ee.batch.Task: Export task, not started
+    
+    Example:
+        >>> task = precomputeSlopeAsset(country.geometry(),
+        ...     'projects/mapbiomas-paraguay/assets/slope')
+        >>> task.start()
+        >>> # Once the task is completed:
+        >>> mosaic = getSlope(mosaic, assetId='projects/mapbiomas-paraguay/assets/slope')
+    """
+    return ee.batch.Export.image.toAsset(
+        image=_getSlopeImage(compact, scale).clip(region),
+        description=assetId.split('/')[-1],
+        assetId=assetId,
+        region=region,
+        scale=30 if scale is None else scale,
+        maxPixels=int(1e13)
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def _getKernel(radius, shape='square'):
+    """
+    Build (once per radius and shape) the kernel used by the texture functions.
+    
+    Args:
+        radius (int): Kernel radius in pixels
+        shape (str, optional): 'square' or 'circle' (default: 'square')
+    
+    Returns:
+        ee.Kernel: Square kernel of (2 × radius + 1)² pixels, or circular
+            kernel of about π × radius² pixels
+    """
+    if shape == 'circle':
+        return ee.Kernel.circle(radius=radius)
+
+    if shape != 'square':
+        raise ValueError(
+            "Unsupported kernel shape {}, expected 'square' or 'circle'".format(repr(shape)))
+
+    return ee.Kernel.square(radius=radius)
+
+
+def getSlope(image, compact=False, scale=None, assetId=None):
     """
     Add terrain slope band derived from ALOS World 3D DEM.
     
@@ -35,6 +217,19 @@ def getSlope(image):
     Args:
         image (ee.Image): Input satellite image or mosaic
             No specific bands required (slope is independent of spectral data)
+        compact (bool, optional): Store the slope as degrees × 2 in uint8,
+            0.5° resolution, half the bytes (default: False, degrees × 100 int16)
+            The MapBiomas band specifications (DataType) expect degrees × 100,
+            so keep the default for the collection exports
+        scale (float, optional): Scale in meters of the output product
+            (default: None, slope at the native 30 m DEM resolution)
+            For products coarser than 30 m, the DEM is averaged to this scale
+            before the slope, which computes (scale / 30)² times fewer pixels.
+            Slopes of an averaged DEM are smoother than averaged 30 m slopes
+        assetId (str, optional): Slope asset exported by precomputeSlopeAsset()
+            (default: None, slope computed from the DEM)
+            If provided, the slope is read from the asset and compact/scale are
+            ignored (they were fixed at export time)
     
     Returns:
         ee.Image: Original image with added 'slope' band
@@ -112,6 +307,9 @@ def getSlope(image):
         - Scaled slope range: 0 to ~9,000 (0° to 90°)
         - Fits comfortably in int16 with headroom
         - Smaller storage than float32
+        - int16 (truncated, not rounded) matches the 'slope' type of the band
+          specifications in DataType, so the exported values don't change;
+          uint16 would use the same 16 bits
     
     Applications:
         - Land cover classification enhancement
@@ -124,6 +322,9 @@ def getSlope(image):
     
     Notes:
         - Slope is calculated once from DEM (not per-image)
+        - To skip the slope computation in every run, export it once per
+          region with precomputeSlopeAsset() and pass assetId
+        - The slope ee.Image is built on the first call and reused afterwards
         - Independent of image acquisition date
         - Same slope values used for all images in region
         - 30m DEM resolution matches Landsat spatial resolution
@@ -145,23 +346,16 @@ def getSlope(image):
         Tadono, T., et al. (2014). "Precise Global DEM Generation by ALOS PRISM."
         ISPRS Annals of Photogrammetry, Remote Sensing and Spatial Information Sciences.
     """
-    # Load ALOS World 3D 30m Digital Elevation Model
-    # AVE band contains average elevation in meters above sea level
-    terrain = ee.Image("JAXA/ALOS/AW3D30_V1_1").select("AVE")
-
-    # Calculate slope in degrees using GEE terrain algorithm
-    # Multiply by 100 to scale degrees to integers (e.g., 15.5° → 1550)
-    # Convert to 16-bit integer for efficient storage
-    slope = ee.Terrain.slope(terrain)\
-        .multiply(100)\
-        .int16()\
-        .rename('slope')
+    # Add the cached slope band to input image
+    # Read a precomputed slope asset, if provided
+    if assetId is not None:
+        return image.addBands(ee.Image(assetId).select(['slope']))
 
-    # Add slope band to input image
-    return image.addBands(slope)
+    return image.addBands(_getSlopeImage(compact, scale))
 
 
-def getEntropyG(image):
+def getEntropyG(image, radius=5, band='green_median', levels=None, valueRange=(0, 5000),
+                kernelShape='square', mask=None):
     """
     Calculate texture entropy from green band using Gray Level Co-occurrence Matrix (GLCM).
     
@@ -177,7 +371,29 @@ def getEntropyG(image):
     Args:
         image (ee.Image): Input image containing 'green_median' band
             Typically a mosaic with median-composited bands
-            Band name must be exactly 'green_median'
+            Band name must be exactly 'green_median' (see band)
+            The band is not checked; use assertBands() before submission
+        radius (int, optional): Square kernel radius in pixels (default: 5)
+            Examples: 2 (5×5, fine texture), 10 (21×21, coarse texture)
+        band (str, optional): Band to compute the texture on
+            (default: 'green_median')
+        levels (int, optional): Number of gray levels to quantize to before
+            the entropy (default: None, no quantization, int16 values)
+            Example: 64 (6 bits). Fewer levels make each window histogram
+            cheaper and less sensitive to radiometric noise, but change the
+            output values, so None is kept for the MapBiomas collections
+        valueRange (tuple, optional): (low, high) reflectance range mapped to
+            the gray levels (default: (0, 5000), Landsat SR × 10000)
+            Values outside the range are clamped. Only used with levels
+        kernelShape (str, optional): 'square' or 'circle' (default: 'square')
+            A circle of radius 5 covers 81 pixels instead of 121, about a
+            third less work per pixel, with a more isotropic neighborhood.
+            The texture values differ, so 'square' is kept for the
+            MapBiomas collections
+        mask (ee.Image, optional): Pixels to compute the texture on
+            (default: None, all pixels)
+            Example: a land mask, to skip ocean and permanent water. Masked
+            pixels get no texture and are left out of their neighbors' windows
     
     Returns:
         ee.Image: Original image with added texture band:
@@ -204,7 +420,7 @@ def getEntropyG(image):
             Total area: 121 pixels (~0.1 km² at 30m resolution)
         
         Entropy Calculation:
-            1. Convert green band to 32-bit integer
+            1. Convert green band to 16-bit integer
             2. For each pixel, examine 11×11 neighborhood
             3. Calculate probability distribution of pixel values
             4. Compute Shannon entropy: H = -Σ(p(i) × log₂(p(i)))
@@ -245,10 +461,10 @@ def getEntropyG(image):
             >>> urban = ndvi.lt(0.4).And(texture.gt(550))
         
         Multi-scale analysis:
-            >>> # Can modify kernel size for different scales
-            >>> # (Note: this requires modifying the function)
-            >>> # Small kernel (3×3): fine texture
-            >>> # Large kernel (15×15): coarse texture
+            >>> # Add fine and coarse texture bands to the same mosaic
+            >>> mosaic = getEntropyG(mosaic)             # green_median_texture
+            >>> mosaic = getEntropyG(mosaic, radius=2)   # green_median_texture_r2
+            >>> mosaic = getEntropyG(mosaic, radius=10)  # green_median_texture_r10
     
     Kernel Size Considerations:
         Radius 5 (11×11 pixels):
@@ -257,7 +473,7 @@ def getEntropyG(image):
             - Captures: Medium-scale spatial patterns
             - Trade-off: Balances detail vs computational cost
         
-        Alternative sizes (require function modification):
+        Alternative sizes (radius argument):
             - Radius 2 (5×5): Fine texture, local variation
             - Radius 10 (21×21): Coarse texture, landscape patterns
     
@@ -269,7 +485,8 @@ def getEntropyG(image):
         - Used in median composite naming convention
     
     Data Type Considerations:
-        - Input converted to int32 for entropy calculation
+        - Input converted to int16 for entropy calculation (reflectance × 10000
+          fits in int16, so the values, and the entropy, are the same as in int32)
         - Output implicitly float (entropy is continuous)
         - Scaled by 100 to preserve precision as integer
         - Typical entropy range: 0-8 for 8-bit input
@@ -293,12 +510,13 @@ def getEntropyG(image):
         - Sensitive to radiometric resolution
         - May be affected by noise in original data
         - Edge effects near image boundaries
-        - Fixed kernel size may not suit all applications
-        - Requires 'green_median' band specifically named
+        - A single kernel size may not suit all applications (see radius)
+        - Requires 'green_median' band by default (see band)
     
     Notes:
-        - Texture band name hardcoded to 'green_median_texture'
-        - Assumes input has 'green_median' from mosaic process
+        - Texture band name is '<band>_texture', with an '_r<radius>' suffix
+          for radii other than 5 (default: 'green_median_texture')
+        - Assumes input has 'green_median' from mosaic process by default
         - Entropy is scale-dependent (kernel size matters)
         - Often used with other texture measures (variance, contrast)
         - Complements spectral information in classifications
@@ -319,22 +537,376 @@ def getEntropyG(image):
         Haralick, R.M., et al. (1973). "Textural Features for Image Classification."
         IEEE Transactions on Systems, Man, and Cybernetics, SMC-3(6), 610-621.
     """
-    # Define square kernel with radius 5 (creates 11×11 pixel neighborhood)
+    # Add texture band to input image
+    return image.addBands(
+        _getEntropyGImage(image, radius, band, levels, valueRange, kernelShape, mask)
+    )
+
+
+def _getTextureBandName(band, radius):
+    """
+    Name of the texture band of getEntropyG().
+    
+    The default radius keeps the historical name ('green_median_texture'),
+    other radii get a suffix, so several scales can be added to one image.
+    
+    Args:
+        band (str): Input band name
+        radius (int): Kernel radius in pixels
+    
+    Returns:
+        str: '<band>_texture' for radius 5, '<band>_texture_r<radius>' otherwise
+    """
+    if radius == 5:
+        return '{}_texture'.format(band)
+
+    return '{}_texture_r{}'.format(band, radius)
+
+
+def _quantize(image, levels, valueRange):
+    """
+    Quantize an image to a number of gray levels for the texture functions.
+    
+    Args:
+        image (ee.Image): Input image
+        levels (int): Number of gray levels (at most 256)
+        valueRange (tuple): (low, high) range mapped to 0 and levels - 1
+            Values outside the range are clamped
+    
+    Returns:
+        ee.Image: Gray levels (uint8)
+    """
+    return image\
+        .unitScale(valueRange[0], valueRange[1])\
+        .multiply(levels - 1)\
+        .round()\
+        .clamp(0, levels - 1)\
+        .uint8()
+
+
+def _getEntropyGImage(image, radius=5, band='green_median', levels=None, valueRange=(0, 5000),
+                      kernelShape='square', mask=None):
+    """
+    Compute the texture band of getEntropyG(), without adding it.
+    
+    Args:
+        image (ee.Image): Input image containing the band
+        radius (int, optional): Kernel radius, see getEntropyG() (default: 5)
+        band (str, optional): Input band, see getEntropyG() (default: 'green_median')
+        levels (int, optional): Gray levels, see getEntropyG() (default: None)
+        valueRange (tuple, optional): Quantization range, see getEntropyG()
+        kernelShape (str, optional): Kernel shape, see getEntropyG() (default: 'square')
+        mask (ee.Image, optional): Pixels to compute, see getEntropyG() (default: None)
+    
+    Returns:
+        ee.Image: Single band image named by _getTextureBandName()
+    """
+    # Define square kernel (radius 5 creates 11×11 pixel neighborhood)
     # Total area: 121 pixels at 30m resolution ≈ 0.1 km²
-    square = ee.Kernel.square(radius=5)
+    # The kernel is built once per radius and shape and reused by every call
+    kernel = _getKernel(radius, kernelShape)
 
     # Calculate entropy texture from green median band
     # Steps:
     # 1. Select green_median band (from mosaic percentile compositing)
-    # 2. Convert to 32-bit integer (required for entropy calculation)
+    # 2. Convert to 16-bit integer (entropy needs integer values; reflectance
+    #    × 10000 fits in int16, half the bytes of int32)
     # 3. Calculate Shannon entropy within 11×11 neighborhood
     # 4. Multiply by 100 to scale entropy values (e.g., 4.5 → 450)
     # 5. Rename band to indicate it's a texture measure
-    entropyG = image.select('green_median')\
-        .int32()\
-        .entropy(square)\
+    green = image.select(band)
+
+    # Restrict the texture to the region of interest, if provided
+    if mask is not None:
+        green = green.updateMask(mask)
+
+    # Optionally quantize to a small number of gray levels (uint8)
+    if levels is not None:
+        green = _quantize(green, levels, valueRange)
+    else:
+        green = green.int16()
+
+    return green\
+        .entropy(kernel)\
         .multiply(100)\
-        .rename("green_median_texture")
+        .rename(_getTextureBandName(band, radius))
 
-    # Add texture band to input image
-    return image.addBands(entropyG)
+
+def getEntropyGAndSlope(image, radius=5, band='green_median', levels=None, valueRange=(0, 5000),
+                        kernelShape='square', mask=None):
+    """
+    Add the texture and slope bands in a single addBands.
+    
+    Same result as getSlope(getEntropyG(image)), with one intermediate image
+    less in the graph.
+    
+    Args:
+        image (ee.Image): Input image containing 'green_median' band
+        radius (int, optional): Kernel radius, see getEntropyG() (default: 5)
+        band (str, optional): Input band, see getEntropyG() (default: 'green_median')
+        levels (int, optional): Gray levels, see getEntropyG() (default: None)
+        valueRange (tuple, optional): Quantization range, see getEntropyG()
+        kernelShape (str, optional): Kernel shape, see getEntropyG() (default: 'square')
+        mask (ee.Image, optional): Pixels to compute, see getEntropyG() (default: None)
+    
+    Returns:
+        ee.Image: Original image with 'green_median_texture' and 'slope' bands added
+    
+    Example:
+        >>> mosaic = getMosaic(collection, ...)
+        >>> mosaic = getEntropyGAndSlope(mosaic)
+    """
+    return image.addBands(
+        ee.Image.cat([
+            _getEntropyGImage(image, radius, band, levels, valueRange, kernelShape, mask),
+            _getSlopeImage()
+        ])
+    )
+
+
+# Names of the ee.Image.glcmTexture output bands, by metric
+GLCM_METRICS = {
+    'contrast': 'contrast',
+    'dissimilarity': 'diss',
+    'homogeneity': 'idm',
+    'energy': 'asm',
+    'correlation': 'corr',
+    'entropy': 'ent',
+    'variance': 'var',
+}
+
+
+def getGLCMFeatures(image,
+                    band='green_median',
+                    metrics=('entropy', 'contrast', 'homogeneity'),
+                    radius=5,
+                    levels=64,
+                    valueRange=(0, 5000)):
+    """
+    Add several GLCM (Haralick) texture metrics computed from a single GLCM.
+    
+    ee.Image.glcmTexture computes all the metrics of the co-occurrence matrix
+    at once, so the matrix is built once for every requested metric instead of
+    once per metric.
+    
+    Args:
+        image (ee.Image): Input image containing band
+        band (str, optional): Band to compute the texture on (default: 'green_median')
+        metrics (tuple, optional): Metrics to add (default: entropy, contrast,
+            homogeneity). Supported: see GLCM_METRICS
+        radius (int, optional): Neighborhood radius in pixels (default: 5)
+        levels (int, optional): Gray levels the band is quantized to before the
+            GLCM (default: 64). The GLCM size grows with levels²
+        valueRange (tuple, optional): (low, high) range mapped to the gray levels
+            (default: (0, 5000), Landsat SR × 10000)
+    
+    Returns:
+        ee.Image: Original image with one '<band>_glcm_<metric>' band per metric
+            Values × 100, stored as int32
+    
+    Example:
+        >>> mosaic = getGLCMFeatures(mosaic, metrics=('contrast', 'entropy'))
+        >>> contrast = mosaic.select('green_median_glcm_contrast')
+    
+    Note:
+        - Entropy here is the GLCM entropy, not the histogram entropy of
+          getEntropyG(), so the values differ from 'green_median_texture'
+    """
+    for metric in metrics:
+        if metric not in GLCM_METRICS:
+            raise ValueError(
+                "Unsupported GLCM metric {}, expected one of {}".format(
+                    repr(metric), sorted(GLCM_METRICS)))
+
+    # Build the GLCM once, on the quantized band
+    glcm = _quantize(image.select([band], ['g']), levels, valueRange)\
+        .glcmTexture(size=radius)
+
+    features = glcm\
+        .select(['g_{}'.format(GLCM_METRICS[metric]) for metric in metrics],
+                ['{}_glcm_{}'.format(band, metric) for metric in metrics])\
+        .multiply(100)\
+        .int32()
+
+    return image.addBands(features)
+
+
+def addAuxBands(image, producers):
+    """
+    Add the bands computed by several producer functions in a single addBands.
+    
+    Each producer receives the input image and returns the band(s) to add,
+    without adding them itself. The results are concatenated with one
+    ee.Image.cat and added at once, instead of one addBands per helper.
+    
+    Args:
+        image (ee.Image): Input image or mosaic
+        producers (list): Functions mapping an ee.Image to an ee.Image of new bands
+    
+    Returns:
+        ee.Image: Original image, with its properties, plus the produced bands
+            (in producers order)
+    
+    Example:
+        >>> mosaic = addAuxBands(mosaic, [
+        ...     lambda image: _getEntropyGImage(image),
+        ...     lambda image: _getEntropyGImage(image, radius=2),
+        ...     lambda image: _getSlopeImage(),
+        ... ])
+    
+    Note:
+        - addBands keeps the properties of the input image, which a plain
+          ee.Image.cat([image, ...]) would drop
+    """
+    if not producers:
+        return image
+
+    return image.addBands(
+        ee.Image.cat([producer(image) for producer in producers])
+    )
+
+
+def addAuxBandsToCollection(collection, **kwargs):
+    """
+    Add the texture and slope bands to every image of a collection.
+    
+    The bands are added with a server-side map of getEntropyGAndSlope(),
+    so there is no client-side loop or getInfo() per image.
+    
+    Args:
+        collection (ee.ImageCollection): Images (or mosaics) with a 'green_median' band
+        **kwargs: Keyword arguments of getEntropyGAndSlope() (radius, band,
+            levels, valueRange, kernelShape)
+    
+    Returns:
+        ee.ImageCollection: Collection with 'green_median_texture' and 'slope' added
+    
+    Example:
+        >>> mosaics = ee.ImageCollection([mosaic2019, mosaic2020])
+        >>> mosaics = addAuxBandsToCollection(mosaics)
+    """
+    return collection.map(lambda image: getEntropyGAndSlope(image, **kwargs))
+
+
+def getPixelsTiled(image, bounds, scale, tileSize=256, overlap=0, maxWorkers=8):
+    """
+    Download an image as a numpy array, in parallel tiles.
+    
+    A single computePixels request is limited in size, so the region is split
+    in tiles that are requested in parallel and stitched. Neighborhood bands
+    (e.g. the texture of getEntropyG) are computed on the server over the whole
+    image, so their values at the tile edges are the same as on a full
+    download and the tiles need no halo.
+    
+    Args:
+        image (ee.Image): Image to download (e.g. a mosaic with texture and slope)
+        bounds (tuple): Region as (west, south, east, north), in degrees
+        scale (float): Pixel size in degrees (EPSG:4326), e.g. 0.00025 (~30 m)
+        tileSize (int, optional): Tile width and height in pixels, without the
+            halo (default: 256)
+        overlap (int, optional): Extra pixels requested on every side of each
+            tile and trimmed before stitching (default: 0, no halo)
+        maxWorkers (int, optional): Number of parallel requests (default: 8)
+    
+    Returns:
+        numpy.ndarray: Structured array (rows, cols) with one field per band
+    
+    Example:
+        >>> ee.Initialize(opt_url='https://earthengine-highvolume.googleapis.com')
+        >>> mosaic = getEntropyGAndSlope(mosaic)
+        >>> pixels = getPixelsTiled(mosaic, (-55.1, -12.1, -55.0, -12.0), 0.00025)
+        >>> slope = pixels['slope']
+    
+    Note:
+        - Requires numpy, imported on first use
+        - Use the high-volume endpoint when calling with many workers
+    """
+    # Optional dependency, only needed by this function
+    import numpy
+
+    west, south, east, north = bounds
+
+    width = int(math.ceil((east - west) / scale))
+    height = int(math.ceil((north - south) / scale))
+
+    # Pixel offsets of the upper left corner of each tile
+    offsets = [(row, col)
+               for row in range(0, height, tileSize)
+               for col in range(0, width, tileSize)]
+
+    def getTile(offset):
+        row, col = offset
+
+        tileWidth = min(tileSize, width - col)
+        tileHeight = min(tileSize, height - row)
+
+        # The request grid includes the halo on every side
+        tile = ee.data.computePixels({
+            'expression': image,
+            'fileFormat': 'NUMPY_NDARRAY',
+            'grid': {
+                'dimensions': {
+                    'width': tileWidth + 2 * overlap,
+                    'height': tileHeight + 2 * overlap
+                },
+                'affineTransform': {
+                    'scaleX': scale,
+                    'shearX': 0,
+                    'translateX': west + (col - overlap) * scale,
+                    'shearY': 0,
+                    'scaleY': -scale,
+                    'translateY': north - (row - overlap) * scale
+                },
+                'crsCode': 'EPSG:4326'
+            }
+        })
+
+        # Trim the halo
+        return tile[overlap:overlap + tileHeight, overlap:overlap + tileWidth]
+
+    with ThreadPoolExecutor(max_workers=maxWorkers) as executor:
+        tiles = list(executor.map(getTile, offsets))
+
+    if not tiles:
+        return None
+
+    # Stitch the tiles in a single array
+    pixels = numpy.zeros((height, width), dtype=tiles[0].dtype)
+
+    for (row, col), tile in zip(offsets, tiles):
+        pixels[row:row + tile.shape[0], col:col + tile.shape[1]] = tile
+
+    return pixels
+
+
+def assertBands(image, bands):
+    """
+    Check that an image has all the given bands, before its graph is submitted.
+    
+    getEntropyG() and getGLCMFeatures() select their input band without any
+    check, so a missing band only fails when the export runs. This function
+    checks every band at once with a single getInfo() round trip. Call it
+    once per pipeline stage (e.g. on the first mosaic), not inside a map.
+    
+    Args:
+        image (ee.Image): Image to check
+        bands (list): Required band names
+    
+    Returns:
+        ee.Image: The same image, so the call can be chained
+    
+    Raises:
+        KeyError: If any band is missing
+    
+    Example:
+        >>> mosaic = assertBands(mosaic, ['green_median'])
+        >>> mosaic = getEntropyG(mosaic)
+    """
+    bandNames = set(image.bandNames().getInfo())
+
+    missing = [band for band in bands if band not in bandNames]
+
+    if missing:
+        raise KeyError("Missing bands {}".format(missing))
+
+    return image
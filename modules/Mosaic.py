@@ -20,6 +20,51 @@ from pprint import pprint
 # ee.Initialize()
 
 
+def _getPercentilePattern(percentiles):
+    """
+    Band name pattern of the percentile outputs of a combined reducer.
+    
+    Args:
+        percentiles (list): Percentile values, e.g. [20, 75]
+    
+    Returns:
+        str: Pattern matching '<band>_p20' and '<band>_p75', in band order
+    """
+    return '.*_({})'.format('|'.join('p{}'.format(p) for p in percentiles))
+
+
+def _getMaskFunction(band, threshold, operator):
+    """
+    Build the function that masks each image of a collection against a threshold.
+    
+    The returned function only closes over the band name and the threshold
+    image, so a single function (and a single threshold node) is shared by
+    every image of the mapped collection.
+    
+    Args:
+        band (str): Band compared with the threshold, e.g. 'ndvi'
+        threshold (ee.Image): Single-band threshold image
+        operator (str): ee.Image comparison method, 'lte' or 'gte'
+    
+    Returns:
+        function: ee.Image -> ee.Image, keeping the pixels where the band
+            satisfies the comparison. updateMask keeps the masks accumulated
+            upstream (clouds, shadows), while image.mask(...) would replace them
+    
+    Example:
+        >>> collectionDry = collection.map(_getMaskFunction('ndvi', dry, 'lte'))
+    """
+    if operator not in ('lte', 'gte'):
+        raise ValueError(
+            "operator must be 'lte' or 'gte', got {}".format(operator))
+
+    def maskImage(image):
+        comparison = getattr(image.select([band]), operator)
+        return image.updateMask(comparison(threshold))
+
+    return maskImage
+
+
 def getMosaic(
         collection,
         percentileDry=25,
@@ -81,27 +126,11 @@ def getMosaic(
         - Images with percentileBand values ≤ percentileDry threshold are classified as "dry"
         - Images with percentileBand values ≥ percentileWet threshold are classified as "wet"
         - Amplitude bands help identify temporal variability (useful for cropland detection)
+        - dateStart/dateEnd only restrict the overall *_median bands; all other
+          statistics use the whole input collection
     """
-    # Extract all band names from the first image in the collection
-    bands = ee.Image(collection.first()).bandNames()
-
-    # Create band name suffixes for dry season statistics
-    # Example: 'ndvi' becomes 'ndvi_median_dry'
-    bandsDry = bands.map(lambda band:
-                         ee.String(band).cat('_median_dry')
-                         )
-
-    # Create band name suffixes for wet season statistics
-    # Example: 'ndvi' becomes 'ndvi_median_wet'
-    bandsWet = bands.map(lambda band:
-                         ee.String(band).cat('_median_wet')
-                         )
-
-    # Create band name suffixes for amplitude statistics
-    # Example: 'ndvi' becomes 'ndvi_amp'
-    bandsAmp = bands.map(lambda band:
-                         ee.String(band).cat('_amp')
-                         )
+    # Output band names are derived from the reducer outputs with
+    # regexpRename, so no band name list is built from collection.first()
 
     # ========================================================================
     # DRY SEASON PROCESSING
@@ -116,9 +145,7 @@ def getMosaic(
     # Create dry season collection by masking images where the quality band
     # is less than or equal to the dry threshold
     collectionDry = collection.map(
-        lambda image:
-            image.mask(image.select([percentileBand]).lte(dry))
-    )
+        _getMaskFunction(percentileBand, dry, 'lte'))
 
     # ========================================================================
     # WET SEASON PROCESSING
@@ -132,54 +159,70 @@ def getMosaic(
     # Create wet season collection by masking images where the quality band
     # is greater than or equal to the wet threshold
     collectionWet = collection.map(
-        lambda image:
-            image.mask(image.select([percentileBand]).gte(wet))
-    )
+        _getMaskFunction(percentileBand, wet, 'gte'))
 
     # ========================================================================
     # MOSAIC STATISTICS CALCULATION
     # ========================================================================
     
-    # Overall median mosaic for the entire time period
-    mosaic = collection.filter(
-        ee.Filter.date(dateStart, dateEnd)
-    ).reduce(ee.Reducer.median())
+    # Overall median mosaic for the mosaic period [dateStart, dateEnd]
+    # Only this median is restricted to the period: the country scripts pass
+    # the whole year (plus buffer years) and a biome-specific season, and the
+    # seasonal, min/max and stdDev statistics are computed on the whole input
+    mosaic = collection\
+        .filterDate(dateStart, dateEnd)\
+        .reduce(ee.Reducer.median())
 
     # Dry season median mosaic (only pixels below dry threshold)
+    # Example: 'ndvi_median' becomes 'ndvi_median_dry'
     mosaicDry = collectionDry.reduce(ee.Reducer.median())\
-        .rename(bandsDry)
+        .regexpRename('_median$', '_median_dry')
 
     # Wet season median mosaic (only pixels above wet threshold)
+    # Example: 'ndvi_median' becomes 'ndvi_median_wet'
     mosaicWet = collectionWet.reduce(ee.Reducer.median())\
-        .rename(bandsWet)
+        .regexpRename('_median$', '_median_wet')
+
+    # Minimum, maximum and standard deviation mosaics across all images
+    # A single combined reducer computes the three statistics in one pass
+    # over the collection (bands: *_min, *_max, *_stdDev)
+    # The overall median stays separate, since it uses the date filtered collection
+    stats = collection.reduce(
+        ee.Reducer.minMax()
+            .combine(ee.Reducer.stdDev(), '', True)
+    )
 
     # Minimum value mosaic across all images
-    mosaicMin = collection.reduce(ee.Reducer.min())
+    mosaicMin = stats.select('.*_min')
 
     # Maximum value mosaic across all images
-    mosaicMax = collection.reduce(ee.Reducer.max())
+    mosaicMax = stats.select('.*_max')
 
     # Amplitude mosaic (difference between max and min)
     # High amplitude often indicates seasonal crops or deciduous vegetation
+    # Both come from the same minMax pass; the difference keeps the *_max
+    # names, renamed to *_amp (e.g. 'ndvi_max' becomes 'ndvi_amp')
     mosaicAmp = mosaicMax.subtract(mosaicMin)\
-        .rename(bandsAmp)
+        .regexpRename('_max$', '_amp')
 
     # Standard deviation mosaic (temporal variability)
-    mosaicStdDev = collection.reduce(ee.Reducer.stdDev())
+    mosaicStdDev = stats.select('.*_stdDev')
 
     # ========================================================================
     # COMBINE ALL BANDS INTO FINAL MOSAIC
     # ========================================================================
     
-    mosaic = mosaic\
-        .addBands(mosaicDry)\
-        .addBands(mosaicWet)\
-        .addBands(mosaicMin)\
-        .addBands(mosaicMax)\
-        .addBands(mosaicAmp)\
-        .addBands(mosaicStdDev)\
-        .addBands(dry)\
-        .addBands(wet)
+    mosaic = ee.Image.cat(
+        mosaic,
+        mosaicDry,
+        mosaicWet,
+        mosaicMin,
+        mosaicMax,
+        mosaicAmp,
+        mosaicStdDev,
+        dry,
+        wet
+    )
 
     return mosaic
 
@@ -232,30 +275,31 @@ def getMosaicAgriculture(
         - Percentiles help capture phenological stages (planting, peak growth, harvest)
         - EVI2 is preferred over NDVI for agriculture due to better saturation properties
     """
-    # Extract all band names from the first image
-    bands = ee.Image(collection.first()).bandNames()
-    
-    # Calculate specified percentiles for all bands
+    # Calculate median, percentiles, min, max and standard deviation with a
+    # single combined reducer: one pass over the collection for all statistics
+    stats = collection.reduce(
+        ee.Reducer.median()
+            .combine(ee.Reducer.percentile(percentiles), '', True)
+            .combine(ee.Reducer.minMax(), '', True)
+            .combine(ee.Reducer.stdDev(), '', True)
+    )
+
+    # Specified percentiles for all bands
     # Creates bands like: ndvi_p20, ndvi_p75
-    mosaicPercentil = collection\
-        .reduce(ee.Reducer.percentile(percentiles))
+    mosaicPercentil = stats.select(_getPercentilePattern(percentiles))
 
-    # Calculate median mosaic (typical/average conditions)
-    mosaicMedian = collection\
-        .reduce(ee.Reducer.median())
+    # Median mosaic (typical/average conditions)
+    mosaicMedian = stats.select('.*_median')
 
-    # Calculate minimum mosaic (lowest observed values)
-    mosaicMin = collection\
-        .reduce(ee.Reducer.min())
+    # Minimum mosaic (lowest observed values)
+    mosaicMin = stats.select('.*_min')
 
-    # Calculate maximum mosaic (highest observed values)
-    mosaicMax = collection\
-        .reduce(ee.Reducer.max())
+    # Maximum mosaic (highest observed values)
+    mosaicMax = stats.select('.*_max')
 
-    # Calculate standard deviation mosaic (temporal variability)
+    # Standard deviation mosaic (temporal variability)
     # High stdDev often indicates agricultural areas with distinct growing seasons
-    mosaicStdDev = collection\
-        .reduce(ee.Reducer.stdDev())
+    mosaicStdDev = stats.select('.*_stdDev')
 
     # Generate quality mosaic: selects pixels with highest quality band values
     # For each pixel location, chooses all bands from the image that had the
@@ -263,22 +307,19 @@ def getMosaicAgriculture(
     mosaicQmo = collection\
         .qualityMosaic(qualityBand)
     
-    # Create quality mosaic band name suffixes
-    # Example: 'ndvi' becomes 'ndvi_qmo'
-    bandsQmo = bands.map(lambda band:
-                      ee.String(band).cat('_qmo')
-                      )
-    
     # Rename quality mosaic bands with '_qmo' suffix
-    mosaicQmo = mosaicQmo.rename(bandsQmo)
+    # Example: 'ndvi' becomes 'ndvi_qmo'
+    mosaicQmo = mosaicQmo.regexpRename('^(.*)$', '$1_qmo')
 
     # Combine all mosaic statistics into a single multi-band image
-    mosaic = mosaicMedian\
-        .addBands(mosaicPercentil)\
-        .addBands(mosaicMin)\
-        .addBands(mosaicMax)\
-        .addBands(mosaicStdDev)\
-        .addBands(mosaicQmo)
+    mosaic = ee.Image.cat(
+        mosaicMedian,
+        mosaicPercentil,
+        mosaicMin,
+        mosaicMax,
+        mosaicStdDev,
+        mosaicQmo
+    )
 
     return mosaic
 
@@ -287,7 +328,8 @@ def getMosaicUrban(
         collection,
         percentiles=[1, 99],
         percentilesSlice=[25, 75],
-        sliceBand='ndvi'):
+        sliceBand='ndvi',
+        skipSmallSlices=False):
     """
     Generate an urban area-optimized mosaic with extreme value analysis.
     
@@ -307,6 +349,12 @@ def getMosaicUrban(
             Lower percentile identifies urban areas, higher identifies vegetation
         sliceBand (str, optional): Band used for slicing collection (default: 'ndvi')
             'ndvi' separates vegetation from non-vegetation effectively
+        skipSmallSlices (bool, optional): Skip the slice medians on small collections
+            (default: False). When True, the collection size is read once with
+            getInfo(), and below max(8, 100 / percentilesSlice[0]) images (always,
+            for a 0 lower slice) the *_median_p{slice} bands are replaced by
+            *_slice_p{slice} bands: the per-band slice percentiles of the
+            combined reducer instead of the medians of two masked collections
     
     Returns:
         ee.Image: Multi-band mosaic containing:
@@ -315,6 +363,8 @@ def getMosaicUrban(
             - *_p{percentiles[1]}: Upper extreme percentile (near maximum)
             - *_median_p{percentilesSlice[0]}: Median of low-vegetation pixels
             - *_median_p{percentilesSlice[1]}: Median of high-vegetation pixels
+              (*_slice_p{percentilesSlice[0]} and *_slice_p{percentilesSlice[1]}
+              instead with skipSmallSlices=True on a small collection)
             - *_min: Absolute minimum value for each band
             - *_max: Absolute maximum value for each band
     
@@ -336,34 +386,80 @@ def getMosaicUrban(
         - Slice composites are useful for separating built-up from vegetated urban areas
         - This approach works well for impervious surface mapping
         - The median of low-NDVI pixels often represents typical urban surface reflectance
+        - With skipSmallSlices=True and few images, each masked slice holds one
+          or two observations per pixel, so their medians are replaced by the
+          band-wise percentiles (an approximation: pixels are not selected by
+          sliceBand). They get their own *_slice_p names, so the band names
+          tell which data was exported, and are not typed by setBandTypes().
+          The default always computes the slice medians
     """
-    # Extract all band names from the first image
-    bands = ee.Image(collection.first()).bandNames()
-    
-    # Create band name suffixes for low-vegetation slice
-    # Example: 'red' becomes 'red_median_p25' (if percentilesSlice[0]=25)
-    bandsSlice1 = bands.map(lambda band:
-                            ee.String(band).cat(
-                                '_median_p{}'.format(percentilesSlice[0]))
-                            )
-
-    # Create band name suffixes for high-vegetation slice
-    # Example: 'nir' becomes 'nir_median_p75' (if percentilesSlice[1]=75)
-    bandsSlice2 = bands.map(lambda band:
-                            ee.String(band).cat(
-                                '_median_p{}'.format(percentilesSlice[1]))
-                         )
-
-    # Calculate extreme percentiles (near minimum and maximum)
+    # Decide on the client whether the slice medians are worth computing
+    # One getInfo() round-trip saves two full-collection median reductions
+    smallCollection = False
+
+    if skipSmallSlices:
+        if percentilesSlice[0] <= 0:
+            # The lower slice only holds the per-pixel minimum at any size
+            smallCollection = True
+        else:
+            minImages = max(8, 100 / percentilesSlice[0])
+            smallCollection = collection.size().getInfo() < minImages
+
+    # Calculate median, extreme and slice percentiles, min and max with a
+    # single combined reducer: one pass over the collection for all statistics
+    # The slice thresholds are the sliceBand outputs of the same percentile
+    # reducer (each band is reduced independently, so the values are the
+    # same as reducing collection.select([sliceBand]) on its own)
+    reducerPercentiles = sorted(set(percentiles) | set(percentilesSlice))
+
+    stats = collection.reduce(
+        ee.Reducer.median()
+            .combine(ee.Reducer.percentile(reducerPercentiles), '', True)
+            .combine(ee.Reducer.minMax(), '', True)
+    )
+
+    # Extreme percentiles (near minimum and maximum)
     # Captures the full range of urban surface types
-    mosaicPercentil = collection\
-        .reduce(ee.Reducer.percentile(percentiles))
+    mosaicPercentil = stats.select(_getPercentilePattern(percentiles))
+
+    # Overall median mosaic (all conditions)
+    mosaicMedian = stats.select('.*_median')
 
-    # Calculate slice percentile thresholds on the slice band (typically NDVI)
-    # Creates two threshold images: one for low vegetation, one for high vegetation
-    percentilSlice = collection\
-        .select([sliceBand])\
-        .reduce(ee.Reducer.percentile(percentilesSlice))
+    # Minimum value mosaic (darkest/lowest reflectance observed)
+    mosaicMin = stats.select('.*_min')
+
+    # Maximum value mosaic (brightest/highest reflectance observed)
+    mosaicMax = stats.select('.*_max')
+
+    if smallCollection:
+        # Band-wise slice percentiles, named apart from the slice medians
+        # Example: 'red_p25' becomes 'red_slice_p25'
+        mosaicPercentilSlice1 = stats\
+            .select(_getPercentilePattern(percentilesSlice[:1]))\
+            .regexpRename(
+                '_p{}$'.format(percentilesSlice[0]),
+                '_slice_p{}'.format(percentilesSlice[0]))
+
+        mosaicPercentilSlice2 = stats\
+            .select(_getPercentilePattern(percentilesSlice[1:]))\
+            .regexpRename(
+                '_p{}$'.format(percentilesSlice[1]),
+                '_slice_p{}'.format(percentilesSlice[1]))
+
+        return ee.Image.cat(
+            mosaicMedian,
+            mosaicPercentil,
+            mosaicPercentilSlice1,
+            mosaicPercentilSlice2,
+            mosaicMin,
+            mosaicMax
+        )
+
+    # Slice percentile thresholds on the slice band (typically NDVI)
+    # Two threshold images: one for low vegetation, one for high vegetation
+    # Selected once, outside the mapped functions
+    sliceLow = stats.select(['{}_p{}'.format(sliceBand, percentilesSlice[0])])
+    sliceHigh = stats.select(['{}_p{}'.format(sliceBand, percentilesSlice[1])])
 
     # ========================================================================
     # LOW-VEGETATION SLICE (Urban/Built-up areas)
@@ -373,10 +469,7 @@ def getMosaicUrban(
     # Masks images to keep only pixels where sliceBand ≤ lower percentile threshold
     # This typically captures urban/built-up areas with low NDVI
     collectionPercentilSlice1 = collection.map(
-        lambda image:
-            image.mask(image.select([sliceBand]).lte(
-                percentilSlice.select([0])))  # Select first percentile threshold
-    )
+        _getMaskFunction(sliceBand, sliceLow, 'lte'))
 
     # ========================================================================
     # HIGH-VEGETATION SLICE (Urban parks/trees)
@@ -386,48 +479,35 @@ def getMosaicUrban(
     # Masks images to keep only pixels where sliceBand ≥ upper percentile threshold
     # This typically captures vegetated urban areas (parks, street trees)
     collectionPercentilSlice2 = collection.map(
-        lambda image:
-            image.mask(image.select([sliceBand]).gte(
-                percentilSlice.select([1])))  # Select second percentile threshold
-    )
+        _getMaskFunction(sliceBand, sliceHigh, 'gte'))
 
     # Calculate median of low-vegetation pixels
     # Represents typical reflectance of urban surfaces (roads, buildings, etc.)
+    # Example: 'red_median' becomes 'red_median_p25' (if percentilesSlice[0]=25)
+    # The suffix is a Python string and a single regexpRename renames every
+    # band, so no band name list is mapped on the server
     mosaicPercentilSlice1 = collectionPercentilSlice1\
         .reduce(ee.Reducer.median())\
-        .rename(bandsSlice1)
+        .regexpRename('_median$', '_median_p{}'.format(percentilesSlice[0]))
 
     # Calculate median of high-vegetation pixels
     # Represents typical reflectance of urban vegetation
+    # Example: 'nir_median' becomes 'nir_median_p75' (if percentilesSlice[1]=75)
     mosaicPercentilSlice2 = collectionPercentilSlice2\
         .reduce(ee.Reducer.median())\
-        .rename(bandsSlice2)
-
-    # ========================================================================
-    # STANDARD STATISTICS
-    # ========================================================================
-    
-    # Overall median mosaic (all conditions)
-    mosaicMedian = collection\
-        .reduce(ee.Reducer.median())
-
-    # Minimum value mosaic (darkest/lowest reflectance observed)
-    mosaicMin = collection\
-        .reduce(ee.Reducer.min())
-
-    # Maximum value mosaic (brightest/highest reflectance observed)
-    mosaicMax = collection\
-        .reduce(ee.Reducer.max())
+        .regexpRename('_median$', '_median_p{}'.format(percentilesSlice[1]))
 
     # ========================================================================
     # COMBINE ALL BANDS INTO FINAL MOSAIC
     # ========================================================================
     
-    mosaic = mosaicMedian\
-        .addBands(mosaicPercentil)\
-        .addBands(mosaicPercentilSlice1)\
-        .addBands(mosaicPercentilSlice2)\
-        .addBands(mosaicMin)\
-        .addBands(mosaicMax)
+    mosaic = ee.Image.cat(
+        mosaicMedian,
+        mosaicPercentil,
+        mosaicPercentilSlice1,
+        mosaicPercentilSlice2,
+        mosaicMin,
+        mosaicMax
+    )
 
     return mosaic
@@ -37,84 +37,58 @@ Reference: Souza et al. (2005) NDFI methodology, adapted from Carnegie Instituti
 """
 
 import ee
+import functools
 
 # ============================================================================
 # SPECTRAL ENDMEMBER DEFINITIONS
 # ============================================================================
 
-ENDMEMBERS = {
-    # Landsat 4 TM endmembers (scaled reflectance × 10000)
-    # Each row is an endmember, columns are: blue, green, red, nir, swir1, swir2
-    'landsat-4': [
-        [119.0, 475.0, 169.0, 6250.0, 2399.0, 675.0],    # GV (Green Vegetation)
-        [1514.0, 1597.0, 1421.0, 3053.0, 7707.0, 1975.0], # NPV (Non-Photosynthetic Vegetation)
-        [1799.0, 2479.0, 3158.0, 5437.0, 7707.0, 6646.0], # Soil
-        [4031.0, 8714.0, 7900.0, 8989.0, 7002.0, 6607.0]  # Cloud
-    ],
-    
-    # Landsat 5 TM endmembers (identical to L4)
-    'landsat-5': [
-        [119.0, 475.0, 169.0, 6250.0, 2399.0, 675.0],
-        [1514.0, 1597.0, 1421.0, 3053.0, 7707.0, 1975.0],
-        [1799.0, 2479.0, 3158.0, 5437.0, 7707.0, 6646.0],
-        [4031.0, 8714.0, 7900.0, 8989.0, 7002.0, 6607.0]
-    ],
-    
-    # Landsat 7 ETM+ endmembers (identical to L4/L5)
-    'landsat-7': [
-        [119.0, 475.0, 169.0, 6250.0, 2399.0, 675.0],
-        [1514.0, 1597.0, 1421.0, 3053.0, 7707.0, 1975.0],
-        [1799.0, 2479.0, 3158.0, 5437.0, 7707.0, 6646.0],
-        [4031.0, 8714.0, 7900.0, 8989.0, 7002.0, 6607.0]
-    ],
-    
-    # Landsat 8 OLI endmembers (same values, adjusted for sensor)
-    'landsat-8': [
-        [119.0, 475.0, 169.0, 6250.0, 2399.0, 675.0],
-        [1514.0, 1597.0, 1421.0, 3053.0, 7707.0, 1975.0],
-        [1799.0, 2479.0, 3158.0, 5437.0, 7707.0, 6646.0],
-        [4031.0, 8714.0, 7900.0, 8989.0, 7002.0, 6607.0]
-    ],
-    
-    # Landsat 9 OLI-2 endmembers (identical to L8)
-    'landsat-9': [
-        [119.0, 475.0, 169.0, 6250.0, 2399.0, 675.0],
-        [1514.0, 1597.0, 1421.0, 3053.0, 7707.0, 1975.0],
-        [1799.0, 2479.0, 3158.0, 5437.0, 7707.0, 6646.0],
-        [4031.0, 8714.0, 7900.0, 8989.0, 7002.0, 6607.0]
-    ],
-    
-    # Sentinel-2 Surface Reflectance endmembers
-    'sentinel-2 (sr)': [
-        [119.0, 475.0, 169.0, 6250.0, 2399.0, 675.0],
-        [1514.0, 1597.0, 1421.0, 3053.0, 7707.0, 1975.0],
-        [1799.0, 2479.0, 3158.0, 5437.0, 7707.0, 6646.0],
-        [4031.0, 8714.0, 7900.0, 8989.0, 7002.0, 6607.0]
-    ],
-    
-    # Sentinel-2 TOA endmembers (identical to SR)
-    'sentinel-2 (toa)': [
-        [119.0, 475.0, 169.0, 6250.0, 2399.0, 675.0],
-        [1514.0, 1597.0, 1421.0, 3053.0, 7707.0, 1975.0],
-        [1799.0, 2479.0, 3158.0, 5437.0, 7707.0, 6646.0],
-        [4031.0, 8714.0, 7900.0, 8989.0, 7002.0, 6607.0]
-    ],
-    
-    # Sentinel-2 Harmonized endmembers
-    'sentinel-2 (harmonized)': [
-        [119.0, 475.0, 169.0, 6250.0, 2399.0, 675.0],
-        [1514.0, 1597.0, 1421.0, 3053.0, 7707.0, 1975.0],
-        [1799.0, 2479.0, 3158.0, 5437.0, 7707.0, 6646.0],
-        [4031.0, 8714.0, 7900.0, 8989.0, 7002.0, 6607.0]
-    ],
-    
-    # Simplified 3-endmember model
-    'small': [
-        [1780, 3370, 4580, 5590, 6830, 6450],  # Substrate (soil-like)
-        [300, 600, 310, 6690, 2400, 960],      # Vegetation
-        [190, 100, 50, 70, 30, 20]             # Dark (shadow/water)
-    ]
-}
+# Standard 4-endmember model (scaled reflectance × 10000), shared by all sensors
+# Each row is an endmember, columns are: blue, green, red, nir, swir1, swir2
+_STANDARD_EM = [
+    [119.0, 475.0, 169.0, 6250.0, 2399.0, 675.0],     # GV (Green Vegetation)
+    [1514.0, 1597.0, 1421.0, 3053.0, 7707.0, 1975.0], # NPV (Non-Photosynthetic Vegetation)
+    [1799.0, 2479.0, 3158.0, 5437.0, 7707.0, 6646.0], # Soil
+    [4031.0, 8714.0, 7900.0, 8989.0, 7002.0, 6607.0]  # Cloud
+]
+
+# Landsat 4-9 and Sentinel-2 (SR, TOA, harmonized) use the same endmembers,
+# so every sensor key points to the one _STANDARD_EM list (do not mutate it)
+ENDMEMBERS = dict.fromkeys([
+    'landsat-4',
+    'landsat-5',
+    'landsat-7',
+    'landsat-8',
+    'landsat-9',
+    'sentinel-2 (sr)',
+    'sentinel-2 (toa)',
+    'sentinel-2 (harmonized)',
+], _STANDARD_EM)
+
+# Simplified 3-endmember model
+ENDMEMBERS['small'] = [
+    [1780, 3370, 4580, 5590, 6830, 6450],  # Substrate (soil-like)
+    [300, 600, 310, 6690, 2400, 960],      # Vegetation
+    [190, 100, 50, 70, 30, 20]             # Dark (shadow/water)
+]
+
+
+@functools.lru_cache(maxsize=None)
+def _getEndmembers(sensor):
+    """
+    Return the endmembers of a sensor as an ee.List, built once per sensor.
+
+    Built lazily rather than at import time, since the country scripts import
+    this module before ee.Initialize(). An ee.List, not an ee.Array, since
+    ee.Image.unmix() takes the endmembers as a list of lists.
+
+    Args:
+        sensor (str): ENDMEMBERS key (e.g. 'landsat-8')
+
+    Returns:
+        ee.List: Endmember spectra, as accepted by ee.Image.unmix()
+    """
+    return ee.List(ENDMEMBERS[sensor])
 
 # ============================================================================
 # NDFI COLOR PALETTE
@@ -123,33 +97,106 @@ ENDMEMBERS = {
 # Color palette for NDFI visualization (200 colors from degraded to intact forest)
 # Format: Hexadecimal RGB colors (white -> magenta -> yellow -> green)
 # Range: 0-200 (0=highly degraded, 200=intact forest)
-NDFI_COLORS = 'ffffff,fffcff,fff9ff,fff7ff,fff4ff,fff2ff,ffefff,ffecff,ffeaff,ffe7ff,' +\
-    'ffe5ff,ffe2ff,ffe0ff,ffddff,ffdaff,ffd8ff,ffd5ff,ffd3ff,ffd0ff,ffceff,' +\
-    'ffcbff,ffc8ff,ffc6ff,ffc3ff,ffc1ff,ffbeff,ffbcff,ffb9ff,ffb6ff,ffb4ff,' +\
-    'ffb1ff,ffafff,ffacff,ffaaff,ffa7ff,ffa4ff,ffa2ff,ff9fff,ff9dff,ff9aff,' +\
-    'ff97ff,ff95ff,ff92ff,ff90ff,ff8dff,ff8bff,ff88ff,ff85ff,ff83ff,ff80ff,' +\
-    'ff7eff,ff7bff,ff79ff,ff76ff,ff73ff,ff71ff,ff6eff,ff6cff,ff69ff,ff67ff,' +\
-    'ff64ff,ff61ff,ff5fff,ff5cff,ff5aff,ff57ff,ff55ff,ff52ff,ff4fff,ff4dff,' +\
-    'ff4aff,ff48ff,ff45ff,ff42ff,ff40ff,ff3dff,ff3bff,ff38ff,ff36ff,ff33ff,' +\
-    'ff30ff,ff2eff,ff2bff,ff29ff,ff26ff,ff24ff,ff21ff,ff1eff,ff1cff,ff19ff,' +\
-    'ff17ff,ff14ff,ff12ff,ff0fff,ff0cff,ff0aff,ff07ff,ff05ff,ff02ff,ff00ff,' +\
-    'ff00ff,ff0af4,ff15e9,ff1fdf,ff2ad4,ff35c9,ff3fbf,ff4ab4,ff55aa,ff5f9f,' +\
-    'ff6a94,ff748a,ff7f7f,ff8a74,ff946a,ff9f5f,ffaa55,ffb44a,ffbf3f,ffc935,' +\
-    'ffd42a,ffdf1f,ffe915,fff40a,ffff00,ffff00,fffb00,fff700,fff300,fff000,' +\
-    'ffec00,ffe800,ffe400,ffe100,ffdd00,ffd900,ffd500,ffd200,ffce00,ffca00,' +\
-    'ffc600,ffc300,ffbf00,ffbb00,ffb700,ffb400,ffb000,ffac00,ffa800,ffa500,' +\
-    'ffa500,f7a400,f0a300,e8a200,e1a200,d9a100,d2a000,ca9f00,c39f00,bb9e00,' +\
-    'b49d00,ac9c00,a59c00,9d9b00,969a00,8e9900,879900,7f9800,789700,709700,' +\
-    '699600,619500,5a9400,529400,4b9300,439200,349100,2d9000,258f00,1e8e00,' +\
-    '168e00,0f8d00,078c00,008c00,008c00,008700,008300,007f00,007a00,007600,' +\
+NDFI_COLORS = (
+    'ffffff,fffcff,fff9ff,fff7ff,fff4ff,fff2ff,ffefff,ffecff,ffeaff,ffe7ff,'
+    'ffe5ff,ffe2ff,ffe0ff,ffddff,ffdaff,ffd8ff,ffd5ff,ffd3ff,ffd0ff,ffceff,'
+    'ffcbff,ffc8ff,ffc6ff,ffc3ff,ffc1ff,ffbeff,ffbcff,ffb9ff,ffb6ff,ffb4ff,'
+    'ffb1ff,ffafff,ffacff,ffaaff,ffa7ff,ffa4ff,ffa2ff,ff9fff,ff9dff,ff9aff,'
+    'ff97ff,ff95ff,ff92ff,ff90ff,ff8dff,ff8bff,ff88ff,ff85ff,ff83ff,ff80ff,'
+    'ff7eff,ff7bff,ff79ff,ff76ff,ff73ff,ff71ff,ff6eff,ff6cff,ff69ff,ff67ff,'
+    'ff64ff,ff61ff,ff5fff,ff5cff,ff5aff,ff57ff,ff55ff,ff52ff,ff4fff,ff4dff,'
+    'ff4aff,ff48ff,ff45ff,ff42ff,ff40ff,ff3dff,ff3bff,ff38ff,ff36ff,ff33ff,'
+    'ff30ff,ff2eff,ff2bff,ff29ff,ff26ff,ff24ff,ff21ff,ff1eff,ff1cff,ff19ff,'
+    'ff17ff,ff14ff,ff12ff,ff0fff,ff0cff,ff0aff,ff07ff,ff05ff,ff02ff,ff00ff,'
+    'ff00ff,ff0af4,ff15e9,ff1fdf,ff2ad4,ff35c9,ff3fbf,ff4ab4,ff55aa,ff5f9f,'
+    'ff6a94,ff748a,ff7f7f,ff8a74,ff946a,ff9f5f,ffaa55,ffb44a,ffbf3f,ffc935,'
+    'ffd42a,ffdf1f,ffe915,fff40a,ffff00,ffff00,fffb00,fff700,fff300,fff000,'
+    'ffec00,ffe800,ffe400,ffe100,ffdd00,ffd900,ffd500,ffd200,ffce00,ffca00,'
+    'ffc600,ffc300,ffbf00,ffbb00,ffb700,ffb400,ffb000,ffac00,ffa800,ffa500,'
+    'ffa500,f7a400,f0a300,e8a200,e1a200,d9a100,d2a000,ca9f00,c39f00,bb9e00,'
+    'b49d00,ac9c00,a59c00,9d9b00,969a00,8e9900,879900,7f9800,789700,709700,'
+    '699600,619500,5a9400,529400,4b9300,439200,349100,2d9000,258f00,1e8e00,'
+    '168e00,0f8d00,078c00,008c00,008c00,008700,008300,007f00,007a00,007600,'
     '007200,006e00,006900,006500,006100,005c00,005800,005400,005000,004c00'
+)
+
+# The same palette as a tuple, split once, for iteration on the client side
+# (ee visualization parameters take the comma-joined NDFI_COLORS string)
+NDFI_PALETTE = tuple(NDFI_COLORS.split(','))
 
 
 # ============================================================================
 # SPECTRAL MIXTURE ANALYSIS FUNCTIONS
 # ============================================================================
 
-def getFractions(image, endmembers):
+def _getOpticalBands(image):
+    """
+    Select the 6 optical bands used by the unmixing, in endmember order.
+
+    Args:
+        image (ee.Image): Image with blue, green, red, nir, swir1, swir2 bands
+
+    Returns:
+        ee.Image: The 6 optical bands
+    """
+    # ee.Image(image) only reinterprets the object (no new graph node), and
+    # the select is required: callers pass whole images (QA bands, indices)
+    return ee.Image(image)\
+        .select(['blue', 'green', 'red', 'nir', 'swir1', 'swir2'])
+
+
+def _unmix(optical, endmembers, bandNames, nonNegative=False, matrix=False):
+    """
+    Linear spectral unmixing of the 6 optical bands, as byte percentages.
+
+    Args:
+        optical (ee.Image): 6 optical bands from _getOpticalBands()
+        endmembers (list or ee.List): Endmember spectra (each with 6 values)
+        bandNames (list): Output band name of each endmember
+        nonNegative (bool, optional): Constrain the solver to non-negative
+            fractions instead of clamping them with max(0) (default: False)
+        matrix (bool, optional): Solve the unconstrained least squares with
+            a fixed pseudo-inverse matrix product (default: False). See
+            getFractions()
+
+    Returns:
+        ee.Image: One byte band (0-100) per endmember, named bandNames
+
+    Raises:
+        ValueError: If matrix and nonNegative are both set
+    """
+    if matrix and nonNegative:
+        raise ValueError(
+            'matrix unmixing has no non-negative constraint, '
+            'use either matrix=True or nonNegative=True')
+
+    if nonNegative:
+        # The solver already returns non-negative fractions
+        fractions = optical.unmix(endmembers, False, True)
+    elif matrix:
+        # The endmembers are fixed, so the least-squares solution is the
+        # product of the pixel vector with pinv(E^T), a small constant
+        # matrix (n endmembers × 6 bands) computed once on the server
+        pseudoInverse = ee.Array(endmembers)\
+            .transpose()\
+            .matrixPseudoInverse()
+
+        # 6 × 1 pixel vectors -> n × 1 fractions -> one band per endmember
+        fractions = ee.Image(pseudoInverse)\
+            .matrixMultiply(optical.toArray().toArray(1))\
+            .arrayProject([0])\
+            .arrayFlatten([bandNames])\
+            .max(0)
+    else:
+        fractions = optical.unmix(endmembers).max(0)
+
+    return fractions\
+        .multiply(100)\
+        .byte()\
+        .rename(bandNames)
+
+
+def getFractions(image, endmembers, nonNegative=False, matrix=False, includeCloud=True):
     """
     Perform Spectral Mixture Analysis (SMA) to decompose pixel reflectance into fractions.
     
@@ -164,9 +211,24 @@ def getFractions(image, endmembers):
     Args:
         image (ee.Image): Input image with standardized bands: 
             blue, green, red, nir, swir1, swir2
-        endmembers (list): List of 4 endmember spectra (each with 6 values)
+        endmembers (list or str): List of 4 endmember spectra (each with 6 values)
             Format: [[gv], [npv], [soil], [cloud]]
-            Retrieve from ENDMEMBERS dictionary using satellite key
+            Retrieve from ENDMEMBERS dictionary using satellite key, or pass
+            the key itself (e.g. 'landsat-8') to reuse a cached ee.List
+        nonNegative (bool, optional): Solve the unmixing with the non-negative
+            constraint (default: False). The default clamps the unconstrained
+            least-squares fractions with max(0); the constrained solution
+            gives other fractions, so exported values change
+        matrix (bool, optional): Compute the unconstrained least-squares
+            fractions as a matrix product with the pseudo-inverse of the
+            endmembers instead of ee.Image.unmix() (default: False). Same
+            solution up to float rounding, which the byte truncation can
+            turn into a difference of one. Not combinable with nonNegative
+        includeCloud (bool, optional): Unmix with the cloud endmember and add
+            the cloud band (default: True). False unmixes with the first three
+            endmembers only (gv, npv, soil), for collections whose clouds are
+            masked beforehand: one fewer endmember and band per pixel, but
+            the 3-endmember model gives other fractions than the 4-endmember one
     
     Returns:
         ee.Image: Original image with added fraction bands:
@@ -186,7 +248,8 @@ def getFractions(image, endmembers):
     Algorithm Steps:
         1. Select 6 optical bands (blue through swir2)
         2. Apply linear unmixing with endmembers
-        3. Constrain fractions to non-negative (max with 0)
+        3. Constrain fractions to non-negative (max with 0, or in the solver
+           with nonNegative=True)
         4. Scale to 0-100 range and convert to byte
         5. Calculate shade as residual from 100%
     
@@ -229,38 +292,60 @@ def getFractions(image, endmembers):
         - Souza et al. (2005) Journal of Geophysical Research
         - Adams et al. (1995) Remote Sensing of Environment
     """
+    fractions, _ = _getFractionBands(
+        _getOpticalBands(image), endmembers, nonNegative, matrix, includeCloud)
+
+    # Add fraction bands to original image
+    return image.addBands(fractions)
+
+
+def _getFractionBands(optical, endmembers, nonNegative=False, matrix=False,
+                      includeCloud=True):
+    """
+    gv, npv, soil, cloud and shade bands of getFractions().
+
+    Args:
+        optical (ee.Image): 6 optical bands from _getOpticalBands()
+        endmembers (list or str): 4 endmember spectra, or an ENDMEMBERS key
+        nonNegative (bool, optional): See _unmix() (default: False)
+        matrix (bool, optional): See _unmix() (default: False)
+        includeCloud (bool, optional): Unmix with the cloud endmember
+            (default: True). See getFractions()
+
+    Returns:
+        tuple: (ee.Image, ee.Image) fraction bands gv, npv, soil, cloud and
+            shade (byte), and the sum of fractions, for reuse by the indices
+    """
     # Output band names for the four unmixed fractions
     outBandNames = ['gv', 'npv', 'soil', 'cloud']
 
-    # Perform linear spectral unmixing
-    fractions = ee.Image(image)\
-        .select(['blue', 'green', 'red', 'nir', 'swir1', 'swir2'])\
-        .unmix(endmembers)\
-        .max(0)\
-        .multiply(100)\
-        .byte()
+    # Sensor keys resolve to the ee.List built once per sensor
+    if isinstance(endmembers, str):
+        endmembers = _getEndmembers(endmembers)
+
+    # Without cloud, keep the gv, npv and soil endmembers (first three rows)
+    if not includeCloud:
+        outBandNames = outBandNames[:3]
 
-    fractions = fractions.rename(outBandNames)
+        if isinstance(endmembers, ee.List):
+            endmembers = endmembers.slice(0, 3)
+        else:
+            endmembers = endmembers[:3]
+
+    # Perform linear spectral unmixing
+    fractions = _unmix(optical, endmembers, outBandNames, nonNegative, matrix)
 
     # Calculate sum of vegetation and soil fractions
-    summed = fractions.expression('b("gv") + b("npv") + b("soil")')
+    summed = _getSummed(fractions)
 
     # Calculate shade fraction as residual from 100%
     # Shade = |100 - (GV + NPV + Soil)|
-    shade = summed\
-        .subtract(100)\
-        .abs()\
-        .byte()\
-        .rename(["shade"])
-
-    # Add fraction bands to original image
-    image = image.addBands(fractions)
-    image = image.addBands(shade)
+    shade = _getShade(summed).rename(["shade"])
 
-    return image
+    return fractions.addBands(shade), summed
 
 
-def getFractionsSmall(image, endmembers):
+def getFractionsSmall(image, endmembers, nonNegative=False, matrix=False):
     """
     Perform simplified 3-endmember Spectral Mixture Analysis.
     
@@ -274,6 +359,10 @@ def getFractionsSmall(image, endmembers):
         endmembers (list): List of 3 endmember spectra (each with 6 values)
             Format: [[substrate], [vegetation], [dark]]
             Use ENDMEMBERS['small'] for standard 3-endmember model
+        nonNegative (bool, optional): Non-negative constrained unmixing instead
+            of clamping with max(0) (default: False). See getFractions()
+        matrix (bool, optional): Pseudo-inverse matrix unmixing (default: False).
+            See getFractions()
     
     Returns:
         ee.Image: Original image with added fraction bands:
@@ -305,30 +394,344 @@ def getFractionsSmall(image, endmembers):
         - Broad vegetation mapping
         - When GV/NPV distinction not needed
     """
+    fractions = _getFractionSmallBands(
+        _getOpticalBands(image), endmembers, nonNegative, matrix)
+
+    # Add fraction bands to original image
+    return image.addBands(fractions)
+
+
+def _getFractionSmallBands(optical, endmembers, nonNegative=False, matrix=False):
+    """
+    subs_small, veg_small and dark_small bands of getFractionsSmall().
+
+    Args:
+        optical (ee.Image): 6 optical bands from _getOpticalBands()
+        endmembers (list or str): 3 endmember spectra, or an ENDMEMBERS key
+        nonNegative (bool, optional): See _unmix() (default: False)
+        matrix (bool, optional): See _unmix() (default: False)
+
+    Returns:
+        ee.Image: Fraction bands subs_small, veg_small, dark_small (byte)
+    """
     # Output band names for 3-endmember model
     outBandNames = ['subs_small', 'veg_small', 'dark_small']
 
+    if isinstance(endmembers, str):
+        endmembers = _getEndmembers(endmembers)
+
     # Perform linear spectral unmixing with 3 endmembers
-    fractions = ee.Image(image)\
-        .select(['blue', 'green', 'red', 'nir', 'swir1', 'swir2'])\
-        .unmix(endmembers)\
-        .max(0)\
-        .multiply(100)\
-        .byte()
+    return _unmix(optical, endmembers, outBandNames, nonNegative, matrix)
 
-    fractions = fractions.rename(outBandNames)
 
-    # Add fraction bands to original image
-    image = image.addBands(fractions)
+def getFractionsBoth(image, endmembers, endmembersSmall, nonNegative=False):
+    """
+    Perform the 4-endmember and the 3-endmember SMA on one band selection.
+    
+    Same bands and values as getFractionsSmall(getFractions(image, endmembers),
+    endmembersSmall), with the 6 optical bands selected once and all
+    fraction bands added to the image with a single addBands.
+    
+    Args:
+        image (ee.Image): Input image with standardized bands:
+            blue, green, red, nir, swir1, swir2
+        endmembers (list or str): 4 endmember spectra, see getFractions()
+        endmembersSmall (list or str): 3 endmember spectra, see getFractionsSmall()
+        nonNegative (bool, optional): See getFractions() (default: False)
+    
+    Returns:
+        ee.Image: Original image with added bands gv, npv, soil, cloud, shade,
+            subs_small, veg_small, dark_small
+    
+    Example:
+        >>> fractions = getFractionsBoth(image, 'landsat-8', 'small')
+    """
+    optical = _getOpticalBands(image)
+
+    fractions = ee.Image.cat(
+        _getFractionBands(optical, endmembers, nonNegative)[0],
+        _getFractionSmallBands(optical, endmembersSmall, nonNegative)
+    )
+
+    return image.addBands(fractions)
+
 
-    return image
+# Bit offsets of each fraction in the packed uint32 band of packFractions()
+# Fractions are bytes (0-255: unmixing can overshoot 100), so gv << 24 needs
+# the full 32 unsigned bits; as int32 any gv >= 128 would turn negative
+PACKED_FRACTIONS = [('gv', 24), ('npv', 16), ('soil', 8), ('cloud', 0)]
+
+
+def packFractions(image):
+    """
+    Pack the gv, npv, soil and cloud fractions into a single uint32 band.
+    
+    Intended for storing per-image fractions (e.g. exporting scenes to an
+    asset), where one band per image is lighter than four. The mosaic
+    functions reduce each band on its own, so they need the unpacked bands.
+    
+    Args:
+        image (ee.Image): Image with byte fraction bands from getFractions()
+    
+    Returns:
+        ee.Image: Single uint32 band 'fractions' = gv << 24 | npv << 16 | soil << 8 | cloud
+            (lossless for the whole byte range of each fraction)
+    
+    Example:
+        >>> packed = packFractions(getFractions(image, 'landsat-8'))
+        >>> fractions = unpackFractions(packed)
+    """
+    # Shifted fractions; the first one carries the image projection
+    shifted = [
+        image.select([band]).toUint32().leftShift(offset)
+        for band, offset in PACKED_FRACTIONS
+    ]
+
+    packed = shifted[0]
+
+    for band in shifted[1:]:
+        packed = packed.bitwiseOr(band)
+
+    # Pin the type: the shifts may promote it to a wider integer
+    return packed.toUint32().rename(['fractions'])
+
+
+def unpackFractions(image):
+    """
+    Unpack the fractions band of packFractions() into byte fraction bands.
+    
+    Args:
+        image (ee.Image): Image with the uint32 'fractions' band
+    
+    Returns:
+        ee.Image: Bands gv, npv, soil, cloud and shade (byte), as getFractions()
+            adds them; shade is rebuilt as the residual of the other fractions
+    """
+    packed = image.select(['fractions'])
+
+    fractions = ee.Image.cat(*[
+        packed.rightShift(offset).bitwiseAnd(0xFF).byte().rename([band])
+        for band, offset in PACKED_FRACTIONS
+    ])
+
+    shade = _getShade(_getSummed(fractions)).rename(['shade'])
+
+    return fractions.addBands(shade)
 
 
 # ============================================================================
 # FRACTION-BASED INDICES
 # ============================================================================
 
-def getNDFI(imageFractions):
+# By default the index builders keep the ee.Image.cat(a, b).normalizedDifference()
+# step followed by byte(x * 100 + 100): normalizedDifference computes in 32-bit
+# float, and the byte() cast truncates, so a single fused double-precision
+# expression would move some pixels across integer boundaries (e.g. an index
+# of 0.3 gives 130 in float and 129 in double) and change exported values
+
+def _getSummed(imageFractions):
+    """
+    Sum of the GV, NPV and Soil fractions (excluding cloud and shade).
+
+    Args:
+        imageFractions (ee.Image): Image with gv, npv and soil bands
+
+    Returns:
+        ee.Image: Single-band sum of fractions
+    """
+    return imageFractions.select(['gv'])\
+        .add(imageFractions.select(['npv']))\
+        .add(imageFractions.select(['soil']))
+
+
+def _getShade(summed):
+    """
+    Shade fraction as residual of the sum of fractions: |100 - (GV + NPV + Soil)|.
+
+    Args:
+        summed (ee.Image): Sum of fractions from _getSummed()
+
+    Returns:
+        ee.Image: Single-band shade fraction (byte)
+    
+    Note:
+        - summed is an integer sum of byte bands, so subtract and abs stay
+          integer; byte() narrows the 0-200 range to the byte fraction type
+        - Shade is not constant even under a sum-to-one unmixing: summed
+          excludes the cloud fraction, and the fractions are truncated to
+          bytes, so |100 - summed| is not 0 when gv + npv + soil + cloud = 1
+    """
+    return summed.subtract(100).abs().byte()
+
+
+def _getShadeBand(imageFractions):
+    """
+    The shade band of an image, computed only when it is missing.
+
+    getFractions() adds the shade band, so it is reused as is; images that
+    only have gv, npv and soil get it from the residual of their fractions.
+    The test runs on the band names (metadata), and only the chosen branch
+    is computed.
+
+    Args:
+        imageFractions (ee.Image): Image with gv, npv and soil bands
+
+    Returns:
+        ee.Image: Single-band shade fraction (byte)
+    """
+    return ee.Image(ee.Algorithms.If(
+        imageFractions.bandNames().contains('shade'),
+        imageFractions.select(['shade']),
+        _getShade(_getSummed(imageFractions)).rename(['shade'])
+    ))
+
+
+def _getGvNpv(imageFractions):
+    """
+    Sum of the vegetation fractions, GV + NPV.
+
+    Args:
+        imageFractions (ee.Image): Image with gv and npv bands
+
+    Returns:
+        ee.Image: Single-band vegetation sum
+    """
+    return imageFractions.select(['gv']).add(imageFractions.select(['npv']))
+
+
+def _getRescaledDifference(first, second, name, integer=False):
+    """
+    Normalized difference of two fraction images, rescaled to bytes 0-200.
+
+    Args:
+        first (ee.Image): Single-band first operand
+        second (ee.Image): Single-band second operand
+        name (str): Output band name
+        integer (bool, optional): Compute on int16 pixels instead of the
+            float normalizedDifference (default: False), as
+            byte(100 × (first - second) / (first + second) + 100). Values may
+            differ by one from the float path, which scales before truncating
+
+    Returns:
+        ee.Image: Band name with (nd × 100) + 100, -1 -> 0, 0 -> 100, 1 -> 200
+    """
+    if integer:
+        # |first - second| × 100 <= 20000 fits in int16
+        first = first.toInt16()
+        second = second.toInt16()
+
+        return first.subtract(second)\
+            .multiply(100)\
+            .divide(first.add(second))\
+            .add(100)\
+            .byte()\
+            .rename([name])
+
+    # Normalized difference (float), rescaled from [-1, 1] to [0, 200]
+    difference = ee.Image.cat(first, second)\
+        .normalizedDifference()\
+        .rename([name])
+
+    return difference.expression('byte(b("{}") * 100 + 100)'.format(name))
+
+
+def _getNDFIBands(imageFractions, summed, integer=False):
+    """
+    gvs and ndfi bands of getNDFI(), from a precomputed sum of fractions.
+
+    Args:
+        imageFractions (ee.Image): Image with gv, npv and soil bands
+        summed (ee.Image): Sum of fractions from _getSummed()
+        integer (bool, optional): See _getRescaledDifference() (default: False)
+
+    Returns:
+        ee.Image: Bands gvs (0-100) and ndfi (0-200)
+    """
+    # Calculate shade-normalized green vegetation (GVs)
+    # GVs = proportion of GV relative to total non-shade surface
+    gvs = imageFractions.select("gv")\
+        .divide(summed)\
+        .multiply(100)\
+        .byte()\
+        .rename(["gvs"])
+
+    # Sum of NPV and Soil fractions
+    npvSoil = imageFractions.select(['npv']).add(imageFractions.select(['soil']))
+
+    # Calculate normalized difference: (GVs - (NPV+Soil)) / (GVs + (NPV+Soil))
+    # Rescaled from [-1, 1] to [0, 200]: (ndfi × 100) + 100
+    ndfi = _getRescaledDifference(gvs, npvSoil, 'ndfi', integer)
+
+    return gvs.addBands(ndfi)
+
+
+def _getSEFIBand(imageFractions, summed, gvnpv, integer=False):
+    """
+    sefi band of getSEFI(), from precomputed sums of fractions.
+
+    Args:
+        imageFractions (ee.Image): Image with the soil band
+        summed (ee.Image): Sum of fractions from _getSummed()
+        gvnpv (ee.Image): Vegetation sum from _getGvNpv()
+        integer (bool, optional): See _getRescaledDifference() (default: False)
+
+    Returns:
+        ee.Image: Band sefi (0-200)
+    """
+    soil = imageFractions.select(['soil'])
+
+    # Calculate normalized vegetation fraction (GV+NPV relative to sum)
+    gvnpv_s = (gvnpv.divide(summed)).multiply(100)
+
+    # Calculate normalized difference between vegetation and soil
+    # Rescaled from [-1, 1] to [0, 200]
+    return _getRescaledDifference(gvnpv_s, soil, 'sefi', integer)
+
+
+def _getWEFIBand(imageFractions, shade, gvnpv, integer=False):
+    """
+    wefi band of getWEFI(), from precomputed shade and vegetation fractions.
+
+    Args:
+        imageFractions (ee.Image): Image with the soil band
+        shade (ee.Image): Shade fraction (the getFractions() shade band)
+        gvnpv (ee.Image): Vegetation sum from _getGvNpv()
+        integer (bool, optional): See _getRescaledDifference() (default: False)
+
+    Returns:
+        ee.Image: Band wefi (0-200)
+    """
+    soil = imageFractions.select(['soil'])
+
+    # Calculate soil+shade sum
+    soilshade = soil.add(shade)
+
+    # Calculate normalized difference between vegetation and (soil+shade)
+    # Rescaled from [-1, 1] to [0, 200]
+    return _getRescaledDifference(gvnpv, soilshade, 'wefi', integer)
+
+
+def _getFNSBand(imageFractions, shade, integer=False):
+    """
+    fns band of getFNS(), from a precomputed shade fraction.
+
+    Args:
+        imageFractions (ee.Image): Image with gv and soil bands
+        shade (ee.Image): Shade fraction (the getFractions() shade band)
+        integer (bool, optional): See _getRescaledDifference() (default: False)
+
+    Returns:
+        ee.Image: Band fns (0-200)
+    """
+    soil = imageFractions.select(['soil'])
+    gv = imageFractions.select(['gv'])
+    gvshade = gv.add(shade)
+
+    # calculate FNS, rescaled from 0 to 200
+    return _getRescaledDifference(gvshade, soil, 'fns', integer)
+
+
+def getNDFI(imageFractions, keepGvs=True):
     """
     Calculate Normalized Difference Fraction Index (NDFI).
     
@@ -344,6 +747,9 @@ def getNDFI(imageFractions):
     Args:
         imageFractions (ee.Image): Image with fraction bands from getFractions():
             Required bands: gv, npv, soil
+        keepGvs (bool, optional): Add the gvs band to the output (default: True).
+            The mosaic band specifications export gvs, so set False only
+            when gvs is not used downstream
     
     Returns:
         ee.Image: Original image with added bands:
@@ -398,6 +804,7 @@ def getNDFI(imageFractions):
         - Scale 0-200 chosen for compatibility with byte data type
         - Works best in forested landscapes
         - May have limitations in non-forest areas
+        - To compute NDFI, SEFI, WEFI and FNS together, use getFractionIndices()
     
     Reference:
         Souza, C.M., et al. (2005). "Combining spectral and spatial information
@@ -405,34 +812,16 @@ def getNDFI(imageFractions):
         Remote Sensing of Environment, 98(2-3), 329-343.
     """
     # Calculate sum of fractions (excluding cloud and shade)
-    summed = imageFractions.expression('b("gv") + b("npv") + b("soil")')
-
-    # Calculate shade-normalized green vegetation (GVs)
-    # GVs = proportion of GV relative to total non-shade surface
-    gvs = imageFractions.select("gv")\
-        .divide(summed)\
-        .multiply(100)\
-        .byte()\
-        .rename(["gvs"])
-
-    # Sum of NPV and Soil fractions
-    npvSoil = imageFractions.expression('b("npv") + b("soil")')
+    summed = _getSummed(imageFractions)
 
-    # Calculate normalized difference: (GVs - (NPV+Soil)) / (GVs + (NPV+Soil))
-    ndfi = ee.Image.cat(gvs, npvSoil)\
-        .normalizedDifference()\
-        .rename(['ndfi'])
+    ndfiBands = _getNDFIBands(imageFractions, summed)
 
-    # Rescale NDFI from [-1, 1] to [0, 200]
-    # Formula: (ndfi × 100) + 100
-    # -1 becomes 0, 0 becomes 100, 1 becomes 200
-    ndfi = ndfi.expression('byte(b("ndfi") * 100 + 100)')
+    # gvs is an intermediate of ndfi, dropped when not needed
+    if not keepGvs:
+        ndfiBands = ndfiBands.select(['ndfi'])
 
-    # Add new bands to image
-    imageFractions = imageFractions.addBands(gvs)
-    imageFractions = imageFractions.addBands(ndfi)
-
-    return imageFractions
+    # Add gvs and ndfi bands to image
+    return imageFractions.addBands(ndfiBands)
 
 
 def getSEFI(imageFractions):
@@ -486,30 +875,14 @@ def getSEFI(imageFractions):
         - Low values indicate soil exposure (low vegetation)
         - Complements NDFI for land degradation studies
         - Scale 0-200 for consistency with NDFI
+        - To compute NDFI, SEFI, WEFI and FNS together, use getFractionIndices()
     """
     # Calculate sum of all fractions (excluding cloud and shade)
-    summed = imageFractions.expression('b("gv") + b("npv") + b("soil")')
-    
-    # Extract individual fractions
-    soil = imageFractions.select(['soil'])
-    npv = imageFractions.select(['npv'])
-    gv = imageFractions.select(['gv'])
-    
-    # Calculate normalized vegetation fraction (GV+NPV relative to sum)
-    gvnpv_s = (gv.add(npv).divide(summed)).multiply(100)
-
-    # Calculate normalized difference between vegetation and soil
-    sefi = ee.Image.cat(gvnpv_s, soil)\
-        .normalizedDifference()\
-        .rename(['sefi'])
-
-    # Rescale SEFI from [-1, 1] to [0, 200]
-    sefi = sefi.expression('byte(b("sefi") * 100 + 100)')
+    summed = _getSummed(imageFractions)
 
     # Add SEFI band to image
-    imageFractions = imageFractions.addBands(sefi)
-
-    return imageFractions
+    return imageFractions.addBands(
+        _getSEFIBand(imageFractions, summed, _getGvNpv(imageFractions)))
 
 
 def getWEFI(imageFractions):
@@ -527,7 +900,7 @@ def getWEFI(imageFractions):
     
     Args:
         imageFractions (ee.Image): Image with fraction bands from getFractions():
-            Required bands: gv, npv, soil
+            Required bands: gv, npv, soil (shade is reused when present)
     
     Returns:
         ee.Image: Original image with added 'wefi' band (0-200)
@@ -565,54 +938,212 @@ def getWEFI(imageFractions):
         - Includes shade component (shadows often associated with water)
         - Useful complement to MNDWI/NDWI spectral indices
         - Scale 0-200 for consistency with other fraction indices
+        - To compute NDFI, SEFI, WEFI and FNS together, use getFractionIndices()
     """
-    # Calculate sum of fractions
-    summed = imageFractions.expression('b("gv") + b("npv") + b("soil")')
+    # Shade fraction, reused from getFractions() when present
+    shade = _getShadeBand(imageFractions)
+
+    # Add WEFI band to image
+    return imageFractions.addBands(
+        _getWEFIBand(imageFractions, shade, _getGvNpv(imageFractions)))
+
+
+def getFNS(imageFractions):
+    """
+    Calculate Forest/Non-forest Stratification index (FNS).
     
-    # Extract individual fractions
-    soil = imageFractions.select(['soil'])
-    npv = imageFractions.select(['npv'])
-    gv = imageFractions.select(['gv'])
+    FNS contrasts green vegetation plus shade (typical of closed canopies,
+    where crowns cast shadows) against soil. It's useful to stratify forest
+    from non-forest before finer classification.
+    
+    Formula:
+        FNS = ((GV + Shade) - Soil) / ((GV + Shade) + Soil)
+        Scaled: (FNS × 100) + 100 to range 0-200
     
-    # Calculate shade fraction as residual
-    shd = summed.subtract(100).abs().byte()
+    Args:
+        imageFractions (ee.Image): Image with fraction bands from getFractions():
+            Required bands: gv, npv, soil (shade is reused when present)
     
-    # Calculate vegetation sum
-    gvnpv = gv.add(npv)
+    Returns:
+        ee.Image: Original image with added 'fns' band (0-200)
     
-    # Calculate soil+shade sum
-    soilshade = soil.add(shd)
+    Example:
+        >>> image_with_fns = getFNS(image_with_fractions)
+        >>> forest = image_with_fns.select('fns').gt(150)
+    
+    Notes:
+        - High values indicate forest (vegetation and canopy shade)
+        - Low values indicate exposed soil
+        - Scale 0-200 for consistency with other fraction indices
+        - To compute NDFI, SEFI, WEFI and FNS together, use getFractionIndices()
+    """
+    # Shade fraction, reused from getFractions() when present
+    shade = _getShadeBand(imageFractions)
 
-    # Calculate normalized difference between vegetation and (soil+shade)
-    wefi = ee.Image.cat(gvnpv, soilshade)\
-        .normalizedDifference()\
-        .rename(['wefi'])
+    return imageFractions.addBands(_getFNSBand(imageFractions, shade))
 
-    # Rescale WEFI from [-1, 1] to [0, 200]
-    wefi = wefi.expression('byte(b("wefi") * 100 + 100)')
 
-    # Add WEFI band to image
-    imageFractions = imageFractions.addBands(wefi)
+def getFractionIndices(imageFractions, integer=False, keepGvs=True):
+    """
+    Calculate NDFI, SEFI, WEFI and FNS in one step.
+    
+    Same bands and values as mapping getNDFI, getSEFI, getWEFI and getFNS
+    one after the other, but the sum of fractions is built once and shared
+    by the indices, and the new bands are added to the image with a single
+    addBands.
+    
+    Args:
+        imageFractions (ee.Image): Image with fraction bands from getFractions():
+            Required bands: gv, npv, soil (shade is reused when present)
+        integer (bool, optional): Compute the normalized differences in int16
+            instead of float (default: False). Lighter tiles, but values
+            may differ by one from the default float computation
+        keepGvs (bool, optional): Add the gvs band (default: True). See getNDFI()
+    
+    Returns:
+        ee.Image: Original image with added bands gvs, ndfi, sefi, wefi, fns
+    
+    Example:
+        >>> collection = collection\\
+        ...     .map(lambda image: getFractions(image, endmember))\\
+        ...     .map(getFractionIndices)
+    
+    Note:
+        - The bands are built from per-index subexpressions combined with one
+          ee.Image.cat, not from a single ee.Image.expression: the indices
+          keep the float normalizedDifference of the single-index functions,
+          so the values match them exactly
+    """
+    # Sum of fractions shared by NDFI and SEFI, and the shade fraction
+    # for WEFI and FNS (reused from getFractions() when present)
+    summed = _getSummed(imageFractions)
+    shade = _getShadeBand(imageFractions)
 
-    return imageFractions
+    indices = _getIndexBands(imageFractions, summed, shade, integer, keepGvs)
 
+    return imageFractions.addBands(indices)
 
-def getFNS(imageFractions):
 
-    summed = imageFractions.expression('b("gv") + b("npv") + b("soil")')
-    soil = imageFractions.select(['soil'])
-    gv = imageFractions.select(['gv'])
-    shd = summed.subtract(100).abs().byte()
-    gvshade = gv.add(shd)
+def _getIndexBands(imageFractions, summed, shade, integer=False, keepGvs=True):
+    """
+    gvs, ndfi, sefi, wefi and fns bands of getFractionIndices().
 
-    # calculate FNS
-    fns = ee.Image.cat(gvshade, soil)\
-        .normalizedDifference()\
-        .rename(['fns'])
+    Args:
+        imageFractions (ee.Image): Image with gv, npv and soil bands
+        summed (ee.Image): Sum of fractions from _getSummed()
+        shade (ee.Image): Shade fraction (the getFractions() shade band)
+        integer (bool, optional): See _getRescaledDifference() (default: False)
+        keepGvs (bool, optional): Include the gvs band (default: True)
+
+    Returns:
+        ee.Image: Index bands gvs (if kept), ndfi, sefi, wefi, fns
+    """
+    # Vegetation sum (GV + NPV), shared by SEFI and WEFI
+    gvnpv = _getGvNpv(imageFractions)
+
+    ndfiBands = _getNDFIBands(imageFractions, summed, integer)
+
+    # gvs is an intermediate of ndfi, dropped when not needed
+    if not keepGvs:
+        ndfiBands = ndfiBands.select(['ndfi'])
+
+    return ee.Image.cat(
+        ndfiBands,
+        _getSEFIBand(imageFractions, summed, gvnpv, integer),
+        _getWEFIBand(imageFractions, shade, gvnpv, integer),
+        _getFNSBand(imageFractions, shade, integer)
+    )
 
-    # rescale FNS from 0 to 200
-    fns = fns.expression('byte(b("fns") * 100 + 100)')
 
-    imageFractions = imageFractions.addBands(fns)
+def getFractionsAndIndices(image, endmembers, integer=False, nonNegative=False):
+    """
+    Perform SMA and calculate the fraction-based indices in one step.
+    
+    Equivalent to getFractionIndices(getFractions(image, endmembers)), with
+    the sum of fractions of the unmixing reused by the indices.
+    
+    Args:
+        image (ee.Image): Input image with standardized bands:
+            blue, green, red, nir, swir1, swir2
+        endmembers (list or str): Endmembers, as accepted by getFractions()
+        integer (bool, optional): See getFractionIndices() (default: False)
+        nonNegative (bool, optional): See getFractions() (default: False)
+    
+    Returns:
+        ee.Image: Original image with added bands gv, npv, soil, cloud, shade,
+            gvs, ndfi, sefi, wefi, fns
+    """
+    fractions, summed = _getFractionBands(
+        _getOpticalBands(image), endmembers, nonNegative)
+
+    # The sum of fractions of the unmixing is reused by the indices
+    indices = _getIndexBands(
+        fractions, summed, fractions.select(['shade']), integer)
+
+    return image.addBands(fractions.addBands(indices))
+
+
+def getFractionsAndNDFI(image, endmembers, nonNegative=False, keepGvs=True):
+    """
+    Perform SMA and calculate NDFI in one step.
+    
+    Same bands and values as getNDFI(getFractions(image, endmembers)), with
+    the sum of fractions built once for both the shade fraction and GVs.
+    
+    Args:
+        image (ee.Image): Input image with standardized bands:
+            blue, green, red, nir, swir1, swir2
+        endmembers (list or str): Endmembers, as accepted by getFractions()
+        nonNegative (bool, optional): See getFractions() (default: False)
+        keepGvs (bool, optional): Add the gvs band (default: True). See getNDFI()
+    
+    Returns:
+        ee.Image: Original image with added bands gv, npv, soil, cloud, shade,
+            gvs, ndfi
+    
+    Example:
+        >>> image = getFractionsAndNDFI(image, 'landsat-8')
+        >>> ndfi = image.select('ndfi')
+    """
+    fractions, summed = _getFractionBands(
+        _getOpticalBands(image), endmembers, nonNegative)
+
+    ndfiBands = _getNDFIBands(fractions, summed)
+
+    # gvs is an intermediate of ndfi, dropped when not needed
+    if not keepGvs:
+        ndfiBands = ndfiBands.select(['ndfi'])
+
+    return image.addBands(fractions.addBands(ndfiBands))
+
+
+def mapFractionsAndIndices(collection, endmembers, integer=False, nonNegative=False):
+    """
+    Apply getFractionsAndIndices() to every image of a collection.
+    
+    The mapped function is serialized once and run by Earth Engine on each
+    image, so the graph holds one copy of the SMA and index computation
+    (and of the endmember constant) whatever the collection size.
+    
+    Args:
+        collection (ee.ImageCollection): Images with standardized bands:
+            blue, green, red, nir, swir1, swir2
+        endmembers (list or str): Endmembers, as accepted by getFractions()
+        integer (bool, optional): See getFractionIndices() (default: False)
+        nonNegative (bool, optional): See getFractions() (default: False)
+    
+    Returns:
+        ee.ImageCollection: Images with added bands gv, npv, soil, cloud,
+            shade, gvs, ndfi, sefi, wefi, fns
+    
+    Example:
+        >>> collection = mapFractionsAndIndices(collection, 'sentinel-2 (harmonized)')
+    """
+    # Sensor keys resolve to the cached ee.List before the function is mapped
+    if isinstance(endmembers, str):
+        endmembers = _getEndmembers(endmembers)
 
-    return imageFractions
+    return collection.map(
+        lambda image: getFractionsAndIndices(
+            image, endmembers, integer, nonNegative)
+    )
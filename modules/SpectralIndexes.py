@@ -14,15 +14,460 @@ Categories:
 - Vegetation Indices: NDVI, EVI, EVI2, SAVI, PRI, GCVI
 - Water Indices: NDWI, MNDWI
 - Urban/Built-up Indices: NDBI, UI, BU, EBBI
-- Other: CAI (Cellulose Absorption), Hall indices (forest structure)
+- Other: CAI (Cellulose Absorption), Hall indices (forest structure,
+  getHallBoth() for both at once)
+
+getIndices() calculates several indices at once from the INDEX_SPEC registry,
+and mapIndices() does it for a whole collection; the get*() functions are
+shortcuts for a single index. addIndices() adds the output of several index
+functions with a single addBands(), and toInt16() stores the results as
+scaled int16 bands.
 
 Dependencies: earthengine-api
 """
 
 import ee
+import functools
+import re
+
+# Linear part of the Hall indices, exp() is applied on top of it
+HALL_LINEAR_EXPR = {
+    "hallcover": '(-red * 0.017) - (nir * 0.007) - (swir2 * 0.079) + 5.22',
+    "hallheigth": '(-red * 0.039) - (nir * 0.011) - (swir1 * 0.026) + 4.13',
+}
+
+# Same Hall coefficients as rows over HALL_BANDS, plus the bias, for the
+# matrix form of getHallBoth(matrix=True)
+HALL_BANDS = ["red", "nir", "swir1", "swir2"]
+
+HALL_COEFFICIENTS = {
+    "hallcover": ([-0.017, -0.007, 0.0, -0.079], 5.22),
+    "hallheigth": ([-0.039, -0.011, -0.026, 0.0], 4.13),
+}
+
+# Registry of the indices: (name, expression, shifted by +1 to avoid negative
+# values). Expressions are evaluated by getIndices() with their input bands
+# bound by name (band map) instead of b("name") lookups
+INDEX_SPEC = [
+    ("ndvi", '( nir - red ) / ( nir + red )', True),
+    ("ndbi", '( swir1 - nir ) / ( swir1 + nir )', True),
+    ("ui", '( swir2 - nir ) / ( swir2 + nir )', True),
+    ("bu", '( swir1 - nir ) / ( swir1 + nir ) - ( nir - red ) / ( nir + red )', False),
+    # Note: Original formula uses 0.1, but DN version uses 10 (scaling difference)
+    # ("ebbi", '( swir1 - nir ) / ( 0.1 * sqrt(swir1 + tir) )', False),
+    ("ebbi", '( swir1_dn - nir_dn ) / ( 10 * sqrt(swir1_dn + tir_dn) )', False),
+    ("ndwi", 'float(nir - swir1)/(nir + swir1)', True),
+    ("mndwi", 'float(green - swir1)/(green + swir1)', True),
+    ("savi", '1.5 * (nir - red) / (0.5 + nir + red)', True),
+    ("pri", 'float(blue - green)/(blue + green)', True),
+    ("cai", 'float( swir2 / swir1 )', True),
+    ("evi", '2.5 * ((nir - red) / (nir + 6 * red - 7.5 * blue + 1))', True),
+    ("evi2", '2.5 * (nir - red) / (nir + (2.4 * red) + 1)', True),
+    ("hallcover", 'exp( {} )'.format(HALL_LINEAR_EXPR["hallcover"]), False),
+    ("hallheigth", 'exp( {} )'.format(HALL_LINEAR_EXPR["hallheigth"]), False),
+    ("gcvi", 'nir / green - 1', True),
+]
+
+# Expression of each index, by name
+INDEX_EXPR = dict((name, expression) for name, expression, shift in INDEX_SPEC)
+
+# Indices shifted by +1 (easier storage)
+SHIFTED_INDICES = tuple(name for name, expression, shift in INDEX_SPEC if shift)
+
+# Bands of the indices that are plain normalized differences (first, second)
+NORMALIZED_DIFFERENCES = {
+    "ndvi": ["nir", "red"],
+    "ndbi": ["swir1", "nir"],
+    "ui": ["swir2", "nir"],
+    "ndwi": ["nir", "swir1"],
+    "mndwi": ["green", "swir1"],
+    "pri": ["blue", "green"],
+}
+
+# Indices that getIndices(native=True) builds with ee.Image operators
+NATIVE_INDICES = tuple(NORMALIZED_DIFFERENCES) + ("cai", "gcvi", "savi", "evi", "evi2", "bu")
+
+
+@functools.lru_cache(maxsize=None)
+def _getInputBands(names):
+    """
+    Get the input bands read by the expressions of some indices.
+    
+    The expressions are parsed once per tuple of names, client side. Earth
+    Engine objects cannot be prepared at import time (ee.Initialize is called
+    by the scripts after importing the modules), so only the band list is
+    cached.
+    
+    Args:
+        names (tuple): Index names, keys of INDEX_EXPR
+    
+    Returns:
+        tuple: Band names, in order of first use
+    
+    Raises:
+        KeyError: If a name is not in INDEX_EXPR
+    """
+    bands = []
+
+    for name in names:
+        if name not in INDEX_EXPR:
+            raise KeyError("Unknown index '{}', expected one of {}".format(
+                name, sorted(INDEX_EXPR)))
+
+        # Identifiers not followed by '(' (function calls such as sqrt)
+        for band in re.findall(r'\b([a-z]\w*)\b(?!\s*\()', INDEX_EXPR[name]):
+            if band not in bands:
+                bands.append(band)
+
+    return tuple(bands)
+
+
+@functools.lru_cache(maxsize=None)
+def _getConstant(value):
+    """
+    Get a constant image, built once per value.
+    
+    Built on first use rather than at import time, because the scripts call
+    ee.Initialize after importing the modules.
+    
+    Args:
+        value (float): Constant value
+    
+    Returns:
+        ee.Image: Constant image
+    """
+    return ee.Image.constant(value)
+
+
+def _getSharedTerms(bands, terms, first, second):
+    """
+    Get the difference and the sum of two bands, built once per call.
+    
+    SAVI, EVI and EVI2 all start from NIR - Red and NIR + Red, and BU from
+    the NDBI and NDVI terms. Building the terms once and rewriting the
+    denominators on top of them (e.g. NIR + 6×Red as (NIR + Red) + 5×Red)
+    lets the indices of one getIndices() call share those graph nodes.
+    
+    Args:
+        bands (dict): Input bands of the call, by name
+        terms (dict): Terms already built in this call, updated in place
+        first (str): First band name
+        second (str): Second band name
+    
+    Returns:
+        tuple: (first - second, first + second) as ee.Image
+    """
+    if (first, second) not in terms:
+        terms[(first, second)] = (bands[first].subtract(bands[second]),
+                                  bands[first].add(bands[second]))
+
+    return terms[(first, second)]
+
+
+def _getNativeIndex(bands, name, terms):
+    """
+    Build one index of NATIVE_INDICES with ee.Image operators.
+    
+    Every input band comes from the bands map of the call, so each one is
+    selected once however many indices read it.
+    
+    Args:
+        bands (dict): Input bands of the call, by name
+        name (str): Index name, in NATIVE_INDICES
+        terms (dict): Shared terms of the call (see _getSharedTerms())
+    
+    Returns:
+        ee.Image: Unshifted, unnamed index band
+    """
+    if name in NORMALIZED_DIFFERENCES:
+        first, second = NORMALIZED_DIFFERENCES[name]
+
+        return ee.Image.cat(bands[first], bands[second])\
+            .normalizedDifference()
+
+    if name == "cai":
+        return bands["swir2"]\
+            .divide(bands["swir1"])\
+            .toFloat()
+
+    if name == "gcvi":
+        return bands["nir"]\
+            .divide(bands["green"])\
+            .subtract(_getConstant(1))
+
+    if name == "bu":
+        swir1Nir, swir1PlusNir = _getSharedTerms(bands, terms, "swir1", "nir")
+        nirRed, nirPlusRed = _getSharedTerms(bands, terms, "nir", "red")
+
+        return swir1Nir.divide(swir1PlusNir)\
+            .subtract(nirRed.divide(nirPlusRed))
+
+    nirRed, nirPlusRed = _getSharedTerms(bands, terms, "nir", "red")
+
+    if name == "savi":
+        # 1.5 × (NIR - Red) / ((NIR + Red) + 0.5)
+        return nirRed.multiply(_getConstant(1.5))\
+            .divide(nirPlusRed.add(_getConstant(0.5)))
+
+    if name == "evi":
+        # 2.5 × (NIR - Red) / ((NIR + Red) + 5×Red - 7.5×Blue + 1)
+        return nirRed.multiply(_getConstant(2.5))\
+            .divide(nirPlusRed.add(bands["red"].multiply(_getConstant(5)))
+                    .subtract(bands["blue"].multiply(_getConstant(7.5)))
+                    .add(_getConstant(1)))
+
+    # evi2: 2.5 × (NIR - Red) / ((NIR + Red) + 1.4×Red + 1)
+    return nirRed.multiply(_getConstant(2.5))\
+        .divide(nirPlusRed.add(bands["red"].multiply(_getConstant(1.4)))
+                .add(_getConstant(1)))
+
+
+def getIndices(image, names, native=False, shift=True, suffix=""):
+    """
+    Calculate several spectral indices and add them in a single step.
+    
+    Each index is evaluated against the input image, the results are
+    concatenated and added to the image with one addBands() call. Chaining
+    the get*() functions instead adds one band stack per index, each one
+    referencing the previous one, so the graph grows with every index.
+    
+    Args:
+        image (ee.Image): Input image with the bands required by the indices
+        names (list): Index names, keys of INDEX_EXPR (e.g. ['ndvi', 'evi2'])
+        native (bool, optional): Build the indices in NATIVE_INDICES with
+            normalizedDifference() and ee.Image operators instead of the
+            expression parser (default: False)
+        shift (bool, optional): Add 1 to the indices in SHIFTED_INDICES, as
+            the get*() functions do (default: True)
+        suffix (str, optional): Suffix appended to the output band names,
+            e.g. '_l8' for 'ndvi_l8' (default: "")
+    
+    Returns:
+        ee.Image: Image with added index bands, in the order of names
+            Bands already present with the same names are overwritten
+    
+    Raises:
+        KeyError: If a name is not in INDEX_EXPR
+    
+    Example:
+        >>> image = ee.Image('LANDSAT/LC08/C02/T1_L2/...')
+        >>> image = getIndices(image, ['ndvi', 'ndwi', 'savi'])
+    
+    Note:
+        - Values are the same as the get*() functions, including the +1 shift
+          of the indices in SHIFTED_INDICES
+        - shift=False saves one add() per index and keeps the natural ranges
+          (thresholds like gt(0.3) instead of gt(1.3)); the values can then
+          be negative, so store them as float or with a signed integer type
+        - A suffix per sensor (e.g. '_l5', '_l8') keeps the indices of several
+          sensors apart in one image, so that a single reduce() call handles
+          them all; it is a client side string, fixed for the whole call
+        - Earth Engine expressions return one result each, so every index
+          still has its own expression; the gain is the single band stack
+        - native=True is opt-in because normalizedDifference() masks pixels
+          where an input band is negative (surface reflectance can be near
+          zero or below over water and shadows) and always computes in
+          float, while '( nir - red ) / ...' keeps integer division
+          for integer inputs: the results can differ from the expressions
+        - With native=True, SAVI, EVI, EVI2 and BU share their NIR - Red,
+          NIR + Red and NDBI terms; the regrouped sums can differ from the
+          expressions in the last float digits
+    """
+    # Each input band is selected once, for the expressions and the native
+    # operators of all the indices
+    bands = dict((band, image.select([band]))
+                 for band in _getInputBands(tuple(names)))
+
+    indices = []
+    terms = {}
+
+    for name in names:
+        if native and name in NATIVE_INDICES:
+            index = _getNativeIndex(bands, name, terms)
+        else:
+            index = image.expression(INDEX_EXPR[name], bands)
+
+        if shift and name in SHIFTED_INDICES:
+            index = index.add(1)  # Shift range from [-1,1] to [0,2]
+
+        indices.append(index)
+
+    indices = ee.Image.cat(*indices)\
+        .rename([name + suffix for name in names])
+
+    return image.addBands(srcImg=indices, overwrite=True)
+
+
+def mapIndices(collection, names, native=False, shift=True, suffix=""):
+    """
+    Calculate several spectral indices for every image of a collection.
+    
+    Replaces a chain of map(getNDVI).map(getNDWI)... calls by a single
+    map(), whose function adds all the indices with getIndices().
+    
+    Args:
+        collection (ee.ImageCollection): Input collection
+        names (list): Index names, keys of INDEX_EXPR
+        native (bool, optional): See getIndices() (default: False)
+        shift (bool, optional): See getIndices() (default: True)
+        suffix (str, optional): See getIndices() (default: "")
+    
+    Returns:
+        ee.ImageCollection: Collection with the index bands added to every image
+    
+    Raises:
+        KeyError: If a name is not in INDEX_EXPR (before mapping)
+    
+    Example:
+        >>> collection = mapIndices(collection, ['ndvi', 'ndwi', 'evi2'])
+    """
+    names = list(names)
+
+    # Fail client side, not inside the mapped function
+    _getInputBands(tuple(names))
+
+    return collection.map(
+        lambda image: getIndices(image, names, native=native, shift=shift,
+                                 suffix=suffix))
+
+
+def getIndex(image, name, native=False, shift=True, suffix=""):
+    """
+    Calculate one spectral index of INDEX_SPEC by name.
+    
+    Args:
+        image (ee.Image): Input image with the bands required by the index
+        name (str): Index name (e.g. 'ndvi')
+        native (bool, optional): See getIndices() (default: False)
+        shift (bool, optional): See getIndices() (default: True)
+        suffix (str, optional): See getIndices() (default: "")
+    
+    Returns:
+        ee.Image: Image with the added index band
+    
+    Example:
+        >>> name = 'ndwi' if water else 'ndvi'
+        >>> image = getIndex(image, name)
+    """
+    return getIndices(image, [name], native=native, shift=shift,
+                      suffix=suffix)
+
+
+def getIndexSet(image, names, native=False, shift=True, suffix=""):
+    """
+    Calculate the union of several sets of index names, each index once.
+    
+    Useful when the indices come from several sources (e.g. the sets needed
+    by different classifications): duplicate names are dropped, keeping the
+    first occurrence, so every index is in the graph only once.
+    
+    Args:
+        image (ee.Image): Input image with the bands required by the indices
+        names (list): Index names or lists of index names, possibly repeated
+        native (bool, optional): See getIndices() (default: False)
+        shift (bool, optional): See getIndices() (default: True)
+        suffix (str, optional): See getIndices() (default: "")
+    
+    Returns:
+        ee.Image: Image with the added index bands, in order of first occurrence
+    
+    Example:
+        >>> image = getIndexSet(image, [['ndvi', 'evi2'], ['ndvi', 'ndwi']])
+    """
+    union = []
+
+    for item in names:
+        for name in ([item] if isinstance(item, str) else item):
+            if name not in union:
+                union.append(name)
+
+    return getIndices(image, union, native=native, shift=shift,
+                      suffix=suffix)
 
 
-def getNDVI(image):
+def toInt16(image, names, scale=10000):
+    """
+    Scale index bands and store them as int16.
+    
+    Applied once at the end of an index chain, this halves the size of the
+    bands compared to float32 for the reducers and exports that follow.
+    
+    Args:
+        image (ee.Image): Input image with the index bands
+        names (list): Band names to convert (e.g. ['ndvi', 'ndwi', 'savi'])
+        scale (int, float or dict, optional): Scale factor of all the bands,
+            or a dict of scale factors by band name (default: 10000)
+    
+    Returns:
+        ee.Image: Image with the bands replaced by their int16 version
+    
+    Raises:
+        KeyError: If scale is a dict without one of the names
+    
+    Example:
+        >>> image = getIndices(image, ['ndvi', 'ndwi', 'hallcover'])
+        >>> image = toInt16(image, ['ndvi', 'ndwi', 'hallcover'],
+        ...                 scale={'ndvi': 10000, 'ndwi': 10000, 'hallcover': 100})
+    
+    Note:
+        - int16 holds -32768 to 32767, and values out of range are clamped:
+          at 10000 the shifted normalized differences (0 to 2) fit, but
+          unbounded indices (Hall, EVI, CAI, GCVI) need a smaller scale
+        - The country scripts scale with multiplyBy10000() and set the
+          export types with setBandTypes(); this is for other pipelines
+    """
+    scaled = []
+
+    for name in names:
+        factor = scale[name] if isinstance(scale, dict) else scale
+
+        scaled.append(image.select([name]).multiply(factor).toInt16())
+
+    return image.addBands(srcImg=ee.Image.cat(*scaled), overwrite=True)
+
+
+def addIndices(image, functions):
+    """
+    Apply several index functions to an image and add their bands at once.
+    
+    Every function is applied to the input image, not to the output of the
+    previous one, and only the bands it adds are kept. They are added with a
+    single addBands() call, so the graph is one level deep instead of one
+    band stack per function.
+    
+    Args:
+        image (ee.Image): Input image
+        functions (list): Functions taking and returning an ee.Image, adding
+            bands to it (e.g. [getNDVI, getNDWI, getHallCover])
+    
+    Returns:
+        ee.Image: Image with the bands added by all the functions
+    
+    Example:
+        >>> image = addIndices(image, [getNDVI, getEVI2, getHallCover])
+    
+    Note:
+        - The new bands of each function are found server side (bands not in
+          the input image), so no getInfo() call is needed
+        - A function cannot read a band added by another one of the list;
+          chain those calls instead
+        - Bands that a function overwrites are not new and are dropped; for
+          the indices of this module, getIndices() is the direct way
+    """
+    bandNames = image.bandNames()
+
+    newBands = []
+
+    for function in functions:
+        output = ee.Image(function(image))
+
+        # Keep only the bands added by the function
+        newBands.append(output.select(output.bandNames().removeAll(bandNames)))
+
+    return image.addBands(srcImg=ee.Image.cat(*newBands), overwrite=True)
+
+
+def getNDVI(image, shift=True, suffix=""):
     """
     Calculate Normalized Difference Vegetation Index (NDVI).
     
@@ -34,6 +479,10 @@ def getNDVI(image):
     
     Args:
         image (ee.Image): Input image with 'nir' and 'red' bands
+        shift (bool, optional): Add 1 to the index to avoid negative values
+            (default: True)
+        suffix (str, optional): Suffix appended to the output band name
+            (default: "")
     
     Returns:
         ee.Image: Image with added 'ndvi' band
@@ -61,16 +510,10 @@ def getNDVI(image):
         - Drought assessment
         - Biomass estimation
     """
-    exp = '( b("nir") - b("red") ) / ( b("nir") + b("red") )'
-
-    ndvi = image.expression(exp)\
-        .rename(["ndvi"])\
-        .add(1)  # Shift range from [-1,1] to [0,2]
-
-    return image.addBands(srcImg=ndvi, overwrite=True)
+    return getIndices(image, ["ndvi"], shift=shift, suffix=suffix)
 
 
-def getNDBI(image):
+def getNDBI(image, shift=True, suffix=""):
     """
     Calculate Normalized Difference Built-up Index (NDBI).
     
@@ -81,6 +524,10 @@ def getNDBI(image):
     
     Args:
         image (ee.Image): Input image with 'swir1' and 'nir' bands
+        shift (bool, optional): Add 1 to the index to avoid negative values
+            (default: True)
+        suffix (str, optional): Suffix appended to the output band name
+            (default: "")
     
     Returns:
         ee.Image: Image with added 'ndbi' band
@@ -107,16 +554,10 @@ def getNDBI(image):
         - Urban growth monitoring
         - Built-up vs vegetation classification
     """
-    exp = '( b("swir1") - b("nir") ) / ( b("swir1") + b("nir") )'
+    return getIndices(image, ["ndbi"], shift=shift, suffix=suffix)
 
-    ndbi = image.expression(exp)\
-        .rename(["ndbi"])\
-        .add(1)  # Shift range from [-1,1] to [0,2]
 
-    return image.addBands(srcImg=ndbi, overwrite=True)
-
-
-def getUI(image):
+def getUI(image, shift=True, suffix=""):
     """
     Calculate Urban Index (UI).
     
@@ -127,6 +568,10 @@ def getUI(image):
     
     Args:
         image (ee.Image): Input image with 'swir2' and 'nir' bands
+        shift (bool, optional): Add 1 to the index to avoid negative values
+            (default: True)
+        suffix (str, optional): Suffix appended to the output band name
+            (default: "")
     
     Returns:
         ee.Image: Image with added 'ui' band
@@ -151,16 +596,10 @@ def getUI(image):
         - Built-up land mapping
         - Urban planning applications
     """
-    exp = '( b("swir2") - b("nir") ) / ( b("swir2") + b("nir") )'
-
-    ui = image.expression(exp)\
-        .rename(["ui"])\
-        .add(1)  # Shift range from [-1,1] to [0,2]
+    return getIndices(image, ["ui"], shift=shift, suffix=suffix)
 
-    return image.addBands(srcImg=ui, overwrite=True)
 
-
-def getBU(image):
+def getBU(image, suffix=""):
     """
     Calculate Built-Up Index (BU).
     
@@ -169,10 +608,12 @@ def getBU(image):
     urban areas from vegetated areas and bare soil.
     
     Formula: BU = NDBI - NDVI
+             = (SWIR1 - NIR) / (SWIR1 + NIR) - (NIR - Red) / (NIR + Red)
     
     Args:
-        image (ee.Image): Input image with 'ndbi' and 'ndvi' bands
-            Note: Requires NDBI and NDVI to be calculated first
+        image (ee.Image): Input image with 'swir1', 'nir' and 'red' bands
+        suffix (str, optional): Suffix appended to the output band name
+            (default: "")
     
     Returns:
         ee.Image: Image with added 'bu' band
@@ -184,13 +625,12 @@ def getBU(image):
     
     Example:
         >>> image = ee.Image('LANDSAT/LC08/C02/T1_L2/...')
-        >>> image = getNDVI(image)
-        >>> image = getNDBI(image)
         >>> bu_image = getBU(image)
         >>> urban = bu_image.select('bu').gt(1)
     
     Note:
-        - Requires NDBI and NDVI to be calculated beforehand
+        - Computed from the source bands, so NDBI and NDVI do not need to be
+          calculated first (and can be calculated in the same getIndices() call)
         - No +1 offset applied (unlike NDVI/NDBI)
         - Positive values indicate urban, negative indicate vegetation
     
@@ -199,15 +639,10 @@ def getBU(image):
         - Built-up area mapping
         - Land cover classification
     """
-    exp = 'b("ndbi") - b("ndvi")'
-
-    bu = image.expression(exp)\
-        .rename(["bu"])
+    return getIndices(image, ["bu"], suffix=suffix)
 
-    return image.addBands(srcImg=bu, overwrite=True)
 
-
-def getEBBI(image):
+def getEBBI(image, suffix=""):
     """
     Calculate Enhanced Built-Up and Bareness Index (EBBI).
     
@@ -220,6 +655,8 @@ def getEBBI(image):
     Args:
         image (ee.Image): Input image with 'swir1_dn', 'nir_dn', and 'tir_dn' bands
             Note: Requires DN (Digital Number) versions of bands
+        suffix (str, optional): Suffix appended to the output band name
+            (default: "")
     
     Returns:
         ee.Image: Image with added 'ebbi' band
@@ -243,17 +680,10 @@ def getEBBI(image):
         - Impervious surface detection
         - Urban heat island studies
     """
-    # Note: Original formula uses 0.1, but DN version uses 10 (scaling difference)
-    # exp = '( b("swir1") - b("nir") ) / ( 0.1 * sqrt(b("swir1") + b("tir")) )'
-    exp = '( b("swir1_dn") - b("nir_dn") ) / ( 10 * sqrt(b("swir1_dn") + b("tir_dn")) )'
+    return getIndices(image, ["ebbi"], suffix=suffix)
 
-    ebbi = image.expression(exp)\
-        .rename(["ebbi"])
 
-    return image.addBands(srcImg=ebbi, overwrite=True)
-
-
-def getNDWI(image):
+def getNDWI(image, shift=True, suffix=""):
     """
     Calculate Normalized Difference Water Index (NDWI).
     
@@ -264,6 +694,10 @@ def getNDWI(image):
     
     Args:
         image (ee.Image): Input image with 'nir' and 'swir1' bands
+        shift (bool, optional): Add 1 to the index to avoid negative values
+            (default: True)
+        suffix (str, optional): Suffix appended to the output band name
+            (default: "")
     
     Returns:
         ee.Image: Image with added 'ndwi' band
@@ -291,16 +725,10 @@ def getNDWI(image):
         - Wetland delineation
         - Plant water stress detection
     """
-    exp = 'float(b("nir") - b("swir1"))/(b("nir") + b("swir1"))'
-
-    ndwi = image.expression(exp)\
-        .rename(["ndwi"])\
-        .add(1)  # Shift range from [-1,1] to [0,2]
+    return getIndices(image, ["ndwi"], shift=shift, suffix=suffix)
 
-    return image.addBands(srcImg=ndwi, overwrite=True)
 
-
-def getMNDWI(image):
+def getMNDWI(image, shift=True, suffix=""):
     """
     Calculate Modified Normalized Difference Water Index (MNDWI).
     
@@ -312,6 +740,10 @@ def getMNDWI(image):
     
     Args:
         image (ee.Image): Input image with 'green' and 'swir1' bands
+        shift (bool, optional): Add 1 to the index to avoid negative values
+            (default: True)
+        suffix (str, optional): Suffix appended to the output band name
+            (default: "")
     
     Returns:
         ee.Image: Image with added 'mndwi' band
@@ -339,16 +771,10 @@ def getMNDWI(image):
         - Flood mapping
         - Water quality assessment
     """
-    exp = 'float(b("green") - b("swir1"))/(b("green") + b("swir1"))'
-
-    mndwi = image.expression(exp)\
-        .rename(["mndwi"])\
-        .add(1)  # Shift range from [-1,1] to [0,2]
-
-    return image.addBands(srcImg=mndwi, overwrite=True)
+    return getIndices(image, ["mndwi"], shift=shift, suffix=suffix)
 
 
-def getSAVI(image):
+def getSAVI(image, shift=True, suffix=""):
     """
     Calculate Soil Adjusted Vegetation Index (SAVI).
     
@@ -360,6 +786,10 @@ def getSAVI(image):
     
     Args:
         image (ee.Image): Input image with 'nir' and 'red' bands
+        shift (bool, optional): Add 1 to the index to avoid negative values
+            (default: True)
+        suffix (str, optional): Suffix appended to the output band name
+            (default: "")
     
     Returns:
         ee.Image: Image with added 'savi' band
@@ -393,16 +823,10 @@ def getSAVI(image):
         - Arid region vegetation studies
         - Early crop growth detection
     """
-    exp = '1.5 * (b("nir") - b("red")) / (0.5 + b("nir") + b("red"))'
+    return getIndices(image, ["savi"], shift=shift, suffix=suffix)
 
-    savi = image.expression(exp)\
-        .rename(["savi"])\
-        .add(1)  # Shift to positive range
 
-    return image.addBands(srcImg=savi, overwrite=True)
-
-
-def getPRI(image):
+def getPRI(image, shift=True, suffix=""):
     """
     Calculate Photochemical Reflectance Index (PRI).
     
@@ -413,6 +837,10 @@ def getPRI(image):
     
     Args:
         image (ee.Image): Input image with 'blue' and 'green' bands
+        shift (bool, optional): Add 1 to the index to avoid negative values
+            (default: True)
+        suffix (str, optional): Suffix appended to the output band name
+            (default: "")
     
     Returns:
         ee.Image: Image with added 'pri' band
@@ -440,16 +868,10 @@ def getPRI(image):
         - Crop health monitoring
         - Ecosystem productivity studies
     """
-    exp = 'float(b("blue") - b("green"))/(b("blue") + b("green"))'
-
-    pri = image.expression(exp)\
-        .rename(["pri"])\
-        .add(1)  # Shift range from [-1,1] to [0,2]
+    return getIndices(image, ["pri"], shift=shift, suffix=suffix)
 
-    return image.addBands(srcImg=pri, overwrite=True)
 
-
-def getCAI(image):
+def getCAI(image, shift=True, maskZero=False, suffix=""):
     """
     Calculate Cellulose Absorption Index (CAI).
     
@@ -461,6 +883,12 @@ def getCAI(image):
     
     Args:
         image (ee.Image): Input image with 'swir2' and 'swir1' bands
+        shift (bool, optional): Add 1 to the index to avoid negative values
+            (default: True)
+        maskZero (bool, optional): Mask the index where SWIR1 is not positive
+            (default: False)
+        suffix (str, optional): Suffix appended to the output band name
+            (default: "")
     
     Returns:
         ee.Image: Image with added 'cai' band
@@ -480,6 +908,10 @@ def getCAI(image):
         - Higher values indicate more cellulose absorption
         - Useful for crop residue detection
         - Complementary to greenness indices
+        - Earth Engine returns 0 for a division by 0, so a zero SWIR1 (water,
+          deep shadow) gives CAI = 0 (1 after the shift) rather than Inf or
+          NaN. That value is still meaningless: maskZero=True masks it so that
+          reducers (median, percentiles) ignore those pixels
     
     Applications:
         - Crop residue mapping
@@ -488,16 +920,18 @@ def getCAI(image):
         - Fire fuel assessment
         - Decomposition studies
     """
-    exp = 'float( b("swir2") / b("swir1") )'
+    image = getIndices(image, ["cai"], shift=shift, suffix=suffix)
+
+    if maskZero:
+        cai = image.select(["cai" + suffix])\
+            .updateMask(image.select(["swir1"]).gt(0))
 
-    cai = image.expression(exp)\
-        .rename(["cai"])\
-        .add(1)  # Shift to avoid values near zero
+        image = image.addBands(srcImg=cai, overwrite=True)
 
-    return image.addBands(srcImg=cai, overwrite=True)
+    return image
 
 
-def getEVI(image):
+def getEVI(image, shift=True, suffix=""):
     """
     Calculate Enhanced Vegetation Index (EVI).
     
@@ -509,6 +943,10 @@ def getEVI(image):
     
     Args:
         image (ee.Image): Input image with 'nir', 'red', and 'blue' bands
+        shift (bool, optional): Add 1 to the index to avoid negative values
+            (default: True)
+        suffix (str, optional): Suffix appended to the output band name
+            (default: "")
     
     Returns:
         ee.Image: Image with added 'evi' band
@@ -544,16 +982,10 @@ def getEVI(image):
         - Land cover classification
         - Phenology studies
     """
-    exp = '2.5 * ((b("nir") - b("red")) / (b("nir") + 6 * b("red") - 7.5 * b("blue") + 1))'
-
-    evi = image.expression(exp)\
-        .rename(["evi"])\
-        .add(1)  # Shift to positive range
+    return getIndices(image, ["evi"], shift=shift, suffix=suffix)
 
-    return image.addBands(srcImg=evi, overwrite=True)
 
-
-def getEVI2(image):
+def getEVI2(image, shift=True, suffix=""):
     """
     Calculate Two-Band Enhanced Vegetation Index (EVI2).
     
@@ -565,6 +997,10 @@ def getEVI2(image):
     
     Args:
         image (ee.Image): Input image with 'nir' and 'red' bands
+        shift (bool, optional): Add 1 to the index to avoid negative values
+            (default: True)
+        suffix (str, optional): Suffix appended to the output band name
+            (default: "")
     
     Returns:
         ee.Image: Image with added 'evi2' band
@@ -599,16 +1035,10 @@ def getEVI2(image):
         - Agricultural monitoring
         - Forest health assessment
     """
-    exp = '2.5 * (b("nir") - b("red")) / (b("nir") + (2.4 * b("red")) + 1)'
-
-    evi2 = image.expression(exp)\
-        .rename(["evi2"])\
-        .add(1)  # Shift to positive range
-
-    return image.addBands(srcImg=evi2, overwrite=True)
+    return getIndices(image, ["evi2"], shift=shift, suffix=suffix)
 
 
-def getHallCover(image):
+def getHallCover(image, clamp=None, suffix=""):
     """
     Calculate Hall Forest Cover Index.
     
@@ -620,6 +1050,10 @@ def getHallCover(image):
     
     Args:
         image (ee.Image): Input image with 'red', 'nir', and 'swir2' bands
+        clamp (tuple, optional): (low, high) bounds of the exponent, e.g.
+            (-20, 10), or None to leave it unbounded (default: None)
+        suffix (str, optional): Suffix appended to the output band name
+            (default: "")
     
     Returns:
         ee.Image: Image with added 'hallcover' band
@@ -652,16 +1086,10 @@ def getHallCover(image):
     Reference:
         Hall et al. forest cover estimation methodology
     """
-    exp = '( (-b("red") * 0.017) - (b("nir") * 0.007) - (b("swir2") * 0.079) + 5.22 )'
+    return _getHallBands(image, ["hallcover"], clamp, suffix)
 
-    hallcover = image.expression(exp)\
-        .exp()\
-        .rename(["hallcover"])
 
-    return image.addBands(hallcover)
-
-
-def getHallHeigth(image):
+def getHallHeigth(image, clamp=None, suffix=""):
     """
     Calculate Hall Forest Height Index.
     
@@ -673,6 +1101,10 @@ def getHallHeigth(image):
     
     Args:
         image (ee.Image): Input image with 'red', 'nir', and 'swir1' bands
+        clamp (tuple, optional): (low, high) bounds of the exponent, e.g.
+            (-20, 10), or None to leave it unbounded (default: None)
+        suffix (str, optional): Suffix appended to the output band name
+            (default: "")
     
     Returns:
         ee.Image: Image with added 'hallheigth' band
@@ -706,16 +1138,91 @@ def getHallHeigth(image):
     Reference:
         Hall et al. forest height estimation methodology
     """
-    exp = '( (-b("red") * 0.039) - (b("nir") * 0.011) - (b("swir1") * 0.026) + 4.13 )'
+    return _getHallBands(image, ["hallheigth"], clamp, suffix)
 
-    hallheigth = image.expression(exp)\
-        .exp()\
-        .rename(["hallheigth"])
 
-    return image.addBands(hallheigth)
+def getHallBoth(image, clamp=None, suffix="", matrix=False):
+    """
+    Calculate the Hall Forest Cover and Height indices together.
+    
+    Both indices are the exponential of a linear combination of the same
+    bands. The two linear combinations are concatenated and exp() is applied
+    once to the 2-band image, instead of once per index.
+    
+    Args:
+        image (ee.Image): Input image with 'red', 'nir', 'swir1' and 'swir2' bands
+        clamp (tuple, optional): (low, high) bounds of the exponent, e.g.
+            (-20, 10), or None to leave it unbounded (default: None)
+        suffix (str, optional): Suffix appended to the output band names
+            (default: "")
+        matrix (bool, optional): Compute both linear combinations as one
+            matrix product of the HALL_COEFFICIENTS rows by the HALL_BANDS
+            pixel vector instead of two expressions (default: False). Same
+            values up to float rounding
+    
+    Returns:
+        ee.Image: Image with added 'hallcover' and 'hallheigth' bands
+            Same values as getHallCover() and getHallHeigth()
+    
+    Example:
+        >>> image = ee.Image('LANDSAT/LC08/C02/T1_L2/...')
+        >>> image = getHallBoth(image)
+        >>> dense = image.select('hallcover').gt(70)
+        >>> tall_dense = dense.And(image.select('hallheigth').gt(20))
+    """
+    return _getHallBands(image, ["hallcover", "hallheigth"], clamp, suffix, matrix)
+
+
+def _getHallBands(image, names, clamp=None, suffix="", matrix=False):
+    """
+    Add Hall indices as exp() of their HALL_LINEAR_EXPR, applied once.
+    
+    Args:
+        image (ee.Image): Input image
+        names (list): Hall index names, keys of HALL_LINEAR_EXPR
+        clamp (tuple, optional): (low, high) bounds of the exponent (default: None)
+        suffix (str, optional): Suffix appended to the band names (default: "")
+        matrix (bool, optional): Use the matrix form (default: False)
+    
+    Returns:
+        ee.Image: Image with the added Hall bands
+    
+    Note:
+        - With reflectance inputs (0-1) the exponents stay around 4 to 5.2,
+          and with SR × 10000 inputs they are strongly negative (exp() tends
+          to 0): float32 exp() only overflows above ~88, e.g. for huge negative
+          outliers. The clamp is an opt-in guard for such inputs; it changes
+          the values only where the exponent is out of the bounds
+    """
+    if matrix:
+        coefficients = ee.Image(ee.Array(
+            [HALL_COEFFICIENTS[name][0] for name in names]))
+
+        biases = ee.Image.constant(
+            [HALL_COEFFICIENTS[name][1] for name in names])
+
+        # (indices × bands) · (bands × 1) -> one value per index
+        linear = coefficients\
+            .matrixMultiply(image.select(HALL_BANDS).toArray().toArray(1))\
+            .arrayProject([0])\
+            .arrayFlatten([names])\
+            .add(biases)
+    else:
+        bands = dict((band, image.select([band]))
+                     for band in _getInputBands(tuple(names)))
 
+        linear = ee.Image.cat(
+            *[image.expression(HALL_LINEAR_EXPR[name], bands) for name in names])
 
-def getGCVI(image):
+    if clamp is not None:
+        linear = linear.clamp(clamp[0], clamp[1])
+
+    hall = linear.exp().rename([name + suffix for name in names])
+
+    return image.addBands(srcImg=hall, overwrite=True)
+
+
+def getGCVI(image, shift=True, suffix=""):
     """
     Calculate Green Chlorophyll Vegetation Index (GCVI).
     
@@ -727,6 +1234,10 @@ def getGCVI(image):
     
     Args:
         image (ee.Image): Input image with 'nir' and 'green' bands
+        shift (bool, optional): Add 1 to the index to avoid negative values
+            (default: True)
+        suffix (str, optional): Suffix appended to the output band name
+            (default: "")
     
     Returns:
         ee.Image: Image with added 'gcvi' band
@@ -759,10 +1270,4 @@ def getGCVI(image):
     Alternative Names:
         - Also known as GRVI (Green Ratio Vegetation Index)
     """
-    exp = 'b("nir") / b("green") - 1'
-
-    gcvi = image.expression(exp)\
-        .rename(["gcvi"])\
-        .add(1)  # Shift to positive range
-
-    return image.addBands(gcvi)
+    return getIndices(image, ["gcvi"], shift=shift, suffix=suffix)
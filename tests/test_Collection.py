@@ -0,0 +1,91 @@
+import ee
+import pytest
+
+from modules.Collection import _pruneTrashList, _validateCollectionArgs
+
+
+def test_prune_keeps_ids_in_range():
+    trashList = [
+        'LC08_226080_20191231',
+        'LC08_226080_20200101',
+        'LC08_226080_20200615',
+        'LC08_226080_20210101',
+    ]
+
+    kept = _pruneTrashList(trashList, '2020-01-01', '2020-12-31')
+
+    assert kept == ['LC08_226080_20200101', 'LC08_226080_20200615']
+
+
+def test_prune_keeps_date_end():
+    # The end date is kept: pruning never drops an ID that could match
+    kept = _pruneTrashList(['LC08_226080_20201231'], '2020-01-01', '2020-12-31')
+
+    assert kept == ['LC08_226080_20201231']
+
+
+def test_prune_keeps_ids_without_date():
+    trashList = [
+        '20200101T133231_20200101T133232_T22KFG',   # Sentinel-2
+        'LC08_226080',
+        'LC08_226080_2020010',
+        'LC08_226080_2020O101',
+    ]
+
+    kept = _pruneTrashList(trashList, '2021-01-01', '2021-12-31')
+
+    assert kept == sorted(trashList)
+
+
+def test_prune_full_asset_paths():
+    trashList = [
+        'LANDSAT/LC08/C02/T1_L2/LC08_226080_20200101',
+        'LANDSAT/LC08/C02/T1_L2/LC08_226080_20190101',
+    ]
+
+    kept = _pruneTrashList(trashList, '2020-01-01', '2020-12-31')
+
+    assert kept == ['LANDSAT/LC08/C02/T1_L2/LC08_226080_20200101']
+
+
+def test_prune_datetime_strings():
+    kept = _pruneTrashList(
+        ['LC08_226080_20200101', 'LC08_226080_20200102'],
+        '2020-01-02T00:00:00', '2020-01-02T23:59:59')
+
+    assert kept == ['LC08_226080_20200102']
+
+
+def test_prune_non_string_dates_keep_everything():
+    trashList = ['LC08_226080_20190101', 'LC08_226080_20190101', 'LC08_226080_20200101']
+    dateEnd = ee.ComputedObject(None, None, 'dateEnd')
+
+    kept = _pruneTrashList(trashList, '2020-01-01', dateEnd)
+
+    # Deduplicated and sorted, but not pruned
+    assert kept == ['LC08_226080_20190101', 'LC08_226080_20200101']
+
+
+def test_validate_accepts_valid_args():
+    _validateCollectionArgs('SR', '2020-01-01', '2020-12-31', 0, None)
+    _validateCollectionArgs('TOA', '2020-01-01', '2020-12-31', 100.0, ['LC08_226080_20200101'])
+
+
+def test_validate_leaves_ee_objects_to_the_server():
+    cloudCover = ee.ComputedObject(None, None, 'cloudCover')
+    dateEnd = ee.ComputedObject(None, None, 'dateEnd')
+
+    _validateCollectionArgs('SR', '2020-01-01', dateEnd, cloudCover, None)
+
+
+@pytest.mark.parametrize('args', [
+    ('sr', '2020-01-01', '2020-12-31', 50, None),
+    ('SR', '2020-01-01', '2020-12-31', -1, None),
+    ('SR', '2020-01-01', '2020-12-31', 100.5, None),
+    ('SR', '2020/01/01', '2020-12-31', 50, None),
+    ('SR', '2020-01-01', '2020-13-01', 50, None),
+    ('SR', '2020-01-01', '2020-12-31', 50, ['LC08_226080_20200101', 42]),
+])
+def test_validate_raises(args):
+    with pytest.raises(ValueError):
+        _validateCollectionArgs(*args)
@@ -0,0 +1,83 @@
+import sqlite3
+
+import ee
+
+from modules.DispatchLog import getDispatchedNames, openDispatchLog, recordDispatch
+
+METADATA = {
+    'grid': 'SC-22-X-A',
+    'biome': 'AMAZONIA',
+    'satellite': 'l8',
+    'year': 2020,
+    'version': '1',
+}
+
+
+def _setTasks(monkeypatch, tasks):
+    monkeypatch.setattr(ee.data, 'getTaskList', lambda: tasks)
+
+
+def test_open_creates_and_migrates(tmp_path):
+    path = str(tmp_path / 'dispatch.sqlite')
+
+    # Log written before the task id column existed
+    connection = sqlite3.connect(path)
+    connection.execute(
+        'CREATE TABLE dispatched (outputName TEXT PRIMARY KEY, started_at TEXT, '
+        'grid TEXT, biome TEXT, satellite TEXT, year INTEGER, version TEXT)')
+    connection.close()
+
+    connection = openDispatchLog(path)
+    columns = [row[1] for row in connection.execute('PRAGMA table_info(dispatched)')]
+
+    assert columns[-1] == 'task_id'
+
+
+def test_requeues_failed_and_cancelled(tmp_path, monkeypatch):
+    connection = openDispatchLog(str(tmp_path / 'dispatch.sqlite'))
+
+    recordDispatch(connection, 'running', 'T1', METADATA)
+    recordDispatch(connection, 'failed', 'T2', METADATA)
+    recordDispatch(connection, 'cancelled', 'T3', METADATA)
+    recordDispatch(connection, 'completed', 'T4', METADATA)
+
+    _setTasks(monkeypatch, [
+        {'id': 'T1', 'state': 'RUNNING', 'description': 'running'},
+        {'id': 'T2', 'state': 'FAILED', 'description': 'failed'},
+        {'id': 'T3', 'state': 'CANCELLED', 'description': 'cancelled'},
+        {'id': 'T4', 'state': 'COMPLETED', 'description': 'completed'},
+    ])
+
+    assert getDispatchedNames(connection) == {'running', 'completed'}
+
+    # The failed entries are gone from the log
+    names = set(row[0] for row in connection.execute('SELECT outputName FROM dispatched'))
+
+    assert names == {'running', 'completed'}
+
+
+def test_matches_by_name_without_task_id(tmp_path, monkeypatch):
+    connection = openDispatchLog(str(tmp_path / 'dispatch.sqlite'))
+
+    recordDispatch(connection, 'retried', None, METADATA)
+    recordDispatch(connection, 'unknown', None, METADATA)
+
+    # Newest first: the latest task of 'retried' failed
+    _setTasks(monkeypatch, [
+        {'id': 'T6', 'state': 'FAILED', 'description': 'retried'},
+        {'id': 'T5', 'state': 'COMPLETED', 'description': 'retried'},
+    ])
+
+    # Tasks missing from the server list are kept
+    assert getDispatchedNames(connection) == {'unknown'}
+
+
+def test_empty_log_skips_task_list(tmp_path, monkeypatch):
+    connection = openDispatchLog(str(tmp_path / 'dispatch.sqlite'))
+
+    def getTaskList():
+        raise AssertionError('getTaskList called on an empty log')
+
+    monkeypatch.setattr(ee.data, 'getTaskList', getTaskList)
+
+    assert getDispatchedNames(connection) == set()
@@ -0,0 +1,57 @@
+import math
+
+import numpy
+
+from modules.LocalTexture import MASKED_LEVEL, _quantize, getLocalEntropy
+
+
+def _entropy(counts):
+    # H × 100 of a window histogram, computed by hand
+    total = float(sum(counts))
+
+    return -100 * sum(c / total * math.log2(c / total) for c in counts if c)
+
+
+def test_quantize_rounds_halves_up():
+    # numpy.rint() would give 0, 2, 2 (half to even)
+    gray = _quantize(numpy.array([0.5, 1.5, 2.5]), 4, (0, 3))
+
+    assert gray.tolist() == [1, 2, 3]
+
+
+def test_quantize_masks_nan():
+    gray = _quantize(numpy.array([numpy.nan, -10.0, 10.0]), 4, (0, 3))
+
+    assert gray.tolist() == [MASKED_LEVEL, 0, 3]
+
+
+def test_entropy_window():
+    array = numpy.array([
+        [0, 1, 0],
+        [1, 1, 1],
+        [0, 0, 0],
+    ], dtype=numpy.float64)
+
+    entropy = getLocalEntropy(array, radius=1, levels=2, valueRange=(0, 1))
+
+    # Center: whole array, 5 zeros and 4 ones
+    assert math.isclose(entropy[1, 1], _entropy([5, 4]))
+    # Corner: window truncated to [[0, 1], [1, 1]]
+    assert math.isclose(entropy[0, 0], _entropy([1, 3]))
+    # Bottom edge: window [[1, 1, 1], [0, 0, 0]]
+    assert math.isclose(entropy[2, 1], _entropy([3, 3]))
+
+
+def test_entropy_skips_nan():
+    array = numpy.array([
+        [0, 1, 0],
+        [1, numpy.nan, 1],
+        [0, 0, 0],
+    ])
+
+    entropy = getLocalEntropy(array, radius=1, levels=2, valueRange=(0, 1))
+
+    assert numpy.isnan(entropy[1, 1])
+    # NaN left out of its neighbours: [[0, 1, 0], [1, 1]] and [[0, 1], [1], [0, 0]]
+    assert math.isclose(entropy[0, 1], _entropy([2, 3]))
+    assert math.isclose(entropy[1, 0], _entropy([3, 2]))